@@ -2,11 +2,7 @@
 import streamlit as st
 from src.interface.styles import apply_styles
 from src.interface.sidebar import show_sidebar
-from src.interface.pages import home, questionnaire, test_selection, test_dyscalculie, test_tdah, results_dyscalculie, results_tdah
-import src.interface.pages.test_dyslexie as test_dyslexie
-import src.interface.pages.results_dyslexie as results_dyslexie
-import src.interface.pages.test_dysgraphie as test_dysgraphie
-import src.interface.pages.results_dysgraphie as results_dysgraphie
+from src.interface.router import show_page
 
 # Configure the page
 st.set_page_config(
@@ -52,26 +48,5 @@ if 'dysgraphie_analysis' not in st.session_state:
 # Show sidebar
 show_sidebar()
 
-# Route to the correct page based on state
-if st.session_state['page'] == 'accueil':
-    home.show_page()
-elif st.session_state['page'] == 'questionnaire':
-    questionnaire.show_page()
-elif st.session_state['page'] == 'test_selection':
-    test_selection.show_page()
-elif st.session_state['page'] == 'test_dyscalculie':
-    test_dyscalculie.show_page()
-elif st.session_state['page'] == 'test_tdah':
-    test_tdah.show_page()
-elif st.session_state['page'] == 'test_dyslexie':
-    test_dyslexie.show_page()
-elif st.session_state['page'] == 'test_dysgraphie':
-    test_dysgraphie.show_page()
-elif st.session_state['page'] == 'resultats_dyscalculie':
-    results_dyscalculie.show_page()
-elif st.session_state['page'] == 'resultats_tdah':
-    results_tdah.show_page()
-elif st.session_state['page'] == 'resultats_dyslexie':
-    results_dyslexie.show_page()
-elif st.session_state['page'] == 'resultats_dysgraphie':
-    results_dysgraphie.show_page()
\ No newline at end of file
+# Route to the correct page based on state (its module is imported on first visit)
+show_page(st.session_state['page'])
\ No newline at end of file
@@ -0,0 +1,101 @@
+# File path: src/interface/background.py
+import os
+import time
+import streamlit as st
+from src.utils.llm_orchestrator import wait_for
+
+# How long a rendered page keeps waiting for late LLM answers before giving up
+BACKGROUND_REFRESH_SECONDS = float(os.getenv('LLM_BACKGROUND_REFRESH_SECONDS', '60'))
+
+def pending_future(session_key):
+    """
+    Return the background call still computing a session value, if any.
+
+    Args:
+        session_key: Session value the call will fill (its future is kept under session_key + '_future')
+
+    Returns:
+        Future or None
+    """
+    return st.session_state.get(f"{session_key}_future")
+
+def keep_in_background(session_key, future):
+    """Remember a call that missed the page budget so a later run can use its result."""
+    st.session_state[f"{session_key}_future"] = future
+
+def adopt_background_result(session_key):
+    """
+    Store the result of a finished background call in the session.
+
+    Args:
+        session_key: Session value the call fills
+
+    Returns:
+        bool: True if a result was adopted (a failed call leaves the value unchanged)
+    """
+    future = pending_future(session_key)
+    if future is None or not future.done():
+        return False
+    st.session_state[f"{session_key}_future"] = None
+    result = wait_for(future, timeout=0)
+    if result is None:
+        return False
+    st.session_state[session_key] = result
+    return True
+
+def remaining_budget(session_key, budget):
+    """
+    Seconds left of a page's latency budget for a session value, counted from
+    the first run that asked. Later reruns only get what is left, so a spent
+    budget is not waited again on every rerun.
+
+    Args:
+        session_key: Session value the page waits for
+        budget: Latency budget in seconds (see latency_budget)
+
+    Returns:
+        float: Remaining seconds, 0 once the budget is spent
+    """
+    deadline = st.session_state.get(f"{session_key}_deadline")
+    if deadline is None:
+        deadline = time.time() + budget
+        st.session_state[f"{session_key}_deadline"] = deadline
+    return max(0.0, deadline - time.time())
+
+def reset_budget(session_key):
+    """Start a fresh latency budget for a session value, e.g. when a test is taken again."""
+    st.session_state.pop(f"{session_key}_deadline", None)
+
+def forget_result(session_key):
+    """Drop a session value and the background call computing it, e.g. when a test is taken again."""
+    st.session_state[session_key] = None
+    st.session_state[f"{session_key}_future"] = None
+
+def rerun_when_ready(session_keys, max_wait=None, poll_interval=0.5):
+    """
+    Once the page is rendered, wait for the background calls that missed the
+    budget and rerun the page as soon as one of them finishes, replacing the
+    fallback by the LLM answer.
+
+    Call it at the very end of a page. The wait touches a placeholder at every
+    poll so Streamlit can still interrupt it when the user clicks a button.
+
+    Args:
+        session_keys: Session values that may have a background call pending
+        max_wait: Maximum wait in seconds, defaults to BACKGROUND_REFRESH_SECONDS
+        poll_interval: Delay between two checks
+    """
+    futures = [pending_future(key) for key in session_keys]
+    futures = [future for future in futures if future is not None]
+    if not futures:
+        return
+
+    if max_wait is None:
+        max_wait = BACKGROUND_REFRESH_SECONDS
+    deadline = time.monotonic() + max_wait
+    heartbeat = st.empty()
+    while time.monotonic() < deadline:
+        if any(future.done() for future in futures):
+            st.rerun()
+        time.sleep(poll_interval)
+        heartbeat.empty()
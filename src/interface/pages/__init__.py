@@ -1,4 +1,10 @@
 # File path: src/interface/pages/__init__.py
-from . import home, questionnaire, test_selection, test_dyscalculie, test_tdah, results_dyscalculie, results_tdah, test_dysgraphie, results_dysgraphie
+import importlib
 
-__all__ = ['home', 'questionnaire', 'test_selection', 'test_dyscalculie', 'test_tdah', 'results_dyscalculie', 'results_tdah', 'test_dysgraphie', 'results_dysgraphie']
\ No newline at end of file
+__all__ = ['home', 'questionnaire', 'test_selection', 'test_dyscalculie', 'test_tdah', 'results_dyscalculie', 'results_tdah', 'test_dyslexie', 'results_dyslexie', 'test_dysgraphie', 'results_dysgraphie']
+
+def __getattr__(name):
+    # Pages are imported on first access, so importing one page doesn't load them all
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
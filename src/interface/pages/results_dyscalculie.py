@@ -3,7 +3,11 @@ from src.utils.image_utils import dyscalc_b64
 from src.utils.score_utils import check_answers_and_provide_solutions
 from src.utils.llm_utils import analyze_results_with_ai
 from src.solutions import provide_improved_dyscalculia_solution
+from src.solutions.activities_manager import rank_activities
+from src.solutions.improved_dyscalculia import ACTIVITY_RERANK_ENABLED, select_recommended_activities
 from src.llm_connector import get_llm_connector
+from src.utils.llm_orchestrator import LLMCallGroup, latency_budget, submit_llm_call
+from src.interface.background import adopt_background_result, keep_in_background, pending_future, rerun_when_ready
 
 def show_page():
     """Display the dyscalculia results page"""
@@ -14,12 +18,44 @@ def show_page():
     # Vérifier les réponses et obtenir les solutions si nécessaire
     correct_answers, total_questions, solutions = check_answers_and_provide_solutions("dyscalculie", responses)
     
-    # Analyse des résultats avec le LLM
-    if 'dyscalculia_analysis' not in st.session_state:
+    # Les activités sont choisies localement, sans attendre le LLM
+    llm_connector = get_llm_connector()
+    adopt_background_result('recommended_activities')
+    if st.session_state.get('recommended_activities') is None:
+        st.session_state['recommended_activities'] = rank_activities(responses)
+        # Le LLM peut ensuite les réordonner en arrière-plan, en même temps que l'analyse:
+        # faute d'analyse du LLM, il part de l'analyse composée localement (cache ou règles)
+        if ACTIVITY_RERANK_ENABLED:
+            keep_in_background(
+                'recommended_activities',
+                submit_llm_call(
+                    select_recommended_activities,
+                    st.session_state.get('dyscalculia_analysis')
+                    or analyze_results_with_ai("dyscalculie", responses, timeout=0) or "",
+                    responses
+                )
+            )
+    
+    # Seule l'analyse attend le LLM, sous le délai de la page
+    calls = LLMCallGroup(latency_budget('resultats_dyscalculie'))
+    adopt_background_result('dyscalculia_analysis')
+    if st.session_state.get('dyscalculia_analysis') is None and pending_future('dyscalculia_analysis') is None:
+        calls.submit('analysis', analyze_results_with_ai, "dyscalculie", responses)
+    
+    if calls.futures:
         with st.spinner("Analyse des résultats en cours..."):
-            st.session_state['dyscalculia_analysis'] = analyze_results_with_ai("dyscalculie", responses)
+            results = calls.results()
+        # Un appel hors budget continue en arrière-plan et remplacera la valeur par défaut
+        pending = calls.pending()
+        if 'analysis' in pending:
+            keep_in_background('dyscalculia_analysis', pending['analysis'])
+        if results.get('analysis') is not None:
+            st.session_state['dyscalculia_analysis'] = results['analysis']
     
-    analysis = st.session_state['dyscalculia_analysis']
+    analysis = st.session_state.get('dyscalculia_analysis')
+    # Tant que l'analyse du LLM est attendue, afficher celle du cache ou l'analyse locale
+    if analysis is None:
+        analysis = analyze_results_with_ai("dyscalculie", responses, timeout=0)
     
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -46,17 +82,19 @@ def show_page():
         st.markdown(f"""
         <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid #FF6B6B;">
             <h3 style="color: #FF6B6B; text-align: center;">📊 Analyse personnalisée</h3>
-            <p style="font-size: 1.1rem; line-height: 1.6; color: #333; white-space: pre-line;">
+            <div style="font-size: 1.1rem; line-height: 1.6; color: #333;">
                 {analysis}
-            </p>
+            </div>
         </div>
         """, unsafe_allow_html=True)
     
-    # Appel à notre module de solution amélioré pour dyscalculie
-    llm_connector = get_llm_connector()
+    # Appel à notre module de solution amélioré pour dyscalculie, sans attendre l'analyse du LLM
     provide_improved_dyscalculia_solution(analysis, responses, llm_connector)
     
     # Bouton pour revenir à l'accueil
     if st.button("Retour à l'accueil", key="btn_retour_dyscalculie"):
         st.session_state['page'] = 'accueil'
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+    
+    # Rafraîchir la page dès que les réponses en retard sont prêtes
+    rerun_when_ready(['dyscalculia_analysis', 'recommended_activities'])
@@ -4,8 +4,16 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from src.utils.llm_utils import analyze_results_with_ai
+from src.utils.llm_utils import analyze_results_with_ai, prefetch_analysis, promote_analysis
 from src.llm_connector import get_llm_connector
+from src.utils.llm_orchestrator import latency_budget
+from src.interface.background import (
+    adopt_background_result,
+    keep_in_background,
+    pending_future,
+    remaining_budget,
+    rerun_when_ready
+)
 
 def show_page():
     """Display the dysgraphie test results page"""
@@ -214,6 +222,31 @@ def show_page():
     # This will be replaced with a call like:
     # provide_dysgraphie_solution(analysis, st.session_state['dysgraphie_responses'], llm_connector)
     
+    # Recommandations personnalisées, pré-générées en arrière-plan pendant la fin du test
+    personalised = None
+    if st.session_state.get('dysgraphie_analysis') is None:
+        future = pending_future('dysgraphie_analysis')
+        if future is None:
+            future = prefetch_analysis("dysgraphie", st.session_state['dysgraphie_responses'])
+            keep_in_background('dysgraphie_analysis', future)
+        # La page attend la préanalyse: elle passe devant les autres préchargements
+        promote_analysis(future)
+        # Le délai de la page n'est attendu qu'une fois: les reruns suivants n'attendent que le reste
+        remaining = remaining_budget('dysgraphie_analysis', latency_budget('resultats_dysgraphie'))
+        # Réponse en cache, ou celle de la préanalyse en cours (rejointe sans second appel Bedrock)
+        # dans la limite du délai; au-delà, réponse de secours, celle du LLM remplacera la page à son arrivée
+        with st.spinner("Analyse des résultats en cours..."):
+            personalised = analyze_results_with_ai("dysgraphie", st.session_state['dysgraphie_responses'], timeout=remaining)
+        adopt_background_result('dysgraphie_analysis')
+    
+    personalised = st.session_state.get('dysgraphie_analysis') or personalised
+    if personalised:
+        st.markdown(f"""
+        <div style="background-color: rgba(93, 95, 239, 0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+            {personalised}
+        </div>
+        """, unsafe_allow_html=True)
+    
     # For now, display default recommendations
     st.markdown("""
     <div style="background-color: rgba(0, 150, 199, 0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px;">
@@ -266,6 +299,9 @@ def show_page():
                 del st.session_state['dysgraphie_current_step']
             if 'dysgraphie_responses' in st.session_state:
                 del st.session_state['dysgraphie_responses']
+            st.session_state['dysgraphie_analysis'] = None
+            if 'dysgraphie_analysis_future' in st.session_state:
+                del st.session_state['dysgraphie_analysis_future']
             
             # Navigate to test page
             st.session_state['page'] = "test_dysgraphie"
@@ -278,4 +314,7 @@ def show_page():
     with col3:
         if st.button("🏠 Retour à l'accueil", key="home_dysgraphie_results"):
             st.session_state['page'] = "accueil"
-            st.rerun()
\ No newline at end of file
+            st.rerun()
+    
+    # Rafraîchir la page dès que les recommandations en retard sont prêtes
+    rerun_when_ready(['dysgraphie_analysis'])
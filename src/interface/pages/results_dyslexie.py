@@ -3,8 +3,16 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from src.utils.llm_utils import generate_dyslexie_recommendations
 from src.solutions.dyslexie import provide_dyslexie_solution
+from src.utils.llm_utils import analyze_results_with_ai, prefetch_analysis, promote_analysis
+from src.utils.llm_orchestrator import latency_budget
+from src.interface.background import (
+    adopt_background_result,
+    keep_in_background,
+    pending_future,
+    remaining_budget,
+    rerun_when_ready
+)
 
 def show_page():
     """Display the dyslexia test results page"""
@@ -210,6 +218,36 @@ def show_page():
     </div>
     """, unsafe_allow_html=True)
     
+    # Recommandations personnalisées, pré-générées en arrière-plan pendant la fin du test
+    personalised = None
+    if st.session_state.get('dyslexie_recommendations') is None:
+        analysis_responses = {
+            'dyslexie_detailed_results': results,
+            'age': st.session_state.get('dyslexie_age'),
+            'classe': st.session_state.get('dyslexie_classe')
+        }
+        future = pending_future('dyslexie_recommendations')
+        if future is None:
+            future = prefetch_analysis("dyslexie", analysis_responses)
+            keep_in_background('dyslexie_recommendations', future)
+        # La page attend la préanalyse: elle passe devant les autres préchargements
+        promote_analysis(future)
+        # Le délai de la page n'est attendu qu'une fois: les reruns suivants n'attendent que le reste
+        remaining = remaining_budget('dyslexie_recommendations', latency_budget('resultats_dyslexie'))
+        # Réponse en cache, ou celle de la préanalyse en cours (rejointe sans second appel Bedrock)
+        # dans la limite du délai; au-delà, réponse de secours, celle du LLM remplacera la page à son arrivée
+        with st.spinner("Analyse des résultats en cours..."):
+            personalised = analyze_results_with_ai("dyslexie", analysis_responses, timeout=remaining)
+        adopt_background_result('dyslexie_recommendations')
+    
+    personalised = st.session_state.get('dyslexie_recommendations') or personalised
+    if personalised:
+        st.markdown(f"""
+        <div style="background-color: rgba(93, 95, 239, 0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+            {personalised}
+        </div>
+        """, unsafe_allow_html=True)
+    
     # Fixed: HTML rendering for recommendations
     st.markdown("""
     <div style="background-color: rgba(0, 150, 199, 0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px;">
@@ -271,6 +309,8 @@ def show_page():
                 del st.session_state['dyslexie_current_step']
             if 'dyslexie_recommendations' in st.session_state:
                 del st.session_state['dyslexie_recommendations']
+            if 'dyslexie_recommendations_future' in st.session_state:
+                del st.session_state['dyslexie_recommendations_future']
             
             # Navigate to test page
             st.session_state['page'] = "test_dyslexie"
@@ -283,4 +323,7 @@ def show_page():
     with col3:
         if st.button("🏠 Retour à l'accueil", key="home_dyslexie_results"):
             st.session_state['page'] = "accueil"
-            st.rerun()
\ No newline at end of file
+            st.rerun()
+    
+    # Rafraîchir la page dès que les recommandations en retard sont prêtes
+    rerun_when_ready(['dyslexie_recommendations'])
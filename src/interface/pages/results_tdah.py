@@ -10,6 +10,32 @@ from src.solutions.tdah import (
     display_reaction_game
 )
 from src.llm_connector import get_llm_connector
+from src.utils.llm_orchestrator import LLMCallGroup, latency_budget
+from src.interface.background import adopt_background_result, keep_in_background, pending_future, rerun_when_ready
+
+# Analyse de secours si le LLM ne renvoie rien
+# (en HTML, comme les analyses composées localement par recommendation_nlg)
+FALLBACK_TDAH_ANALYSIS = """<p>Tu montres de bons résultats en mémorisation et en flexibilité cognitive! 🌟</p>
+<p>Tu as bien retenu les détails de l'histoire et tu as pu t'adapter à de nouvelles consignes. C'est super!</p>
+<p>J'ai remarqué que tu pourrais améliorer ton attention soutenue et ton organisation. Ce sont des compétences que tout le monde peut développer avec un peu de pratique.</p>
+<p>Voici quelques jeux amusants pour t'aider:</p>
+<ul>
+    <li>Joue à "Où est Charlie?" pour entraîner ton attention</li>
+    <li>Essaie des jeux de mémoire avec des cartes</li>
+    <li>Utilise un tableau coloré pour organiser tes tâches quotidiennes</li>
+</ul>
+<p>N'oublie pas: chaque petit effort compte! Ton cerveau est comme un muscle qui devient plus fort à chaque entraînement. Continue comme ça, je suis sûr que tu vas faire des progrès formidables! 🚀</p>"""
+
+def display_analysis(placeholder, analysis):
+    """Display the personalised analysis box in the given placeholder"""
+    placeholder.markdown(f"""
+    <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid #FF6B6B;">
+        <h3 style="color: #FF6B6B; text-align: center;">📊 Analyse personnalisée</h3>
+        <div style="font-size: 1.1rem; line-height: 1.6; color: #333;">
+            {analysis}
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
 
 def show_page():
     """Display the TDAH results page with comprehensive analysis and interactive activities"""
@@ -53,29 +79,18 @@ def show_page():
     # Vérifier les réponses et obtenir les solutions
     correct_answers, total_questions, solutions = check_answers_and_provide_solutions("tdah", responses)
     
-    # Analyse des résultats avec le LLM
-    if 'tdah_analysis' not in st.session_state:
-        with st.spinner("Analyse des résultats en cours..."):
-            st.session_state['tdah_analysis'] = analyze_results_with_ai("tdah", responses)
+    # Lancer l'analyse en arrière-plan pendant que la solution est générée
+    llm_connector = get_llm_connector()
+    calls = LLMCallGroup(latency_budget('resultats_tdah'))
+    adopt_background_result('tdah_analysis')
+    if st.session_state.get('tdah_analysis') is None and pending_future('tdah_analysis') is None:
+        calls.submit('analysis', analyze_results_with_ai, "tdah", responses)
     
-    # Récupérer l'analyse
-    analysis = st.session_state['tdah_analysis']
-
-    # Si l'analyse est vide ou None, utiliser une analyse de secours
-    if not analysis or analysis.strip() == "":
-        analysis = """Tu montres de bons résultats en mémorisation et en flexibilité cognitive! 🌟 
-
-Tu as bien retenu les détails de l'histoire et tu as pu t'adapter à de nouvelles consignes. C'est super!
-
-J'ai remarqué que tu pourrais améliorer ton attention soutenue et ton organisation. Ce sont des compétences que tout le monde peut développer avec un peu de pratique.
-
-Voici quelques jeux amusants pour t'aider:
-- Joue à "Où est Charlie?" pour entraîner ton attention
-- Essaie des jeux de mémoire avec des cartes
-- Utilise un tableau coloré pour organiser tes tâches quotidiennes
-
-N'oublie pas: chaque petit effort compte! Ton cerveau est comme un muscle qui devient plus fort à chaque entraînement. Continue comme ça, je suis sûr que tu vas faire des progrès formidables! 🚀"""
-        st.session_state['tdah_analysis'] = analysis
+    # Tant que l'analyse du LLM n'est pas arrivée, la solution part de l'analyse composée
+    # à partir des scores de l'enfant (cache ou règles, sans appel LLM)
+    analysis = st.session_state.get('tdah_analysis')
+    if not analysis:
+        analysis = analyze_results_with_ai("tdah", responses, timeout=0) or FALLBACK_TDAH_ANALYSIS
     
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -130,20 +145,30 @@ N'oublie pas: chaque petit effort compte! Ton cerveau est comme un muscle qui de
             </div>
             """, unsafe_allow_html=True)
         
-        # Afficher l'analyse
-        st.markdown(f"""
-        <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid #FF6B6B;">
-            <h3 style="color: #FF6B6B; text-align: center;">📊 Analyse personnalisée</h3>
-            <p style="font-size: 1.1rem; line-height: 1.6; color: #333; white-space: pre-line;">
-                {analysis}
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Appel à notre module de solution pour TDAH
-    llm_connector = get_llm_connector()
+        # Emplacement de l'analyse, rempli dès qu'elle est disponible
+        analysis_placeholder = st.empty()
+        if not calls.futures:
+            display_analysis(analysis_placeholder, analysis)
+        else:
+            analysis_placeholder.info("Analyse des résultats en cours...")
+    
+    # Appel à notre module de solution pour TDAH (en parallèle de l'analyse)
     provide_tdah_solution(analysis, responses, llm_connector)
     
+    # Récupérer l'analyse lancée en parallèle
+    if calls.futures:
+        result = calls.result('analysis')
+        
+        if 'analysis' in calls.pending():
+            # Budget dépassé: l'analyse locale reste affichée, celle du LLM remplacera la page à son arrivée
+            keep_in_background('tdah_analysis', calls.futures['analysis'])
+        else:
+            # Si l'analyse est vide ou None, garder l'analyse locale
+            if result and result.strip() != "":
+                analysis = result
+            st.session_state['tdah_analysis'] = analysis
+        display_analysis(analysis_placeholder, analysis)
+    
     # Ajouter des activités interactives recommandées
     st.markdown("""
     <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid #4ECDC4;">
@@ -211,4 +236,7 @@ N'oublie pas: chaque petit effort compte! Ton cerveau est comme un muscle qui de
     # Bouton pour revenir à l'accueil
     if st.button("🏠 Retour à l'accueil", key="btn_retour_tdah"):
         st.session_state['page'] = 'accueil'
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+    
+    # Rafraîchir la page dès que l'analyse en retard est prête
+    rerun_when_ready(['tdah_analysis'])
@@ -1,5 +1,6 @@
 import streamlit as st
 from src.utils.image_utils import dyscalc_b64
+from src.interface.background import forget_result
 
 def show_page():
     """Display the dyscalculia test page"""
@@ -62,6 +63,9 @@ def show_page():
             "q3": q3,
             "q4": q4
         }
+        # L'analyse et les activités d'un passage précédent ne valent plus pour ces réponses
+        forget_result('dyscalculia_analysis')
+        forget_result('recommended_activities')
         # Rediriger vers la page des résultats
         st.session_state['page'] = 'resultats_dyscalculie'
         st.rerun()
\ No newline at end of file
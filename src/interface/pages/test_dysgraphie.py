@@ -3,6 +3,9 @@ import time
 from PIL import Image
 import io
 import base64
+from src.utils.llm_utils import prefetch_analysis
+from src.interface.background import reset_budget
+from src.utils.score_utils import DYSGRAPHIE_MAX_SCORES
 
 def show_page():
     """Display the dysgraphie test page"""
@@ -15,11 +18,11 @@ def show_page():
     # Initialize results storage
     if 'dysgraphie_detailed_results' not in st.session_state or st.session_state['dysgraphie_detailed_results'] is None:
         st.session_state['dysgraphie_detailed_results'] = {
-            "copie_texte": {"score": 0, "max": 3, "completed": False, "notes": "", "sample": None},
-            "ecriture_spontanee": {"score": 0, "max": 3, "completed": False, "notes": "", "sample": None},
-            "vitesse_endurance": {"score": 0, "max": 3, "completed": False, "notes": "", "word_count": 0},
-            "graphisme_coordination": {"score": 0, "max": 3, "completed": False, "notes": "", "sample": None},
-            "lisibilite_orthographe": {"score": 0, "max": 3, "completed": False, "notes": "", "sample": None}
+            "copie_texte": {"score": 0, "max": DYSGRAPHIE_MAX_SCORES["copie_texte"], "completed": False, "notes": "", "sample": None},
+            "ecriture_spontanee": {"score": 0, "max": DYSGRAPHIE_MAX_SCORES["ecriture_spontanee"], "completed": False, "notes": "", "sample": None},
+            "vitesse_endurance": {"score": 0, "max": DYSGRAPHIE_MAX_SCORES["vitesse_endurance"], "completed": False, "notes": "", "word_count": 0},
+            "graphisme_coordination": {"score": 0, "max": DYSGRAPHIE_MAX_SCORES["graphisme_coordination"], "completed": False, "notes": "", "sample": None},
+            "lisibilite_orthographe": {"score": 0, "max": DYSGRAPHIE_MAX_SCORES["lisibilite_orthographe"], "completed": False, "notes": "", "sample": None}
         }
     
     # Form for user information
@@ -92,9 +95,28 @@ def show_page():
                 if current_key:
                     st.session_state['dysgraphie_detailed_results'][current_key]["completed"] = True
                 
+                # Last sub-test done: start generating the recommendations right away
+                if current_key == "lisibilite_orthographe":
+                    start_recommendations_prefetch()
+                
                 st.session_state['dysgraphie_current_step'] += 1
                 st.rerun()
 
+def build_dysgraphie_responses():
+    """Collect the child's information and detailed results for the results page"""
+    return {
+        "nom": st.session_state.get("dysgraphie_nom", ""),
+        "age": st.session_state.get("dysgraphie_age", 8),
+        "classe": st.session_state.get("dysgraphie_classe", ""),
+        "detailed_results": st.session_state['dysgraphie_detailed_results']
+    }
+
+def start_recommendations_prefetch():
+    """Start generating the recommendations in the background for the results page"""
+    st.session_state['dysgraphie_analysis'] = None
+    reset_budget('dysgraphie_analysis')
+    st.session_state['dysgraphie_analysis_future'] = prefetch_analysis("dysgraphie", build_dysgraphie_responses())
+
 def display_intro():
     """Display introduction to the dysgraphie test"""
     st.markdown("""
@@ -734,17 +756,13 @@ def display_results_summary():
     max_score = sum(data["max"] for data in detailed_results.values())
     
     # Store information for the results page
-    st.session_state['dysgraphie_responses'] = {
-        "nom": st.session_state.get("dysgraphie_nom", ""),
-        "age": st.session_state.get("dysgraphie_age", 8),
-        "classe": st.session_state.get("dysgraphie_classe", ""),
-        "detailed_results": detailed_results
-    }
+    st.session_state['dysgraphie_responses'] = build_dysgraphie_responses()
     
-    # Redirect to results page after a short delay
-    import time
-    time.sleep(2)  # Simulate processing time
+    # Recommendations are generated in the background (started when the last
+    # sub-test was completed); make sure the job exists, then go straight on
+    if st.session_state.get('dysgraphie_analysis_future') is None:
+        start_recommendations_prefetch()
     
-    # Redirect to results page when it's available (for now, go back to home)
-    st.session_state['page'] = "resultats_dysgraphie" if "resultats_dysgraphie" in st.session_state['page'] else "accueil"
+    # Redirect to results page
+    st.session_state['page'] = "resultats_dysgraphie"
     st.rerun()
\ No newline at end of file
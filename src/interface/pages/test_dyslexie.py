@@ -1,5 +1,8 @@
 import streamlit as st
 import time
+from src.utils.llm_utils import prefetch_analysis
+from src.interface.background import reset_budget
+from src.utils.score_utils import DYSLEXIE_MAX_SCORES
 
 def show_page():
     """Display the dyslexia test page"""
@@ -12,12 +15,8 @@ def show_page():
     # Initialize results storage - Fixed to handle None case
     if 'dyslexie_detailed_results' not in st.session_state or st.session_state['dyslexie_detailed_results'] is None:
         st.session_state['dyslexie_detailed_results'] = {
-            "denomination_rapide": {"score": 0, "max": 3, "completed": False, "notes": "", "audio": None},
-            "pseudo_mots": {"score": 0, "max": 4, "completed": False, "notes": "", "audio": None},
-            "suppression_phonemique": {"score": 0, "max": 3, "completed": False, "notes": "", "audio": None},
-            "fluidite_lecture": {"score": 0, "max": 2, "completed": False, "notes": "", "audio": None},
-            "memoire_sons": {"score": 0, "max": 3, "completed": False, "notes": "", "audio": None},
-            "confusion_lettres": {"score": 0, "max": 6, "completed": False, "notes": "", "audio": None}
+            test_key: {"score": 0, "max": max_score, "completed": False, "notes": "", "audio": None}
+            for test_key, max_score in DYSLEXIE_MAX_SCORES.items()
         }
     
     # Form for user information
@@ -95,9 +94,26 @@ def show_page():
                 if current_key:
                     st.session_state['dyslexie_detailed_results'][current_key]["completed"] = True
                 
+                # Last sub-test done: start generating the recommendations right away
+                if current_key == "confusion_lettres":
+                    start_recommendations_prefetch()
+                
                 st.session_state['dyslexie_current_step'] += 1
                 st.rerun()
 
+def start_recommendations_prefetch():
+    """Start generating the recommendations in the background for the results page"""
+    st.session_state['dyslexie_recommendations'] = None
+    reset_budget('dyslexie_recommendations')
+    st.session_state['dyslexie_recommendations_future'] = prefetch_analysis(
+        "dyslexie",
+        {
+            'dyslexie_detailed_results': st.session_state['dyslexie_detailed_results'],
+            'age': st.session_state.get('dyslexie_age'),
+            'classe': st.session_state.get('dyslexie_classe')
+        }
+    )
+
 def display_intro():
     """Display introduction to the dyslexia test"""
     st.markdown("""
@@ -1032,9 +1048,10 @@ def display_results_summary():
     </style>
     """, unsafe_allow_html=True)
     
-    # Redirect to results page after a short delay
-    import time
-    time.sleep(2)  # Simulate processing time
+    # Recommendations are generated in the background (started when the last
+    # sub-test was completed); make sure the job exists, then go straight on
+    if st.session_state.get('dyslexie_recommendations_future') is None:
+        start_recommendations_prefetch()
     
     # Redirect to results page - FIXED to match your naming convention
     st.session_state['page'] = "resultats_dyslexie"
@@ -2,6 +2,8 @@ import streamlit as st
 import time
 import random
 from src.utils.image_utils import dtha_b64
+from src.utils.score_utils import TDAH_MAX_SCORES
+from src.interface.background import forget_result
 
 def show_page():
     """Display the TDAH test page with comprehensive attention tests"""
@@ -50,13 +52,10 @@ def show_page():
     
     # Initialize results in session state
     if 'tdah_detailed_results' not in st.session_state:
+        # Les maxima viennent de score_utils, partagés avec le précalcul des recommandations
         st.session_state['tdah_detailed_results'] = {
-            "memorisation": {"score": 0, "max": 3, "completed": False},
-            "attention": {"score": 0, "max": 4, "completed": False},
-            "impulsivite": {"score": 0, "max": 1, "completed": False},
-            "memoire": {"score": 0, "max": 1, "completed": False},
-            "organisation": {"score": 0, "max": 1, "completed": False},
-            "flexibilite": {"score": 0, "max": 2, "completed": False}
+            key: {"score": 0, "max": maximum, "completed": False}
+            for key, maximum in TDAH_MAX_SCORES.items()
         }
     
     # Définir les noms des étapes
@@ -597,6 +596,10 @@ def display_results_summary():
         # Réinitialiser l'étape pour la prochaine fois
         st.session_state['tdah_current_step'] = 0
         
+        # L'analyse et la solution d'un passage précédent ne valent plus pour ces résultats
+        forget_result('tdah_analysis')
+        st.session_state.pop('tdah_solution', None)
+        
         # Rediriger vers la page des résultats
         st.session_state['page'] = 'resultats_tdah'
         st.rerun()
\ No newline at end of file
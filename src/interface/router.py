@@ -0,0 +1,120 @@
+# File path: src/interface/router.py
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Module of each page, imported the first time the page is shown so a cold
+# start only pays for the home page (results pages pull in plotly, pandas and boto3)
+PAGES = {
+    'accueil': 'src.interface.pages.home',
+    'questionnaire': 'src.interface.pages.questionnaire',
+    'test_selection': 'src.interface.pages.test_selection',
+    'test_dyscalculie': 'src.interface.pages.test_dyscalculie',
+    'test_tdah': 'src.interface.pages.test_tdah',
+    'test_dyslexie': 'src.interface.pages.test_dyslexie',
+    'test_dysgraphie': 'src.interface.pages.test_dysgraphie',
+    'resultats_dyscalculie': 'src.interface.pages.results_dyscalculie',
+    'resultats_tdah': 'src.interface.pages.results_tdah',
+    'resultats_dyslexie': 'src.interface.pages.results_dyslexie',
+    'resultats_dysgraphie': 'src.interface.pages.results_dysgraphie'
+}
+
+# Import time of a page module above which a warning is logged
+PAGE_IMPORT_BUDGET_SECONDS = float(os.getenv('PAGE_IMPORT_BUDGET_SECONDS', '0.5'))
+
+# Time allowed to import the router and the home page in a fresh interpreter,
+# Streamlit itself excluded (checked by `python -m src.interface.router`)
+COLD_START_BUDGET_SECONDS = float(os.getenv('COLD_START_BUDGET_SECONDS', '0.3'))
+
+# Modules that must not be loaded before the first paint of the home page
+COLD_START_FORBIDDEN_MODULES = (
+    'boto3', 'plotly', 'pandas', 'numpy', 'PIL', 'requests', 'src.llm_connector', 'src.solutions'
+)
+
+def load_page(page):
+    """
+    Import the module of a page, on first use only.
+
+    Args:
+        page: Page name as stored in st.session_state['page']
+
+    Returns:
+        The page module
+    """
+    module_name = PAGES[page]
+    module = sys.modules.get(module_name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        elapsed = time.perf_counter() - started
+        if elapsed > PAGE_IMPORT_BUDGET_SECONDS:
+            logger.warning(f"Importing page {page} took {elapsed:.3f}s (budget {PAGE_IMPORT_BUDGET_SECONDS:.3f}s)")
+        else:
+            logger.debug(f"Imported page {page} in {elapsed:.3f}s")
+    return module
+
+def show_page(page):
+    """Display a page, importing its module if it is shown for the first time."""
+    if page not in PAGES:
+        logger.warning(f"Unknown page {page}")
+        return
+    load_page(page).show_page()
+
+def check_cold_start(page='accueil', budget=None):
+    """
+    Measure a cold start: import the router and a page in a fresh interpreter.
+
+    Args:
+        page: Page whose first paint is checked
+        budget: Allowed import time in seconds, defaults to COLD_START_BUDGET_SECONDS
+
+    Returns:
+        List of budget violations (empty when the cold start is fast enough)
+    """
+    budget = COLD_START_BUDGET_SECONDS if budget is None else budget
+    # Streamlit is loaded by its runtime before app.py runs, so it is imported before timing
+    code = (
+        "import json, sys, time\n"
+        "import streamlit\n"
+        "started = time.perf_counter()\n"
+        "from src.interface import router\n"
+        f"router.load_page({page!r})\n"
+        "print(json.dumps({'seconds': time.perf_counter() - started, 'modules': sorted(sys.modules)}))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    measure = json.loads(result.stdout.strip().splitlines()[-1])
+
+    problems = []
+    if measure['seconds'] > budget:
+        problems.append(f"Importing page {page} took {measure['seconds']:.3f}s (budget {budget:.3f}s)")
+    loaded = [
+        name for name in COLD_START_FORBIDDEN_MODULES
+        if any(module == name or module.startswith(f"{name}.") for module in measure['modules'])
+    ]
+    if loaded:
+        problems.append(f"Page {page} loads {', '.join(loaded)} at cold start")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that a page stays within its cold-start import budget.")
+    parser.add_argument("--page", choices=sorted(PAGES), default='accueil', help="Page to check")
+    parser.add_argument("--budget", type=float, default=None, help="Allowed import time in seconds")
+    args = parser.parse_args()
+
+    problems = check_cold_start(args.page, args.budget)
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+    print(f"Page {args.page} is within its cold-start budget")
+
+if __name__ == "__main__":
+    main()
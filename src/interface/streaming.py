@@ -0,0 +1,108 @@
+# File path: src/interface/streaming.py
+import time
+import streamlit as st
+
+def render_stream(chunks, placeholder=None, min_interval=0.05):
+    """
+    Render streamed LLM text progressively and return the full text.
+    
+    Args:
+        chunks: Iterable of text chunks (e.g. LLMConnector.generate_response_stream)
+        placeholder: Streamlit placeholder to render into, a new one is created if None
+        min_interval: Minimum delay in seconds between two redraws
+        
+    Returns:
+        str: The concatenated text
+    """
+    if placeholder is None:
+        placeholder = st.empty()
+    
+    text = ""
+    last_render = 0.0
+    for chunk in chunks:
+        text += chunk
+        # Throttle redraws so long answers don't flood the websocket
+        now = time.monotonic()
+        if now - last_render >= min_interval:
+            placeholder.markdown(text + "▌")
+            last_render = now
+    
+    placeholder.markdown(text)
+    return text
+
+def display_section_header(title, color):
+    """Display the colored banner shown above each solution section"""
+    st.markdown(f"""
+    <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid {color};">
+        <h3 style="color: {color}; text-align: center;">{title}</h3>
+    </div>
+    """, unsafe_allow_html=True)
+
+def _fill_section(placeholder, text, empty_message):
+    """Render a finished section, or its warning when the model left it empty"""
+    if text.strip():
+        with placeholder.container():
+            st.markdown(text)
+    else:
+        placeholder.warning(empty_message)
+
+def display_solution_sections(sections, solution_components):
+    """
+    Display already parsed solution sections.
+    
+    Args:
+        sections: List of (key, header, title, color, empty_message) section specs
+        solution_components: Parsed sections keyed by section key
+    """
+    for key, _header, title, color, empty_message in sections:
+        display_section_header(title, color)
+        _fill_section(st.empty(), solution_components[key], empty_message)
+
+def stream_solution_sections(sections, chunks, parser, min_interval=0.05):
+    """
+    Display solution sections while the response is still being streamed.
+    
+    All section banners are shown immediately. The section being generated is
+    rendered progressively and each section is finalised as soon as the
+    parser reports that its header was closed.
+    
+    Args:
+        sections: List of (key, header, title, color, empty_message) section specs
+        chunks: Iterable of streamed text chunks
+        parser: SectionStreamParser configured with the same sections
+        min_interval: Minimum delay in seconds between two redraws
+        
+    Returns:
+        dict: The parsed sections
+    """
+    placeholders = {}
+    messages = {}
+    for key, _header, title, color, empty_message in sections:
+        display_section_header(title, color)
+        placeholders[key] = st.empty()
+        placeholders[key].caption("⏳ Génération en cours...")
+        messages[key] = empty_message
+    
+    done = set()
+    last_render = 0.0
+    for chunk in chunks:
+        for key, text in parser.feed(chunk):
+            _fill_section(placeholders[key], text, messages[key])
+            done.add(key)
+        
+        current = parser.current_section
+        now = time.monotonic()
+        if current and now - last_render >= min_interval:
+            placeholders[current].markdown(parser.current_text + "▌")
+            last_render = now
+    
+    for key, text in parser.close():
+        _fill_section(placeholders[key], text, messages[key])
+        done.add(key)
+    
+    # Sections the model never produced
+    for key in placeholders:
+        if key not in done:
+            _fill_section(placeholders[key], parser.sections[key], messages[key])
+    
+    return parser.sections
@@ -6,12 +6,29 @@ for generating educational content tailored to students with learning disabiliti
 """
 
 import boto3
+import itertools
 import json
 import logging
 import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from botocore.config import Config
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Iterator, Optional, Tuple
 from dotenv import load_dotenv
+from src.utils.admission import PRIORITY_INTERACTIVE, AdmissionRejected, get_admission_controller
+from src.utils.circuit_breaker import OPEN, CircuitBreaker
+from src.utils.latency_tracker import LatencyTracker
+from src.utils.llm_cassette import wrap_client
+from src.utils.llm_cache import get_bucket_cache, get_response_cache, make_cache_key
+from src.utils.llm_logging import log_body, log_event, short_hash
+from src.utils.llm_metrics import CallRecord, record_call, record_usage
+from src.utils.llm_orchestrator import submit_llm_call
+from src.utils.model_router import SONNET_MODEL_ID, get_model_router, prompt_caching_enabled
+from src.utils.prompt_templates import static_prefix
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,6 +37,52 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Prompt-caching breakpoint: the provider caches the request up to this block
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# How long another worker process may hold the right to compute a prompt
+SINGLE_FLIGHT_LEASE_SECONDS = float(os.getenv('LLM_SINGLE_FLIGHT_LEASE_SECONDS', '120'))
+
+# Threads running hedged attempts. They are kept apart from the shared LLM
+# executor because the callers waiting on the attempts usually occupy it
+HEDGE_WORKERS = int(os.getenv('LLM_HEDGE_WORKERS', '8'))
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide executor of hedged attempts."""
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='llm-hedge')
+    return _hedge_executor
+
+class LLMUnavailableError(Exception):
+    """
+    Raised when the model could not produce an answer (service error, timeout,
+    or circuit breaker open). Callers are expected to switch to their local fallback.
+    """
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    """
+    Raised when the caller's latency budget expired before the answer arrived.
+    The call keeps running in the background and stores its answer in the caches.
+    """
+
+class CircuitOpenError(LLMUnavailableError):
+    """
+    Raised without calling Bedrock while the model's circuit breaker is open
+    (see src/utils/circuit_breaker.py).
+    """
+
+class LLMOverloadedError(LLMUnavailableError):
+    """
+    Raised when the admission controller sheds a request because too many
+    LLM calls are already running or queued.
+    """
+
 class LLMConnector:
     """
     A connector class for interacting with AWS Bedrock LLMs.
@@ -29,32 +92,99 @@ class LLMConnector:
                 aws_access_key_id: str = None,
                 aws_secret_access_key: str = None,
                 aws_region: str = 'us-east-1',
-                model_id: str = 'anthropic.claude-3-sonnet-20240229-v1:0',
-                read_timeout: int = 1000):
+                model_id: str = SONNET_MODEL_ID,
+                read_timeout: int = None,
+                connect_timeout: int = None,
+                max_pool_connections: int = None):
         """
         Initialize the LLM connector with AWS credentials and model settings.
         AWS credentials are loaded from environment variables if not provided.
+        The Bedrock client itself is created lazily on first use.
         """
         # Load credentials from environment variables if not provided
         self.aws_access_key_id = aws_access_key_id or os.getenv('AWS_ACCESS_KEY_ID')
         self.aws_secret_access_key = aws_secret_access_key or os.getenv('AWS_SECRET_ACCESS_KEY')
         self.aws_region = aws_region
         self.model_id = model_id
-        self.config = Config(read_timeout=read_timeout)
-        self.client = self._initialize_client()
+        # Alternative Bedrock endpoint, e.g. the local mock server (src/utils/mock_bedrock.py)
+        self.endpoint_url = os.getenv('BEDROCK_ENDPOINT_URL') or None
+        if self.endpoint_url and not self.aws_access_key_id:
+            # Requests are still signed, any credentials will do locally
+            self.aws_access_key_id = 'mock'
+            self.aws_secret_access_key = 'mock'
+        # Bound every Bedrock call; pages enforce tighter budgets with the timeout argument
+        if read_timeout is None:
+            read_timeout = int(os.getenv('BEDROCK_READ_TIMEOUT', '60'))
+        if connect_timeout is None:
+            connect_timeout = int(os.getenv('BEDROCK_CONNECT_TIMEOUT', '5'))
+        if max_pool_connections is None:
+            max_pool_connections = int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS', '25'))
+        # Keep connections alive and pooled so reruns reuse the TLS session
+        self.config = Config(
+            read_timeout=read_timeout,
+            connect_timeout=connect_timeout,
+            max_pool_connections=max_pool_connections,
+            tcp_keepalive=True,
+            retries={'max_attempts': 3, 'mode': 'adaptive'}
+        )
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.cache = get_response_cache()
+        self.bucket_cache = get_bucket_cache()
+        # Requests currently being generated in this process, by cache key
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # Stops calling Bedrock while it is failing, so callers fall back at once
+        self.breaker = CircuitBreaker(f"bedrock:{self.model_id}")
+        # Optional hedging: a request still running at the observed p95 latency
+        # is duplicated, possibly to another region or model, and the first answer wins
+        self.hedging = os.getenv('LLM_HEDGING_ENABLED', 'False').lower() == 'true'
+        self.hedge_quantile = float(os.getenv('LLM_HEDGE_QUANTILE', '0.95'))
+        self.hedge_region = os.getenv('BEDROCK_HEDGE_REGION') or self.aws_region
+        self.hedge_model_id = os.getenv('BEDROCK_HEDGE_MODEL_ID') or self.model_id
+        self._hedge_client = None
+        self._latency: Dict[Tuple[str, int], LatencyTracker] = {}
+        self._latency_lock = threading.Lock()
+        # Mark static system prompts and template prefixes as cacheable (per-model setting)
+        self.prompt_caching = prompt_caching_enabled(self.model_id)
         
-        logger.info(f"Initialized LLM connector with model: {self.model_id}")
+        log_event(logger, "llm.connector_ready", model=self.model_id, endpoint=self.endpoint_url or "aws")
     
-    def _initialize_client(self):
-        """Initialize the AWS Bedrock client."""
+    @property
+    def client(self):
+        """The Bedrock runtime client, created on first access (thread-safe)."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._initialize_client()
+        return self._client
+    
+    @property
+    def hedge_client(self):
+        """The client receiving hedged duplicates (the primary one unless BEDROCK_HEDGE_REGION differs)."""
+        if self.hedge_region == self.aws_region:
+            return self.client
+        if self._hedge_client is None:
+            with self._client_lock:
+                if self._hedge_client is None:
+                    self._hedge_client = self._initialize_client(self.hedge_region)
+        return self._hedge_client
+    
+    def _initialize_client(self, region: str = None):
+        """
+        Initialize the AWS Bedrock client (in the connector's region unless given).
+        With LLM_CASSETTE_MODE set, calls are recorded to or replayed from a
+        cassette instead (see src/utils/llm_cassette.py).
+        """
         try:
-            return boto3.client(
+            return wrap_client(lambda: boto3.client(
                 'bedrock-runtime',
-                region_name=self.aws_region,
+                region_name=region or self.aws_region,
                 aws_access_key_id=self.aws_access_key_id,
                 aws_secret_access_key=self.aws_secret_access_key,
+                endpoint_url=self.endpoint_url,
                 config=self.config
-            )
+            ))
         except Exception as e:
             logger.error(f"Failed to initialize AWS Bedrock client: {str(e)}")
             raise
@@ -63,10 +193,39 @@ class LLMConnector:
                             prompt: str, 
                             system_prompt: str = "", 
                             max_tokens: int = 1000, 
-                            temperature: float = 0.7) -> str:
+                            temperature: float = 0.7,
+                            bucket_key: Optional[str] = None,
+                            timeout: Optional[float] = None,
+                            hedge: bool = False,
+                            priority: int = PRIORITY_INTERACTIVE,
+                            caller: Optional[str] = None) -> str:
             """
             Generate a response from the LLM based on the provided prompt.
+            Identical requests are served from the shared response cache.
+            
+            bucket_key optionally names a group of requests that may share one
+            answer even when their prompts differ (e.g. identical scores with
+            different free-text notes); it is looked up before the exact prompt.
+            
+            timeout optionally bounds the wait in seconds (the caller's remaining
+            latency budget). Cached answers are still returned at once; otherwise
+            LLMDeadlineExceeded is raised when it expires, while the call completes
+            in the background and refreshes the caches for the next request.
+            timeout=0 only reads the caches: no call is started or joined.
+            
+            hedge asks for a duplicate request once the call is slower than the
+            usual p95 for its size (only when LLM_HEDGING_ENABLED is set).
+            
+            priority places the Bedrock call in the process-wide admission queue
+            (see src/utils/admission.py); shed requests raise LLMOverloadedError.
+            
+            caller names the call site in the telemetry (src/utils/llm_metrics.py);
+            it defaults to the calling function.
+            
+            Raises LLMUnavailableError when no answer can be produced, so the
+            caller's fallback runs instead of an error string being displayed.
             """
+            call = CallRecord(caller or sys._getframe(1).f_code.co_name, self.model_id)
             try:
                 payload = self._construct_payload(
                     prompt, 
@@ -75,15 +234,67 @@ class LLMConnector:
                     temperature
                 )
                 
-                logger.info(f"Invoking model {self.model_id} with prompt length: {len(prompt)}")
-                logger.info(f"Full payload: {json.dumps(payload)}")
+                # Log sizes and a key identifying the request, never the prompt itself
+                cache_key = make_cache_key(self.model_id, system_prompt, prompt, max_tokens, temperature)
+                log_event(logger, "llm.request", model=self.model_id, key=cache_key[:12],
+                          prompt_chars=len(prompt), system_chars=len(system_prompt), max_tokens=max_tokens)
                 
                 # DEBUG: Set up a temporary fallback for testing the interface
                 use_mock = os.getenv('USE_MOCK_RESPONSES', 'False').lower() == 'true'
                 if use_mock:
                     logger.info("Using test response instead of API")
-                    if "tdah" in prompt.lower():
-                        return """Tu montres de bons résultats en mémorisation et en flexibilité cognitive! 🌟 
+                    call.tier = "mock"
+                    return self._mock_response(prompt)
+                    
+                # Serve requests of the same bucket from the second-tier cache
+                if bucket_key is not None and self.bucket_cache is not None:
+                    cached = self.bucket_cache.get(bucket_key)
+                    if cached is not None:
+                        log_event(logger, "llm.cache_hit", model=self.model_id, tier="bucket", key=bucket_key[:12])
+                        call.tier = "bucket"
+                        return cached
+                
+                # Serve byte-identical requests from the shared cache
+                if self.cache is not None:
+                    cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        log_event(logger, "llm.cache_hit", model=self.model_id, tier="exact", key=cache_key[:12])
+                        call.tier = "exact"
+                        self._store_bucket(bucket_key, cached)
+                        return cached
+                
+                # A spent budget only reads the caches, it never queues behind a call
+                if timeout is not None and timeout <= 0:
+                    raise LLMDeadlineExceeded(f"No cached answer from model {self.model_id} and no time left")
+                
+                # Concurrent callers with the same request share one Bedrock call
+                deadline = None if timeout is None else time.monotonic() + timeout
+                compute = lambda: self._invoke(payload, cache_key, bucket_key, hedge, priority, call, deadline)
+                if timeout is None:
+                    return self._single_flight(cache_key, compute)
+                
+                background = submit_llm_call(self._single_flight, cache_key, compute)
+                try:
+                    return background.result(timeout=timeout)
+                except FutureTimeoutError:
+                    raise LLMDeadlineExceeded(
+                        f"No answer from model {self.model_id} within {timeout:.1f}s, completing in background"
+                    ) from None
+                    
+            except LLMUnavailableError as e:
+                call.outcome = type(e).__name__
+                raise
+            except Exception as e:
+                call.outcome = type(e).__name__
+                logger.error(f"Error generating response: {str(e)}")
+                raise LLMUnavailableError(f"Unable to generate response. {str(e)}") from e
+            finally:
+                record_call(call)
+    
+    def _mock_response(self, prompt: str) -> str:
+        """Canned answer used instead of the API when USE_MOCK_RESPONSES is set."""
+        if "tdah" in prompt.lower():
+            return """Tu montres de bons résultats en mémorisation et en flexibilité cognitive! 🌟 
 
         Tu as bien retenu les détails de l'histoire et tu as pu t'adapter à de nouvelles consignes. C'est super!
 
@@ -95,8 +306,8 @@ class LLMConnector:
         - Utilise un tableau coloré pour organiser tes tâches quotidiennes
 
         N'oublie pas: chaque petit effort compte! Ton cerveau est comme un muscle qui devient plus fort à chaque entraînement. Continue comme ça, je suis sûr que tu vas faire des progrès formidables! 🚀"""
-                    else:
-                        return """Tu as de bonnes compétences en mathématiques! 🌟
+        else:
+            return """Tu as de bonnes compétences en mathématiques! 🌟
 
         J'ai remarqué que tu comprends bien les additions et que tu peux reconnaître les objets lourds.
 
@@ -108,50 +319,512 @@ class LLMConnector:
         - Utilise des blocs ou des jouets pour visualiser les nombres
 
         Tu progresses déjà beaucoup, et chaque exercice te rendra encore plus fort en maths! Continue comme ça! 🚀"""
-                    
-                # Comment this part temporarily if you want to use the test responses above
-                response = self.client.invoke_model(
-                    modelId=self.model_id,
-                    body=json.dumps(payload)
-                )
-                
-                # DEBUG: Display raw response
-                logger.info(f"Raw API response: {response}")
-                
-                response_body = json.loads(response['body'].read())
-                logger.info(f"Response body: {response_body}")
-                
-                result = self._extract_response(response_body)
-                
-                logger.info(f"Extracted result: {result}")
-                logger.info(f"Result length: {len(result) if result else 'None'}")
-                
+    
+    def _store_bucket(self, bucket_key: Optional[str], result: str) -> None:
+        """Remember an answer for every later request of the same bucket."""
+        if bucket_key is not None and self.bucket_cache is not None:
+            self.bucket_cache.set(bucket_key, result)
+    
+    def _invoke(self, 
+                payload: Dict[str, Any], 
+                cache_key: str, 
+                bucket_key: Optional[str] = None,
+                hedge: bool = False,
+                priority: int = PRIORITY_INTERACTIVE,
+                call: Optional[CallRecord] = None,
+                deadline: Optional[float] = None) -> str:
+        """
+        Call the model once (hedged if asked) and store a successful answer in the caches.
+        A hedged call gives up at the caller's deadline (time.monotonic() value);
+        its attempts then finish in the background and still fill the caches.
+        """
+        call = call or CallRecord("unknown", self.model_id)
+        call.tier = "miss"
+        with self._admission_slot(priority) as queued:
+            call.queue_seconds = queued
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker open for model {self.model_id}")
+            
+            log_body(cache_key, "request", payload)
+            started = time.monotonic()
+            try:
+                delay = self._hedge_delay('invoke', payload['max_tokens']) if hedge else None
+                if delay is None:
+                    response_body = self._call_model(self.client, self.model_id, payload)
+                else:
+                    response_body = self._first_success(
+                        lambda: self._call_model(self.client, self.model_id, payload),
+                        lambda: self._call_model(self.hedge_client, self.hedge_model_id, payload),
+                        delay,
+                        deadline=deadline,
+                        late=lambda body: self._store_late(body, cache_key, bucket_key)
+                    )
+            except LLMDeadlineExceeded:
+                # Abandoned, not failed: the attempts finish in the background
+                self.breaker.release_probe()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            call.first_byte_seconds = time.monotonic() - started
+            self.breaker.record_success(call.first_byte_seconds)
+        
+        result = self._extract_response(response_body)
+        
+        usage = response_body.get('usage', {})
+        call.input_tokens = usage.get('input_tokens') or 0
+        call.output_tokens = usage.get('output_tokens') or 0
+        record_usage(call)
+        log_event(logger, "llm.response", model=self.model_id, key=cache_key[:12],
+                  seconds=time.monotonic() - started, chars=len(result),
+                  input_tokens=usage.get('input_tokens'), output_tokens=usage.get('output_tokens'),
+                  cache_read_tokens=usage.get('cache_read_input_tokens'), result_hash=short_hash(result))
+        log_body(cache_key, "response", response_body)
+        
+        if response_body.get('content'):
+            if self.cache is not None:
+                self.cache.set(cache_key, result)
+            self._store_bucket(bucket_key, result)
+        
+        return result
+    
+    def _store_late(self, response_body: Dict[str, Any], cache_key: str, bucket_key: Optional[str]) -> None:
+        """Cache the answer of a hedged call that arrived after its caller's deadline."""
+        if not response_body.get('content'):
+            return
+        result = self._extract_response(response_body)
+        log_event(logger, "llm.late_response", model=self.model_id, key=cache_key[:12], chars=len(result))
+        if self.cache is not None:
+            self.cache.set(cache_key, result)
+        self._store_bucket(bucket_key, result)
+    
+    @contextmanager
+    def _admission_slot(self, priority: int):
+        """Hold one of the process-wide Bedrock request slots, yielding the seconds spent queuing."""
+        controller = get_admission_controller()
+        try:
+            queued = controller.acquire(priority)
+        except AdmissionRejected as e:
+            raise LLMOverloadedError(f"Request for model {self.model_id} shed: {str(e)}") from e
+        try:
+            yield queued
+        finally:
+            controller.release()
+    
+    def _call_model(self, client, model_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one InvokeModel request and return the parsed response body."""
+        started = time.monotonic()
+        # Comment this part temporarily if you want to use the test responses above
+        response = client.invoke_model(
+            modelId=model_id,
+            body=json.dumps(payload)
+        )
+        
+        response_body = json.loads(response['body'].read())
+        elapsed = time.monotonic() - started
+        self._latency_tracker('invoke', payload['max_tokens']).record(elapsed)
+        get_model_router().observe(model_id, elapsed, response_body.get('usage', {}).get('output_tokens'))
+        return response_body
+    
+    def _latency_tracker(self, kind: str, max_tokens: int) -> LatencyTracker:
+        """Latencies of one kind of call ('invoke' or 'first_token'), per answer size."""
+        key = (kind, max_tokens)
+        tracker = self._latency.get(key)
+        if tracker is None:
+            with self._latency_lock:
+                tracker = self._latency.setdefault(key, LatencyTracker())
+        return tracker
+    
+    def _hedge_delay(self, kind: str, max_tokens: int) -> Optional[float]:
+        """How long to wait before hedging, or None when hedging is off or latencies are unknown."""
+        if not self.hedging:
+            return None
+        return self._latency_tracker(kind, max_tokens).quantile(self.hedge_quantile)
+    
+    def _first_success(self, 
+                       primary: Callable[[], Any], 
+                       backup: Callable[[], Any], 
+                       delay: float,
+                       discard: Optional[Callable[[Any], None]] = None,
+                       deadline: Optional[float] = None,
+                       late: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Run primary; if it has not finished after delay seconds, run backup as
+        well and return whichever succeeds first. The other attempt is cancelled
+        if it has not started, otherwise discard() receives its result.
+        
+        Attempts run on the hedge executor, never on the shared LLM executor
+        whose workers may be the callers waiting here. The wait ends at the
+        optional deadline (time.monotonic() value) with LLMDeadlineExceeded;
+        late() then receives the first result still to come, discard() the others.
+        """
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+        
+        executor = get_hedge_executor()
+        first = executor.submit(primary)
+        budget = remaining()
+        try:
+            return first.result(timeout=delay if budget is None else min(delay, budget))
+        except FutureTimeoutError:
+            if remaining() == 0.0:
+                self._abandon_attempts({first}, discard, late)
+                raise LLMDeadlineExceeded(f"No answer from model {self.model_id} before the deadline") from None
+        
+        log_event(logger, "llm.hedge", model=self.model_id, after_seconds=delay)
+        pending = {first, executor.submit(backup)}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                self._abandon_attempts(pending, discard, late)
+                raise LLMDeadlineExceeded(f"No answer from model {self.model_id} before the deadline")
+            winners = [future for future in done if future.exception() is None]
+            if winners:
+                self._abandon_attempts(winners[1:] + list(pending), discard)
+                return winners[0].result()
+            error = next(iter(done)).exception()
+        raise error
+    
+    @staticmethod
+    def _abandon_attempts(attempts, 
+                          discard: Optional[Callable[[Any], None]] = None,
+                          late: Optional[Callable[[Any], None]] = None) -> None:
+        """
+        Cancel attempts that have not started. Of those still running, the first
+        to succeed goes to late() if given, every other result to discard().
+        """
+        claimed = threading.Lock() if late is not None else None
+        
+        def on_done(future: Future) -> None:
+            if future.cancelled() or future.exception() is not None:
+                return
+            if claimed is not None and claimed.acquire(blocking=False):
+                late(future.result())
+            elif discard is not None:
+                discard(future.result())
+        
+        for attempt in attempts:
+            if not attempt.cancel():
+                attempt.add_done_callback(on_done)
+    
+    def _start_stream(self, 
+                      client, 
+                      model_id: str, 
+                      payload: Dict[str, Any],
+                      usage: Optional[Dict[str, int]] = None) -> Tuple[Any, Iterator[str], Optional[str]]:
+        """Open a response stream and wait for its first text chunk."""
+        started = time.monotonic()
+        response = client.invoke_model_with_response_stream(
+            modelId=model_id,
+            body=json.dumps(payload)
+        )
+        texts = self._iter_stream_text(response, usage)
+        first = next(texts, None)
+        self._latency_tracker('first_token', payload['max_tokens']).record(time.monotonic() - started)
+        return response, texts, first
+    
+    def _close_stream(self, stream: Tuple[Any, Iterator[str], Optional[str]]) -> None:
+        """Abandon a stream opened by _start_stream (the losing hedge)."""
+        response, texts, _ = stream
+        texts.close()
+        body = response.get('body')
+        if hasattr(body, 'close'):
+            body.close()
+    
+    def _open_stream(self, 
+                     payload: Dict[str, Any], 
+                     hedge: bool, 
+                     usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        """Text chunks of a new response stream, hedged on time to first token if asked."""
+        delay = self._hedge_delay('first_token', payload['max_tokens']) if hedge else None
+        if delay is None:
+            stream = self._start_stream(self.client, self.model_id, payload, usage)
+        else:
+            stream = self._first_success(
+                lambda: self._start_stream(self.client, self.model_id, payload, usage),
+                lambda: self._start_stream(self.hedge_client, self.hedge_model_id, payload, usage),
+                delay,
+                discard=self._close_stream
+            )
+        _, texts, first = stream
+        return itertools.chain([first] if first else [], texts)
+    
+    def _join_flight(self, cache_key: str) -> Tuple[Future, bool]:
+        """
+        Register interest in a request.
+        Returns the shared future and whether the caller is the one that must compute it.
+        """
+        with self._inflight_lock:
+            flight = self._inflight.get(cache_key)
+            if flight is not None:
+                return flight, False
+            flight = Future()
+            self._inflight[cache_key] = flight
+            return flight, True
+    
+    @staticmethod
+    def _flight_error(error: BaseException) -> Exception:
+        """
+        The exception handed to the callers joined on a flight whose leader
+        stopped with error. GeneratorExit (a stream closed on rerun or
+        navigation) and other BaseExceptions only concern the leader, and
+        would get past the followers' fallbacks.
+        """
+        if isinstance(error, Exception):
+            return error
+        return LLMUnavailableError(f"Request abandoned by the caller that started it ({type(error).__name__})")
+    
+    def _leave_flight(self, cache_key: str) -> None:
+        """Forget a finished request so later callers go through the cache."""
+        with self._inflight_lock:
+            self._inflight.pop(cache_key, None)
+    
+    def _lease_owner(self) -> str:
+        """Identifier of the current process and thread for cache leases."""
+        return f"{os.getpid()}:{threading.get_ident()}"
+    
+    def _wait_for_other_process(self, cache_key: str, owner: str) -> Optional[str]:
+        """
+        Take the cross-process lease on a request, or wait for the worker process holding it.
+        Returns that process's answer, or None once the caller holds the lease.
+        """
+        while not self.cache.acquire_lease(cache_key, owner, SINGLE_FLIGHT_LEASE_SECONDS):
+            log_event(logger, "llm.wait_other_process", key=cache_key[:12])
+            result = self.cache.wait_for_value(cache_key, SINGLE_FLIGHT_LEASE_SECONDS)
+            if result is not None:
                 return result
-                    
-            except Exception as e:
-                logger.error(f"Error generating response: {str(e)}")
-                return f"Error: Unable to generate response. {str(e)}"
+        # The answer may have landed between our cache lookup and the lease
+        result = self.cache.peek(cache_key)
+        if result is not None:
+            self.cache.release_lease(cache_key, owner)
+        return result
+    
+    def _single_flight(self, cache_key: str, compute: Callable[[], str]) -> str:
+        """
+        Run compute() at most once at a time per cache key, across threads of this
+        process and (through a lease in the shared cache) across worker processes.
+        """
+        flight, leader = self._join_flight(cache_key)
+        if not leader:
+            log_event(logger, "llm.join_flight", key=cache_key[:12])
+            return flight.result()
+        
+        owner = self._lease_owner()
+        leased = False
+        try:
+            result = None
+            if self.cache is not None:
+                result = self._wait_for_other_process(cache_key, owner)
+                leased = result is None
+            if result is None:
+                result = compute()
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_exception(self._flight_error(e))
+            raise
+        finally:
+            if leased:
+                self.cache.release_lease(cache_key, owner)
+            self._leave_flight(cache_key)
+    
+    def generate_response_stream(self, 
+                                 prompt: str, 
+                                 system_prompt: str = "", 
+                                 max_tokens: int = 1000, 
+                                 temperature: float = 0.7,
+                                 hedge: bool = False,
+                                 priority: int = PRIORITY_INTERACTIVE,
+                                 caller: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream a response from the LLM, yielding text chunks as they are generated.
+        
+        Uses the Bedrock response-stream API so callers can render the first
+        tokens long before the full answer is available. Cached answers are
+        yielded in one piece, and a completed stream is stored in the cache.
+        Errors are raised to the caller as LLMUnavailableError so it can switch
+        to its fallback. With hedge, a stream whose first token is later than
+        the usual p95 is raced against a duplicate, and priority places the
+        stream in the admission queue (see generate_response).
+        
+        The stream is recorded in the telemetry once it ends or is abandoned,
+        under caller (by default the calling function).
+        """
+        call = CallRecord(caller or sys._getframe(1).f_code.co_name, self.model_id, stream=True)
+        return self._metered_stream(
+            self._stream(prompt, system_prompt, max_tokens, temperature, hedge, priority, call),
+            call
+        )
+    
+    def _metered_stream(self, chunks: Iterator[str], call: CallRecord) -> Iterator[str]:
+        """Pass a stream through, recording its outcome and duration when it finishes."""
+        try:
+            yield from chunks
+        except GeneratorExit:
+            call.outcome = "abandoned"
+            raise
+        except Exception as e:
+            call.outcome = type(e).__name__
+            raise
+        finally:
+            record_call(call)
+    
+    def _stream(self, 
+                prompt: str, 
+                system_prompt: str, 
+                max_tokens: int, 
+                temperature: float,
+                hedge: bool,
+                priority: int,
+                call: CallRecord) -> Iterator[str]:
+        """Body of generate_response_stream."""
+        use_mock = os.getenv('USE_MOCK_RESPONSES', 'False').lower() == 'true'
+        if use_mock:
+            # Replay the mock answer word by word to exercise progressive rendering
+            call.tier = "mock"
+            for word in self._mock_response(prompt).split(' '):
+                yield word + ' '
+            return
+        
+        cache_key = make_cache_key(self.model_id, system_prompt, prompt, max_tokens, temperature)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                log_event(logger, "llm.cache_hit", model=self.model_id, tier="exact", key=cache_key[:12], stream=True)
+                call.tier = "exact"
+                yield cached
+                return
+        
+        # Concurrent callers with the same request wait for the stream already running
+        flight, leader = self._join_flight(cache_key)
+        if not leader:
+            log_event(logger, "llm.join_flight", key=cache_key[:12])
+            yield flight.result()
+            return
+        
+        owner = self._lease_owner()
+        leased = False
+        try:
+            if self.cache is not None:
+                result = self._wait_for_other_process(cache_key, owner)
+                if result is not None:
+                    flight.set_result(result)
+                    yield result
+                    return
+                leased = True
+            
+            payload = self._construct_payload(prompt, system_prompt, max_tokens, temperature)
+            log_event(logger, "llm.stream_request", model=self.model_id, key=cache_key[:12],
+                      prompt_chars=len(prompt), system_chars=len(system_prompt), max_tokens=max_tokens)
+            
+            # The slot is held for the whole stream, which keeps a Bedrock connection busy
+            call.tier = "miss"
+            with self._admission_slot(priority) as queued:
+                call.queue_seconds = queued
+                if not self.breaker.allow():
+                    raise CircuitOpenError(f"Circuit breaker open for model {self.model_id}")
+                
+                log_body(cache_key, "request", payload)
+                # The breaker judges a stream on its time to first token
+                started = time.monotonic()
+                first_token = None
+                recorded = False
+                parts = []
+                usage: Dict[str, int] = {}
+                try:
+                    for text in self._open_stream(payload, hedge, usage):
+                        if not recorded:
+                            first_token = time.monotonic() - started
+                            self.breaker.record_success(first_token)
+                            recorded = True
+                        parts.append(text)
+                        yield text
+                except Exception as e:
+                    if not recorded:
+                        self.breaker.record_failure()
+                        recorded = True
+                    logger.error(f"Error streaming response: {str(e)}")
+                    raise LLMUnavailableError(f"Unable to stream response. {str(e)}") from e
+                finally:
+                    if not recorded:
+                        # Empty or abandoned stream: the service did answer
+                        self.breaker.record_success(time.monotonic() - started)
+            
+            result = "".join(parts)
+            call.first_byte_seconds = first_token
+            call.input_tokens = usage.get('input_tokens', 0)
+            call.output_tokens = usage.get('output_tokens', 0)
+            record_usage(call)
+            log_event(logger, "llm.stream_response", model=self.model_id, key=cache_key[:12],
+                      seconds=time.monotonic() - started, first_token_seconds=first_token,
+                      chars=len(result), chunks=len(parts), input_tokens=call.input_tokens,
+                      output_tokens=call.output_tokens, cache_read_tokens=usage.get('cache_read_input_tokens'),
+                      result_hash=short_hash(result))
+            log_body(cache_key, "response", result)
+            if self.cache is not None and result:
+                self.cache.set(cache_key, result)
+            flight.set_result(result)
+        except BaseException as e:
+            if not flight.done():
+                flight.set_exception(self._flight_error(e))
+            raise
+        finally:
+            if leased:
+                self.cache.release_lease(cache_key, owner)
+            self._leave_flight(cache_key)
+    
+    def _iter_stream_text(self, response: Dict[str, Any], usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        """
+        Yield the text deltas contained in a Bedrock response stream, collecting
+        the token counts of its message_start and message_delta events into usage.
+        """
+        for event in response['body']:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            data = json.loads(chunk['bytes'])
+            if data.get('type') == 'content_block_delta':
+                text = data.get('delta', {}).get('text')
+                if text:
+                    yield text
+            elif usage is not None and data.get('type') == 'message_start':
+                usage.update(data.get('message', {}).get('usage', {}))
+            elif usage is not None and data.get('type') == 'message_delta':
+                usage.update(data.get('usage', {}))
             
     def _construct_payload(self, 
                           prompt: str, 
                           system_prompt: str, 
                           max_tokens: int, 
                           temperature: float) -> Dict[str, Any]:
-        """Construct the payload for the model request."""
+        """
+        Construct the payload for the model request.
+        
+        With prompt caching enabled for the model, the system prompt and the
+        static prefix of the prompt template (see src/utils/prompt_templates.py)
+        are sent as separate blocks marked cacheable, ahead of the child-specific
+        text, so repeated requests reuse the provider's cached prefix.
+        """
+        system: Any = system_prompt
+        content = [{"type": "text", "text": prompt}]
+        if self.prompt_caching:
+            if system_prompt:
+                system = [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+            prefix = static_prefix(prompt)
+            if prefix:
+                content = [{"type": "text", "text": prefix, "cache_control": CACHE_CONTROL}]
+                if len(prompt) > len(prefix):
+                    content.append({"type": "text", "text": prompt[len(prefix):]})
         return {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": max_tokens,
             "temperature": temperature,
-            "system": system_prompt,
+            "system": system,
             "messages": [
                 {
                     "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt
-                        }
-                    ]
+                    "content": content
                 }
             ]
         }
@@ -164,10 +837,40 @@ class LLMConnector:
         return "No response generated."
 
 
+# Process-wide connectors, one per model id, shared by every session and thread
+_connectors: Dict[str, LLMConnector] = {}
+_connectors_lock = threading.Lock()
+
+
 # Utility function to get a pre-configured LLM connector instance
-def get_llm_connector(model_id: str = 'anthropic.claude-3-sonnet-20240229-v1:0') -> LLMConnector:
+def get_llm_connector(model_id: str = None, task: str = None) -> LLMConnector:
     """
-    Returns a pre-configured LLM connector instance.
-    This simplifies getting a connector in solution modules.
+    Returns the shared, pre-configured LLM connector for the given model.
+    The connector (and its pooled Bedrock client) is built once per process,
+    so Streamlit reruns and solution modules reuse warm HTTP connections.
+    
+    Call sites may declare a task class instead of a model (see
+    src/utils/model_router.py): the router then picks the best model for it,
+    skipping models whose circuit breaker is open. Without either, the large
+    model used for long-form generation is returned.
     """
-    return LLMConnector(model_id=model_id)
\ No newline at end of file
+    if model_id is None and task is not None:
+        ranked = get_model_router().rank(task)
+        for candidate in ranked:
+            connector = _connector_for(candidate)
+            if connector.breaker.state != OPEN:
+                return connector
+        return _connector_for(ranked[0])
+    return _connector_for(model_id or SONNET_MODEL_ID)
+
+
+def _connector_for(model_id: str) -> LLMConnector:
+    """The shared connector of a model, created on first use."""
+    connector = _connectors.get(model_id)
+    if connector is None:
+        with _connectors_lock:
+            connector = _connectors.get(model_id)
+            if connector is None:
+                connector = LLMConnector(model_id=model_id)
+                _connectors[model_id] = connector
+    return connector
@@ -3,13 +3,19 @@ Activities manager for dyscalculia and other learning disabilities.
 
 This module manages the available interactive activities and handles
 selecting appropriate activities based on identified difficulties.
+Activities are ranked locally by a weighted match between the difficulties
+revealed by the test and each activity's difficulty_types; the LLM prompt
+below is only used to optionally re-rank them in the background.
 """
 
 import streamlit as st
 import json
-import re
+import logging
 from typing import Dict, Any, List
 
+from src.utils.prompt_templates import register_template
+from src.utils.structured_output import StructuredOutputError, extract_json
+
 # Import the activity display functions
 from .interactive_components import (
     display_number_line_activity,
@@ -18,6 +24,8 @@ from .interactive_components import (
     display_monster_game
 )
 
+logger = logging.getLogger(__name__)
+
 # Define our available interactive activities with their mappings to difficulty types
 AVAILABLE_ACTIVITIES = {
     "number_line": {
@@ -46,82 +54,134 @@ AVAILABLE_ACTIVITIES = {
     }
 }
 
-def identify_difficulties(user_info: Dict[str, Any]) -> List[str]:
+# Test answers revealing each difficulty type: (question, expected answer)
+DIFFICULTY_EVIDENCE = {
+    "reconnaissance_nombres": (("q1", 8), ("q3", "10")),  # Numerical recognition
+    "calcul": (("q1", 8), ("q2", 6)),                     # Calculation
+    "suites": (("q3", "10"),),                            # Sequences/patterns
+    "comparaison": (("q4", "Une voiture"),)               # Comparison/measurement
+}
+
+# Weight of an activity's 1st, 2nd, ... difficulty type when matching
+TARGET_POSITION_WEIGHTS = (1.0, 0.5, 0.25)
+
+# Score given to "general" activities whatever the difficulties, so a playful
+# activity can complete a short list
+GENERAL_ACTIVITY_SCORE = 0.3
+
+# Fewest activities recommended, completed in catalogue order if needed
+MIN_RECOMMENDED_ACTIVITIES = 2
+
+def difficulty_weights(user_info: Dict[str, Any]) -> Dict[str, float]:
     """
-    Identify specific difficulties based on test responses.
+    Weighs each difficulty type by the share of its test questions answered wrongly.
     
     Args:
         user_info: Dictionary with user information and test responses
         
     Returns:
-        List of identified difficulty types
+        Weights between 0 and 1 of the identified difficulty types, in a
+        fixed order; {"general": 1.0} when no difficulty was identified
     """
-    difficulties = []
-    
-    # Check for numerical recognition issues
-    if user_info.get("q1") != 8 or user_info.get("q3") != "10":
-        difficulties.append("reconnaissance_nombres")
-    
-    # Check for calculation issues
-    if user_info.get("q1") != 8 or user_info.get("q2") != 6:
-        difficulties.append("calcul")
-    
-    # Check for sequence/pattern issues
-    if user_info.get("q3") != "10":
-        difficulties.append("suites")
-    
-    # Check for comparison/measurement issues
-    if user_info.get("q4") != "Une voiture":
-        difficulties.append("comparaison")
+    weights = {}
+    for difficulty, checks in DIFFICULTY_EVIDENCE.items():
+        wrong = sum(1 for question, expected in checks if user_info.get(question) != expected)
+        if wrong:
+            weights[difficulty] = wrong / len(checks)
     
     # If no specific difficulties identified, mark as general
-    if not difficulties:
-        difficulties.append("general")
+    if not weights:
+        weights["general"] = 1.0
     
-    return difficulties
+    return weights
 
-def generate_activities_prompt(analysis_results: str, user_info: Dict[str, Any]) -> str:
+def identify_difficulties(user_info: Dict[str, Any]) -> List[str]:
     """
-    Generates a prompt for the LLM to select appropriate activities.
+    Identify specific difficulties based on test responses.
     
     Args:
-        analysis_results: Analysis of test results as string
-        user_info: User information (age, name, class, etc.)
+        user_info: Dictionary with user information and test responses
         
     Returns:
-        A structured prompt for the LLM
+        List of identified difficulty types
     """
-    # Identify difficulties from test results
-    difficulties = identify_difficulties(user_info)
-    difficulties_str = ", ".join(difficulties)
+    return list(difficulty_weights(user_info))
+
+def rank_activities(user_info: Dict[str, Any], limit: int = 3) -> List[str]:
+    """
+    Picks the activities best matching the student's difficulties, without the LLM.
     
-    # Format activity data for prompt
-    activity_info = []
+    Each activity scores the weights of the difficulties it targets, its
+    first target counting most (TARGET_POSITION_WEIGHTS). Ties keep the
+    catalogue order, so the result is deterministic.
+    
+    Args:
+        user_info: Dictionary with user information and test responses
+        limit: Maximum number of activities
+        
+    Returns:
+        List of activity IDs, best first
+    """
+    weights = difficulty_weights(user_info)
+    scores = {}
     for activity_id, activity in AVAILABLE_ACTIVITIES.items():
-        activity_info.append({
+        targets = activity["difficulty_types"]
+        score = sum(
+            weights.get(difficulty, 0.0) * TARGET_POSITION_WEIGHTS[min(position, len(TARGET_POSITION_WEIGHTS) - 1)]
+            for position, difficulty in enumerate(targets)
+        )
+        if "general" in targets:
+            score = max(score, GENERAL_ACTIVITY_SCORE)
+        if score > 0:
+            scores[activity_id] = score
+    
+    # sorted() is stable: equal scores keep the catalogue order
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    for activity_id in AVAILABLE_ACTIVITIES:
+        if len(ranked) >= MIN_RECOMMENDED_ACTIVITIES:
+            break
+        if activity_id not in ranked:
+            ranked.append(activity_id)
+    return ranked[:limit]
+
+# Activity catalogue shown to the LLM, as compact JSON (indentation only costs tokens)
+ACTIVITY_CATALOGUE = json.dumps(
+    [
+        {
             "id": activity_id,
             "title": activity["title"],
             "description": activity["description"],
             "target_difficulties": activity["difficulty_types"]
-        })
-    
-    # Create the prompt
-    prompt = f"""
+        }
+        for activity_id, activity in AVAILABLE_ACTIVITIES.items()
+    ],
+    ensure_ascii=False,
+    separators=(',', ':')
+)
+
+# Expected answer: 1-3 distinct ids of the catalogue
+ACTIVITIES_SCHEMA = {
+    "type": "array",
+    "items": {"type": "string", "enum": list(AVAILABLE_ACTIVITIES)},
+    "minItems": 1,
+    "maxItems": 3,
+    "uniqueItems": True
+}
+
+# Activities recommended when the answer holds none
+DEFAULT_ACTIVITIES = ["calculator", "monster_game", "number_line"]
+
+# Prompt of generate_activities_prompt; the catalogue is substituted once, at import,
+# and the student's information comes last so everything before it can be cached
+ACTIVITIES_PROMPT = register_template(
+    "activities.selection",
+    """
     Tu es un assistant pédagogique spécialisé pour les élèves ayant des difficultés en mathématiques.
     
-    Informations sur l'élève:
-    - Nom: {user_info.get('nom', 'Student')}
-    - Âge: {user_info.get('age', 'unknown')} ans
-    - Classe: {user_info.get('classe', 'unknown')}
-    - Difficultés identifiées: {difficulties_str}
-    
-    Analyse des résultats:
-    {analysis_results}
-    
     Voici la liste des activités disponibles:
-    {json.dumps(activity_info, indent=2, ensure_ascii=False)}
+    {catalogue}
     
-    Ta mission est de sélectionner les 2-3 activités les plus appropriées pour cet élève,
+    Ta mission est de sélectionner les 2-3 activités les plus appropriées pour l'élève décrit ci-dessous,
     en fonction de ses difficultés spécifiques identifiées durant le test.
     
     Réponds UNIQUEMENT avec un tableau JSON contenant les IDs des activités recommandées:
@@ -131,9 +191,42 @@ def generate_activities_prompt(analysis_results: str, user_info: Dict[str, Any])
     ```
     
     N'inclus aucun autre texte, juste le tableau JSON.
+    
+    Informations sur l'élève:
+    - Nom: {name}
+    - Âge: {age} ans
+    - Classe: {class_level}
+    - Difficultés identifiées: {difficulties}
+    
+    Analyse des résultats:
+    {analysis_results}
+    """,
+    system="Tu es un assistant pédagogique spécialisé pour les enfants ayant des difficultés d'apprentissage. Ta mission est de recommander les activités les plus appropriées pour aider chaque enfant en fonction de ses besoins spécifiques.",
+    static={"catalogue": ACTIVITY_CATALOGUE},
+    schema=ACTIVITIES_SCHEMA
+)
+
+def generate_activities_prompt(analysis_results: str, user_info: Dict[str, Any]) -> str:
     """
+    Generates a prompt for the LLM to select appropriate activities.
     
-    return prompt
+    Args:
+        analysis_results: Analysis of test results as string
+        user_info: User information (age, name, class, etc.)
+        
+    Returns:
+        A structured prompt for the LLM
+    """
+    # Identify difficulties from test results
+    difficulties = identify_difficulties(user_info)
+    
+    return ACTIVITIES_PROMPT.render(
+        name=user_info.get('nom', 'Student'),
+        age=user_info.get('age', 'unknown'),
+        class_level=user_info.get('classe', 'unknown'),
+        difficulties=", ".join(difficulties),
+        analysis_results=analysis_results
+    )
 
 def parse_activities_response(llm_response: str) -> List[str]:
     """
@@ -145,51 +238,19 @@ def parse_activities_response(llm_response: str) -> List[str]:
     Returns:
         List of activity IDs
     """
-    # Log the raw response for debugging
-    print(f"Raw LLM response: {llm_response}")
-    
-    # Try to extract JSON from the response
-    json_match = re.search(r'```json\s*(.*?)\s*```', llm_response, re.DOTALL)
-    if json_match:
-        json_str = json_match.group(1)
-        print(f"Extracted JSON: {json_str}")
-    else:
-        # If no JSON code block, try to find array directly
-        json_match = re.search(r'\[\s*".*"\s*\]', llm_response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            print(f"Extracted array: {json_str}")
-        else:
-            # Fallback to using the whole response
-            json_str = llm_response
-            print(f"Using whole response as JSON: {json_str}")
-    
     try:
-        # Parse the JSON
-        activity_ids = json.loads(json_str)
-        print(f"Parsed activity IDs: {activity_ids}")
-        
-        # Validate activity IDs
-        valid_ids = []
-        for activity_id in activity_ids:
-            if activity_id in AVAILABLE_ACTIVITIES:
-                valid_ids.append(activity_id)
-        
-        print(f"Valid activity IDs: {valid_ids}")
-        
-        # Ensure we have at least one valid activity
-        if not valid_ids:
-            print("No valid activity IDs found, using defaults")
-            valid_ids = ["calculator", "monster_game", "number_line"]  # Default activities
-        
-        return valid_ids
+        # One tolerant pass: first JSON array of known ids, repaired if needed
+        activity_ids = extract_json(llm_response, ACTIVITIES_SCHEMA)
+        logger.debug("Parsed activity IDs: %s", activity_ids)
+        return activity_ids
     
-    except (json.JSONDecodeError, TypeError) as e:
-        # Log the error
-        print(f"Error parsing JSON: {str(e)}")
+    except StructuredOutputError as e:
+        # Log the error, with the raw response only when DEBUG is enabled
+        logger.warning("Error parsing activities JSON: %s", e)
+        logger.debug("Raw LLM response: %s", llm_response)
         
         # Provide fallback recommendations
-        return ["calculator", "monster_game", "number_line"]  # Default activities
+        return list(DEFAULT_ACTIVITIES)
 
 def display_activity_recommendations(recommended_activities: List[str]) -> None:
     """
@@ -6,12 +6,14 @@ and interactive visual components.
 import streamlit as st
 from typing import Dict, Any
 from src.solutions.dyscalculia import (
+    DYSCALCULIA_SOLUTION_PROMPT,
     generate_dyscalculia_prompt, 
     parse_dyscalculia_solution, 
     display_dyscalculia_solution
 )
 # Pour l'importation ci-dessous, il faudra s'assurer que cette fonction existe
 from src.solutions.interactive_components import display_interactive_dyscalculia_solution
+from src.interface.streaming import render_stream
 
 def provide_enhanced_dyscalculia_solution(analysis_results: str, user_info: Dict[str, Any], llm_connector) -> None:
     """
@@ -33,23 +35,24 @@ def provide_enhanced_dyscalculia_solution(analysis_results: str, user_info: Dict
                 # Generate prompt for the LLM
                 prompt = generate_dyscalculia_prompt(analysis_results, user_info)
                 
-                # Get system prompt
-                system_prompt = "Tu es un assistant pédagogique spécialisé pour les enfants ayant des troubles d'apprentissage. Ton objectif est de créer du matériel d'apprentissage attrayant, coloré et efficace qui aide les enfants à surmonter leurs difficultés spécifiques."
-                
-                # Get response from LLM
-                with st.spinner("Création de solutions personnalisées en cours..."):
-                    llm_response = llm_connector.generate_response(
+                # Stream the response from the LLM so the text appears as it is generated
+                stream_placeholder = st.empty()
+                llm_response = render_stream(
+                    llm_connector.generate_response_stream(
                         prompt=prompt,
-                        system_prompt=system_prompt,
+                        system_prompt=DYSCALCULIA_SOLUTION_PROMPT.system,
                         max_tokens=2000,
                         temperature=0.7
-                    )
-                    
-                    # Parse the response
-                    solution_components = parse_dyscalculia_solution(llm_response)
-                    
-                    # Store in session state
-                    st.session_state['dyscalculia_solution'] = solution_components
+                    ),
+                    stream_placeholder
+                )
+                stream_placeholder.empty()
+                
+                # Parse the response
+                solution_components = parse_dyscalculia_solution(llm_response)
+                
+                # Store in session state
+                st.session_state['dyscalculia_solution'] = solution_components
                     
             except Exception as e:
                 st.error(f"Une erreur s'est produite lors de la génération des solutions: {str(e)}")
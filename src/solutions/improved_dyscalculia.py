@@ -1,18 +1,73 @@
 """
 Improved solution module for dyscalculia with structured recommendations
 and direct navigation to interactive activities.
+
+Activities are picked locally (see activities_manager.rank_activities);
+with LLM_ACTIVITY_RERANK enabled, the LLM re-ranks them in the background.
 """
 
+import logging
+import os
 import streamlit as st
 from typing import Dict, Any, List
 
+from src.llm_connector import LLMUnavailableError, get_llm_connector
+from src.utils.model_router import TASK_SELECTION
+
 from .activities_manager import (
+    ACTIVITIES_PROMPT,
     generate_activities_prompt,
     parse_activities_response,
+    rank_activities,
     display_activity_recommendations,
     display_selected_activity
 )
 
+logger = logging.getLogger(__name__)
+
+# Whether results pages ask the LLM to re-rank the locally selected activities
+ACTIVITY_RERANK_ENABLED = os.getenv('LLM_ACTIVITY_RERANK', 'False').lower() == 'true'
+
+def select_recommended_activities(analysis_results: str, user_info: Dict[str, Any], llm_connector=None) -> List[str]:
+    """
+    Asks the LLM to pick the activities best suited to the student (the
+    optional re-ranking of rank_activities). Does not use Streamlit, so it
+    can run in a background worker.
+    
+    Args:
+        analysis_results: Analysis of test results as string
+        user_info: User information (age, name, class, etc.)
+        llm_connector: Instance of the LLM connector, defaults to the model
+            routed for short selection tasks
+        
+    Returns:
+        List of recommended activity IDs, the local ranking if the LLM is unavailable
+    """
+    if llm_connector is None:
+        llm_connector = get_llm_connector(task=TASK_SELECTION)
+    
+    # Generate prompt for the LLM
+    prompt = generate_activities_prompt(analysis_results, user_info)
+    
+    try:
+        llm_response = llm_connector.generate_response(
+            prompt=prompt,
+            system_prompt=ACTIVITIES_PROMPT.system,
+            max_tokens=500,
+            temperature=0.5
+        )
+    except LLMUnavailableError as e:
+        logger.warning(f"Using locally ranked activities: {str(e)}")
+        return rank_activities(user_info)
+    
+    # Parse the structured recommendations
+    activities = parse_activities_response(llm_response)
+    
+    # Only use them if we got valid activities
+    if activities is not None and len(activities) > 0:
+        return activities
+    return rank_activities(user_info)
+
 def provide_improved_dyscalculia_solution(analysis_results: str, user_info: Dict[str, Any], llm_connector) -> None:
     """
     Provides an improved dyscalculia solution with direct navigation
@@ -27,37 +82,10 @@ def provide_improved_dyscalculia_solution(analysis_results: str, user_info: Dict
     if 'current_activity' not in st.session_state:
         st.session_state['current_activity'] = None
     
-    # Initialize recommended_activities with defaults FIRST
+    # Pick the activities locally when the page did not already do it
     # This prevents the NoneType error
     if 'recommended_activities' not in st.session_state or st.session_state['recommended_activities'] is None:
-        st.session_state['recommended_activities'] = ["calculator", "number_line", "monster_game"]
-        
-        try:
-            # Generate prompt for the LLM
-            prompt = generate_activities_prompt(analysis_results, user_info)
-            
-            # Get system prompt
-            system_prompt = "Tu es un assistant pédagogique spécialisé pour les enfants ayant des difficultés d'apprentissage. Ta mission est de recommander les activités les plus appropriées pour aider chaque enfant en fonction de ses besoins spécifiques."
-            
-            # Get response from LLM
-            with st.spinner("Création de recommandations personnalisées..."):
-                llm_response = llm_connector.generate_response(
-                    prompt=prompt,
-                    system_prompt=system_prompt,
-                    max_tokens=500,
-                    temperature=0.5
-                )
-                
-                # Parse the structured recommendations
-                temp_activities = parse_activities_response(llm_response)
-                
-                # Only update if we got valid activities
-                if temp_activities is not None and len(temp_activities) > 0:
-                    st.session_state['recommended_activities'] = temp_activities
-                    
-        except Exception as e:
-            # Already have defaults, so just log error
-            st.error(f"Une erreur s'est produite: {str(e)}")
+        st.session_state['recommended_activities'] = rank_activities(user_info)
     
     # Display solutions header
     st.markdown("""
@@ -0,0 +1,141 @@
+"""
+Incremental parser for sectioned LLM solution responses.
+
+The solution prompts ask the model for a fixed list of markdown sections
+("## ..." headers). This parser is fed the response chunk by chunk while it
+is being streamed and reports each section as soon as the next header
+closes it, so the interface can fill sections one at a time.
+
+Headers are first matched exactly. Models drift from the requested
+headers (a "###" instead of "##", bold text, an emoji, numbering, a trailing
+colon, missing accents), so heading-like lines are also compared to the
+headers once both are normalised.
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Markdown heading, bold line or numbered line: the only lines tried as drifted headers
+_HEADING_LIKE = re.compile(r'^\s*(#{1,6}\s|\*\*|__|\d+[.)]\s)')
+
+
+def normalize_header(text: str) -> str:
+    """
+    Reduces a header to its words: markup, emoji, numbering, punctuation and
+    accents removed, case folded.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    words = re.findall(r"[^\W_]+", text.casefold())
+    if words and words[0].isdigit():
+        words = words[1:]
+    return " ".join(words)
+
+
+class SectionStreamParser:
+    """
+    Push-based parser splitting a markdown response into named sections.
+
+    Lines are only interpreted once complete, so a header split across two
+    chunks is still recognised. Lines outside any section are ignored and
+    blank lines are dropped, exactly like the original whole-response parsers.
+    """
+
+    def __init__(self, headers: Dict[str, str]):
+        """
+        Args:
+            headers: Mapping of header text (e.g. "## Système de Récompense")
+                to the section key it opens
+        """
+        self.headers = headers
+        self._normalized_headers = {normalize_header(header): key for header, key in headers.items()}
+        self.sections = {key: "" for key in headers.values()}
+        self.current_section: Optional[str] = None
+        self._buffer = ""
+
+    @property
+    def current_text(self) -> str:
+        """Text of the section still being generated, including the partial last line."""
+        if self.current_section is None:
+            return ""
+        return self.sections[self.current_section] + self._buffer
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """
+        Consumes a chunk of the response.
+
+        Args:
+            chunk: Next piece of streamed text
+
+        Returns:
+            List of (section_key, section_text) for sections finished by this chunk
+        """
+        self._buffer += chunk
+        finished = []
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            finished.extend(self._process_line(line))
+        return finished
+
+    def close(self) -> List[Tuple[str, str]]:
+        """
+        Flushes the remaining text once the response is complete.
+
+        Returns:
+            List of (section_key, section_text) for the sections still open
+        """
+        finished = []
+        if self._buffer:
+            line, self._buffer = self._buffer, ""
+            finished.extend(self._process_line(line))
+        if self.current_section is not None:
+            finished.append((self.current_section, self.sections[self.current_section]))
+            self.current_section = None
+        empty = [key for key, text in self.sections.items() if not text]
+        if empty:
+            logger.warning("Sections missing from the LLM response: %s", ", ".join(empty))
+        return finished
+
+    def _match_header(self, line: str) -> Optional[str]:
+        """The section key a line opens, or None if it is not a header."""
+        for header, key in self.headers.items():
+            if header in line:
+                return key
+        if _HEADING_LIKE.match(line):
+            return self._normalized_headers.get(normalize_header(line))
+        return None
+
+    def _process_line(self, line: str) -> List[Tuple[str, str]]:
+        """Handle one complete line, returning the section it closed if any."""
+        key = self._match_header(line)
+        if key is not None:
+            finished = []
+            if self.current_section is not None:
+                finished.append((self.current_section, self.sections[self.current_section]))
+            self.current_section = key
+            return finished
+
+        if self.current_section and line.strip():
+            self.sections[self.current_section] += line + "\n"
+        return []
+
+
+def parse_sections(llm_response: str, headers: Dict[str, str]) -> Dict[str, str]:
+    """
+    Parses a complete response in one go.
+
+    Args:
+        llm_response: Raw response from the LLM
+        headers: Mapping of header text to section key
+
+    Returns:
+        Dictionary with the text of every section
+    """
+    parser = SectionStreamParser(headers)
+    parser.feed(llm_response)
+    parser.close()
+    return parser.sections
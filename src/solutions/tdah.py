@@ -9,6 +9,61 @@ import streamlit as st
 import random
 from typing import Dict, Any
 
+from src.interface.streaming import display_solution_sections, stream_solution_sections
+from src.utils.prompt_templates import register_template
+from .section_parser import SectionStreamParser, parse_sections
+
+# Prompt of generate_tdah_prompt, with the system prompt of the generated solution.
+# The student's information comes last so the instructions form a cacheable prefix.
+TDAH_SOLUTION_PROMPT = register_template(
+    "solution.tdah",
+    """
+    Tu es un assistant pédagogique spécialisé pour les élèves ayant un TDAH (Trouble du Déficit de l'Attention avec ou sans Hyperactivité).
+
+    Ta mission est de créer un plan d'apprentissage personnalisé qui aide l'élève décrit à la fin à gérer son attention et son organisation. Le plan doit inclure exactement les sections suivantes:
+
+    1. TROIS techniques visuelles pour aider à l'organisation et à la planification. Chaque technique doit être très concrète, pratique, et utiliser des objets ou des images colorés.
+
+    2. DEUX jeux amusants qui améliorent la concentration et l'attention. Les jeux doivent être adaptés à l'âge de l'enfant et doivent pouvoir être joués avec du matériel simple.
+
+    3. UN système de récompense et de motivation expliqué étape par étape, qui encourage l'enfant à rester concentré. Ce système doit être présenté comme un processus très visuel.
+
+    4. TROIS messages d'encouragement spécifiques à l'attention et à l'organisation qui renforcent la confiance. Ces messages doivent être positifs, colorés, et adaptés à l'âge de l'enfant.
+
+    Rends tout le contenu attractif et approprié pour l'âge de l'enfant. Utilise un langage simple, des émojis, et de nombreuses métaphores visuelles.
+    
+    IMPORTANT: Tu dois formater ta réponse EXACTEMENT selon la structure suivante, en gardant ces titres markdown précis:
+    
+    ## Techniques d'Organisation Visuelles
+    
+    [Trois techniques détaillées avec explications claires]
+    
+    ## Jeux pour Améliorer l'Attention
+    
+    [Deux jeux détaillés avec règles claires]
+    
+    ## Système de Récompense
+    
+    [Système de motivation pas à pas avec exemples]
+    
+    ## Messages d'Encouragement
+    
+    [Trois messages motivants numérotés]
+    
+    Informations sur l'élève:
+    - Nom: {name}
+    - Âge: {age} ans
+    - Niveau scolaire: {class_level}
+    
+    Performance au test d'attention:
+    {performance_report}
+    
+    Analyse des résultats:
+    {analysis_results}
+    """,
+    system="Tu es un assistant pédagogique spécialisé pour les enfants ayant des troubles d'attention et d'hyperactivité. Ton objectif est de créer du matériel d'apprentissage attrayant, coloré et efficace qui aide les enfants à améliorer leur concentration et leur organisation."
+)
+
 def generate_tdah_prompt(analysis_results: str, user_info: Dict[str, Any]) -> str:
     """
     Generates a custom prompt for the LLM to create a tailored solution
@@ -38,53 +93,28 @@ def generate_tdah_prompt(analysis_results: str, user_info: Dict[str, Any]) -> st
             max_score = data["max"]
             performance_report += f"- {category.capitalize()}: {score}/{max_score}\n"
     
-    # Create the prompt with detailed information about the student's difficulties
-    prompt = f"""
-    Tu es un assistant pédagogique spécialisé pour les élèves ayant un TDAH (Trouble du Déficit de l'Attention avec ou sans Hyperactivité).
-
-    Informations sur l'élève:
-    - Nom: {name}
-    - Âge: {age} ans
-    - Niveau scolaire: {class_level}
-    
-    Performance au test d'attention:
-    {performance_report}
-    
-    Analyse des résultats:
-    {analysis_results}
-    
-    Ta mission est de créer un plan d'apprentissage personnalisé qui aide cet élève à gérer son attention et son organisation. Le plan doit inclure exactement les sections suivantes:
-
-    1. TROIS techniques visuelles pour aider à l'organisation et à la planification. Chaque technique doit être très concrète, pratique, et utiliser des objets ou des images colorés.
-
-    2. DEUX jeux amusants qui améliorent la concentration et l'attention. Les jeux doivent être adaptés à un enfant de {age} ans et doivent pouvoir être joués avec du matériel simple.
+    return TDAH_SOLUTION_PROMPT.render(
+        name=name,
+        age=age,
+        class_level=class_level,
+        performance_report=performance_report,
+        analysis_results=analysis_results
+    )
 
-    3. UN système de récompense et de motivation expliqué étape par étape, qui encourage l'enfant à rester concentré. Ce système doit être présenté comme un processus très visuel.
+# Sections requested by generate_tdah_prompt:
+# (key, markdown header, displayed title, banner color, message if empty)
+TDAH_SECTIONS = [
+    ("organization_techniques", "## Techniques d'Organisation Visuelles", "📋 Techniques d'Organisation Visuelles", "#4ECDC4",
+     "Aucune technique d'organisation n'a été générée. Veuillez réessayer."),
+    ("attention_games", "## Jeux pour Améliorer l'Attention", "🎮 Jeux pour Améliorer l'Attention", "#5D5FEF",
+     "Aucun jeu d'attention n'a été généré. Veuillez réessayer."),
+    ("reward_system", "## Système de Récompense", "🏆 Système de Récompense", "#FF6B6B",
+     "Aucun système de récompense n'a été généré. Veuillez réessayer."),
+    ("encouraging_messages", "## Messages d'Encouragement", "⭐ Messages d'Encouragement", "#FFD166",
+     "Aucun message d'encouragement n'a été généré. Veuillez réessayer.")
+]
 
-    4. TROIS messages d'encouragement spécifiques à l'attention et à l'organisation qui renforcent la confiance. Ces messages doivent être positifs, colorés, et adaptés à un enfant de {age} ans.
-
-    Rends tout le contenu attractif et approprié pour un enfant de {age} ans. Utilise un langage simple, des émojis, et de nombreuses métaphores visuelles.
-    
-    IMPORTANT: Tu dois formater ta réponse EXACTEMENT selon la structure suivante, en gardant ces titres markdown précis:
-    
-    ## Techniques d'Organisation Visuelles
-    
-    [Trois techniques détaillées avec explications claires]
-    
-    ## Jeux pour Améliorer l'Attention
-    
-    [Deux jeux détaillés avec règles claires]
-    
-    ## Système de Récompense
-    
-    [Système de motivation pas à pas avec exemples]
-    
-    ## Messages d'Encouragement
-    
-    [Trois messages motivants numérotés]
-    """
-    
-    return prompt
+TDAH_SECTION_HEADERS = {header: key for key, header, _title, _color, _message in TDAH_SECTIONS}
 
 def parse_tdah_solution(llm_response: str) -> Dict[str, Any]:
     """
@@ -96,37 +126,7 @@ def parse_tdah_solution(llm_response: str) -> Dict[str, Any]:
     Returns:
         Dictionary with parsed solution components
     """
-    # Simple parsing based on markdown headers
-    sections = {
-        "organization_techniques": "",
-        "attention_games": "",
-        "reward_system": "",
-        "encouraging_messages": ""
-    }
-    
-    current_section = None
-    
-    lines = llm_response.split('\n')
-    for i, line in enumerate(lines):
-        # Check what section we're in
-        if "## Techniques d'Organisation Visuelles" in line:
-            current_section = "organization_techniques"
-            continue
-        elif "## Jeux pour Améliorer l'Attention" in line:
-            current_section = "attention_games"
-            continue
-        elif "## Système de Récompense" in line:
-            current_section = "reward_system"
-            continue
-        elif "## Messages d'Encouragement" in line:
-            current_section = "encouraging_messages"
-            continue
-        
-        # Add the line to the current section if we're in a section
-        if current_section and line.strip():
-            sections[current_section] += line + "\n"
-    
-    return sections
+    return parse_sections(llm_response, TDAH_SECTION_HEADERS)
 
 def display_tdah_solution(solution_components: Dict[str, Any]) -> None:
     """
@@ -135,63 +135,7 @@ def display_tdah_solution(solution_components: Dict[str, Any]) -> None:
     Args:
         solution_components: Parsed solution components from the LLM
     """
-    # Setup nice, colorful containers for each section
-    
-    # Display Organization Techniques
-    st.markdown("""
-    <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid #4ECDC4;">
-        <h3 style="color: #4ECDC4; text-align: center;">📋 Techniques d'Organisation Visuelles</h3>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    organization_techniques = solution_components["organization_techniques"]
-    if organization_techniques.strip():
-        with st.container():
-            st.markdown(organization_techniques)
-    else:
-        st.warning("Aucune technique d'organisation n'a été générée. Veuillez réessayer.")
-    
-    # Display Attention Games
-    st.markdown("""
-    <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid #5D5FEF;">
-        <h3 style="color: #5D5FEF; text-align: center;">🎮 Jeux pour Améliorer l'Attention</h3>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    attention_games = solution_components["attention_games"]
-    if attention_games.strip():
-        with st.container():
-            st.markdown(attention_games)
-    else:
-        st.warning("Aucun jeu d'attention n'a été généré. Veuillez réessayer.")
-    
-    # Display Reward System
-    st.markdown("""
-    <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid #FF6B6B;">
-        <h3 style="color: #FF6B6B; text-align: center;">🏆 Système de Récompense</h3>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    reward_system = solution_components["reward_system"]
-    if reward_system.strip():
-        with st.container():
-            st.markdown(reward_system)
-    else:
-        st.warning("Aucun système de récompense n'a été généré. Veuillez réessayer.")
-    
-    # Display Encouraging Messages
-    st.markdown("""
-    <div style="background-color: rgba(255,255,255,0.7); padding: 20px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); border: 3px solid #FFD166;">
-        <h3 style="color: #FFD166; text-align: center;">⭐ Messages d'Encouragement</h3>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    encouraging_messages = solution_components["encouraging_messages"]
-    if encouraging_messages.strip():
-        with st.container():
-            st.markdown(encouraging_messages)
-    else:
-        st.warning("Aucun message d'encouragement n'a été généré. Veuillez réessayer.")
+    display_solution_sections(TDAH_SECTIONS, solution_components)
 
 def provide_tdah_solution(analysis_results: str, user_info: Dict[str, Any], llm_connector) -> None:
     """
@@ -202,48 +146,51 @@ def provide_tdah_solution(analysis_results: str, user_info: Dict[str, Any], llm_
         user_info: User information (age, name, class, etc.)
         llm_connector: Instance of the LLM connector
     """
-    # Check if we already have solutions in session state to avoid re-generating
-    if 'tdah_solution' not in st.session_state:
-        try:
-            # Generate prompt for the LLM
-            prompt = generate_tdah_prompt(analysis_results, user_info)
-            
-            # Get system prompt
-            system_prompt = "Tu es un assistant pédagogique spécialisé pour les enfants ayant des troubles d'attention et d'hyperactivité. Ton objectif est de créer du matériel d'apprentissage attrayant, coloré et efficace qui aide les enfants à améliorer leur concentration et leur organisation."
-            
-            # Get response from LLM
-            with st.spinner("Création de solutions personnalisées en cours..."):
-                llm_response = llm_connector.generate_response(
-                    prompt=prompt,
-                    system_prompt=system_prompt,
-                    max_tokens=2000,  # Increased token limit for more detailed responses
-                    temperature=0.7
-                )
+    # Display tabs for different solution types
+    tab1, tab2 = st.tabs(["📚 Conseils et exercices", "🎮 Activités interactives"])
+    
+    with tab1:
+        # Check if we already have solutions in session state to avoid re-generating
+        if 'tdah_solution' not in st.session_state:
+            stream_area = st.empty()
+            try:
+                # Generate prompt for the LLM
+                prompt = generate_tdah_prompt(analysis_results, user_info)
                 
-                # Parse the response
-                solution_components = parse_tdah_solution(llm_response)
+                # Stream the response and fill each section as soon as it is complete
+                with stream_area.container():
+                    solution_components = stream_solution_sections(
+                        TDAH_SECTIONS,
+                        llm_connector.generate_response_stream(
+                            prompt=prompt,
+                            system_prompt=TDAH_SOLUTION_PROMPT.system,
+                            max_tokens=2000,  # Increased token limit for more detailed responses
+                            temperature=0.7,
+                            hedge=True  # Long answers: race a duplicate when the first token is late
+                        ),
+                        SectionStreamParser(TDAH_SECTION_HEADERS)
+                    )
                 
                 # Store in session state
                 st.session_state['tdah_solution'] = solution_components
                 
-        except Exception as e:
-            st.error(f"Une erreur s'est produite lors de la génération des solutions: {str(e)}")
-            
-            # Provide a fallback solution if generation fails
-            fallback_solution = {
-                "organization_techniques": "### Technique 1: Tableau de Tâches Coloré\nCrée un tableau avec des post-it de couleurs différentes pour chaque type de tâche. Le vert pour les devoirs, le bleu pour les activités personnelles, etc.",
-                "attention_games": "### Jeu 1: Le Détective des Détails\nObserve une image pendant 30 secondes, puis cache-la et essaie de te rappeler autant de détails que possible.",
-                "reward_system": "### Système de Points\nChaque fois que tu termines une tâche sans te distraire, tu gagnes 2 points. Avec 10 points, tu peux choisir une récompense comme 15 minutes de jeu vidéo ou une collation spéciale.",
-                "encouraging_messages": "1. Chaque petit pas est une grande victoire pour ton cerveau!\n2. Tu as le super-pouvoir de contrôler ton attention quand tu le décides!\n3. Les erreurs sont normales, c'est en essayant qu'on devient un champion de la concentration!"
-            }
-            st.session_state['tdah_solution'] = fallback_solution
-    
-    # Display tabs for different solution types
-    tab1, tab2 = st.tabs(["📚 Conseils et exercices", "🎮 Activités interactives"])
-    
-    with tab1:
-        # Display the solution
-        display_tdah_solution(st.session_state['tdah_solution'])
+            except Exception as e:
+                # Drop any partially streamed sections before showing the fallback
+                stream_area.empty()
+                st.error(f"Une erreur s'est produite lors de la génération des solutions: {str(e)}")
+                
+                # Provide a fallback solution if generation fails
+                fallback_solution = {
+                    "organization_techniques": "### Technique 1: Tableau de Tâches Coloré\nCrée un tableau avec des post-it de couleurs différentes pour chaque type de tâche. Le vert pour les devoirs, le bleu pour les activités personnelles, etc.",
+                    "attention_games": "### Jeu 1: Le Détective des Détails\nObserve une image pendant 30 secondes, puis cache-la et essaie de te rappeler autant de détails que possible.",
+                    "reward_system": "### Système de Points\nChaque fois que tu termines une tâche sans te distraire, tu gagnes 2 points. Avec 10 points, tu peux choisir une récompense comme 15 minutes de jeu vidéo ou une collation spéciale.",
+                    "encouraging_messages": "1. Chaque petit pas est une grande victoire pour ton cerveau!\n2. Tu as le super-pouvoir de contrôler ton attention quand tu le décides!\n3. Les erreurs sont normales, c'est en essayant qu'on devient un champion de la concentration!"
+                }
+                st.session_state['tdah_solution'] = fallback_solution
+                display_tdah_solution(fallback_solution)
+        else:
+            # Display the solution
+            display_tdah_solution(st.session_state['tdah_solution'])
         
     with tab2:
         # Display interactive attention activities
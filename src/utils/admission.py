@@ -0,0 +1,225 @@
+"""
+Process-wide admission control for outbound LLM requests.
+
+Bounds how many Bedrock calls run at once, so a busy classroom queues
+briefly instead of triggering throttling retries for everyone. Waiting
+requests are served by priority: a child waiting on a results page goes
+before speculative prefetches, which go before batch jobs. When the queue
+is full or a request waited too long, it is shed and the caller falls back
+to its local answer.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+from src.utils.latency_tracker import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# Request priorities, lower is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PREFETCH = 1
+PRIORITY_BATCH = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_PREFETCH: "prefetch",
+    PRIORITY_BATCH: "batch"
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being admitted."""
+
+
+class _Waiter:
+    """A request waiting for a slot."""
+
+    def __init__(self, priority: int, sequence: int):
+        self.priority = priority
+        self.sequence = sequence
+        self.event = threading.Event()
+        self.status = "waiting"
+
+
+class PriorityTicket:
+    """
+    The priority of a request that can be raised while it waits for a slot,
+    e.g. a prefetch that a results page has started waiting on. Passed to
+    acquire() in place of a plain priority.
+    """
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self._controller: Optional["AdmissionController"] = None
+        self._waiter: Optional[_Waiter] = None
+        self._lock = threading.Lock()
+
+    def raise_to(self, priority: int) -> None:
+        """Serve the request at priority from now on, if it is better than the current one."""
+        with self._lock:
+            if priority >= self.priority:
+                return
+            self.priority = priority
+            controller, waiter = self._controller, self._waiter
+        if waiter is not None:
+            controller._promote(waiter, priority)
+
+    def _attach(self, controller: "AdmissionController", waiter: _Waiter) -> None:
+        """Link the ticket to its queued request, applying a raise that came in meanwhile."""
+        with self._lock:
+            self._controller, self._waiter = controller, waiter
+            priority = self.priority
+        controller._promote(waiter, priority)
+
+
+class AdmissionController:
+    """
+    Counting semaphore with a priority queue and queue-time metrics.
+
+    A freed slot goes to the waiting request with the best priority (oldest
+    first among equals). When the queue is full, a new request displaces the
+    lowest-priority waiter if it outranks it, and is rejected otherwise.
+    """
+
+    def __init__(self, max_concurrent: int = None, max_queued: int = None, max_wait: float = None):
+        """
+        Args:
+            max_concurrent: Maximum simultaneous requests
+            max_queued: Maximum waiting requests
+            max_wait: Longest wait in seconds before a non-batch request is shed
+        """
+        self.max_concurrent = max_concurrent or int(os.getenv('LLM_MAX_CONCURRENT_REQUESTS', '8'))
+        self.max_queued = max_queued if max_queued is not None else int(os.getenv('LLM_MAX_QUEUED_REQUESTS', '32'))
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv('LLM_ADMISSION_MAX_WAIT_SECONDS', '10'))
+
+        self._active = 0
+        self._queued = 0
+        self._heap = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._queue_times = {priority: LatencyTracker(window=500, min_samples=1) for priority in PRIORITY_NAMES}
+        self._admitted = {priority: 0 for priority in PRIORITY_NAMES}
+        self._shed = {priority: 0 for priority in PRIORITY_NAMES}
+
+    def acquire(self, priority: Union[int, PriorityTicket] = PRIORITY_INTERACTIVE) -> float:
+        """
+        Waits for a slot. Batch requests wait as long as needed, others at most max_wait.
+
+        Args:
+            priority: PRIORITY_INTERACTIVE, PRIORITY_PREFETCH or PRIORITY_BATCH,
+                or a PriorityTicket whose priority may be raised while waiting
+
+        Returns:
+            Seconds spent queuing
+
+        Raises:
+            AdmissionRejected: If the request was shed
+        """
+        ticket = priority if isinstance(priority, PriorityTicket) else None
+        if ticket is not None:
+            priority = ticket.priority
+        started = time.monotonic()
+        with self._lock:
+            if self._active < self.max_concurrent and self._queued == 0:
+                self._active += 1
+                self._admitted[priority] += 1
+                self._queue_times[priority].record(0.0)
+                return 0.0
+
+            if self._queued >= self.max_queued and not self._displace(priority):
+                self._shed[priority] += 1
+                raise AdmissionRejected(f"LLM request queue full ({self._queued} waiting)")
+
+            waiter = _Waiter(priority, next(self._sequence))
+            heapq.heappush(self._heap, (priority, waiter.sequence, waiter))
+            self._queued += 1
+
+        if ticket is not None:
+            ticket._attach(self, waiter)
+        waiter.event.wait(None if priority == PRIORITY_BATCH else self.max_wait)
+
+        with self._lock:
+            queued_for = time.monotonic() - started
+            # Counted under the priority it was served at
+            priority = waiter.priority
+            if waiter.status == "admitted":
+                self._admitted[priority] += 1
+                self._queue_times[priority].record(queued_for)
+                return queued_for
+            if waiter.status == "waiting":
+                # Timed out: leave the entry in the heap, release() skips it
+                waiter.status = "shed"
+                self._queued -= 1
+            self._shed[priority] += 1
+        logger.warning(f"Shed {PRIORITY_NAMES[priority]} LLM request after {queued_for:.1f}s in queue")
+        raise AdmissionRejected(f"No LLM slot within {queued_for:.1f}s")
+
+    def _displace(self, priority: int) -> bool:
+        """Shed the lowest-priority waiter if the new request outranks it (caller holds the lock)."""
+        # A promoted waiter leaves a stale entry at its old priority behind
+        candidates = [
+            entry for entry in self._heap
+            if entry[2].status == "waiting" and entry[0] == entry[2].priority and entry[0] > priority
+        ]
+        if not candidates:
+            return False
+        _, _, victim = max(candidates, key=lambda entry: (entry[0], entry[1]))
+        victim.status = "shed"
+        victim.event.set()
+        self._queued -= 1
+        return True
+
+    def _promote(self, waiter: _Waiter, priority: int) -> None:
+        """Move a waiting request up to a better priority, keeping its place among equals."""
+        with self._lock:
+            if waiter.status != "waiting" or priority >= waiter.priority:
+                return
+            waiter.priority = priority
+            # The old entry stays in the heap; release() skips it once the waiter is served
+            heapq.heappush(self._heap, (priority, waiter.sequence, waiter))
+
+    def release(self) -> None:
+        """Frees a slot, handing it to the best waiting request if any."""
+        with self._lock:
+            while self._heap:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.status == "waiting":
+                    waiter.status = "admitted"
+                    self._queued -= 1
+                    waiter.event.set()
+                    return
+            self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns current load and, per priority, admissions, sheds and queue-time quantiles."""
+        with self._lock:
+            stats = {"active": self._active, "queued": self._queued, "max_concurrent": self.max_concurrent}
+            for priority, name in PRIORITY_NAMES.items():
+                tracker = self._queue_times[priority]
+                stats[name] = {
+                    "admitted": self._admitted[priority],
+                    "shed": self._shed[priority],
+                    "queue_p50": tracker.quantile(0.5),
+                    "queue_p95": tracker.quantile(0.95)
+                }
+            return stats
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Returns the process-wide admission controller."""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,154 @@
+"""
+Circuit breaker for calls to the LLM service.
+
+When Bedrock is failing or very slow, every page waiting on it blocks until
+its timeout before showing the local fallback. The breaker watches the
+recent error rate and latency of the calls; once they exceed their
+thresholds it opens and rejects calls immediately, so callers fall back in
+microseconds. After a cool-down it lets a few probe calls through
+(half-open) and closes again if they succeed.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe breaker over a sliding time window of call outcomes.
+
+    A call counts as failed if it raised or took longer than
+    slow_call_seconds. The breaker opens when at least min_calls calls in
+    the window failed at a rate of failure_rate or more.
+    """
+
+    def __init__(self,
+                 name: str,
+                 failure_rate: float = None,
+                 min_calls: int = None,
+                 window_seconds: float = None,
+                 slow_call_seconds: float = None,
+                 open_seconds: float = None,
+                 half_open_probes: int = None):
+        """
+        Args:
+            name: Name used in logs
+            failure_rate: Share of failed calls opening the breaker
+            min_calls: Calls needed in the window before the rate is trusted
+            window_seconds: Age of the oldest outcome taken into account
+            slow_call_seconds: Latency above which a successful call counts as failed
+            open_seconds: Time the breaker stays open before probing
+            half_open_probes: Successful probes needed to close again
+        """
+        self.name = name
+        self.failure_rate = failure_rate if failure_rate is not None else float(os.getenv('LLM_BREAKER_FAILURE_RATE', '0.5'))
+        self.min_calls = min_calls if min_calls is not None else int(os.getenv('LLM_BREAKER_MIN_CALLS', '5'))
+        self.window_seconds = window_seconds if window_seconds is not None else float(os.getenv('LLM_BREAKER_WINDOW_SECONDS', '60'))
+        self.slow_call_seconds = slow_call_seconds if slow_call_seconds is not None else float(os.getenv('LLM_BREAKER_SLOW_CALL_SECONDS', '30'))
+        self.open_seconds = open_seconds if open_seconds is not None else float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30'))
+        self.half_open_probes = half_open_probes if half_open_probes is not None else int(os.getenv('LLM_BREAKER_HALF_OPEN_PROBES', '1'))
+
+        self.state = CLOSED
+        self._outcomes = deque()
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Asks permission for one call. A caller that gets True must report the
+        outcome with record_success() or record_failure(), or call
+        release_probe() if the call ended without one.
+
+        Returns:
+            False if the call must not be made
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self._rejected += 1
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self._rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record_success(self, latency: float) -> None:
+        """Reports a call that returned after latency seconds."""
+        self._record(latency <= self.slow_call_seconds)
+
+    def record_failure(self) -> None:
+        """Reports a call that raised."""
+        self._record(False)
+
+    def release_probe(self) -> None:
+        """
+        Reports a call abandoned without an outcome (e.g. given up at its
+        caller's deadline), freeing its half-open probe slot.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _record(self, ok: bool) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if not ok:
+                    self._transition(OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._transition(CLOSED)
+                return
+            if self.state == OPEN:
+                # Outcome of a call started before the breaker opened
+                return
+
+            self._outcomes.append((now, ok))
+            while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+                self._outcomes.popleft()
+            failures = sum(1 for _, success in self._outcomes if not success)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        """Switch state (caller holds the lock)."""
+        if state == self.state:
+            return
+        logger.warning(f"Circuit breaker '{self.name}' {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        else:
+            self._outcomes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the current state and counters of the breaker."""
+        with self._lock:
+            failures = sum(1 for _, success in self._outcomes if not success)
+            return {
+                "state": self.state,
+                "window_calls": len(self._outcomes),
+                "window_failures": failures,
+                "rejected": self._rejected
+            }
@@ -1,11 +1,11 @@
 # File path: src/utils/image_utils.py
 import os
 import base64
-from PIL import Image
-import requests
 
 def load_local_image(image_path):
     """Load a local image"""
+    from PIL import Image
+    
     if os.path.exists(image_path):
         return Image.open(image_path)
     else:
@@ -30,6 +30,8 @@ def get_base64_of_bin_file(bin_file):
 
 def get_img_with_href(url):
     """Get base64 encoding of an image from URL"""
+    import requests
+    
     try:
         response = requests.get(url)
         img_data = response.content
@@ -37,65 +39,41 @@ def get_img_with_href(url):
     except:
         return ""
 
-# Try to load the images from common paths
-try:
-    dyscalc_b64 = get_image_base64("/home/ubuntu/side/SmartAid/data/dyscalc.png")
-except:
-    dyscalc_b64 = ""
-
-try:
-    dtha_b64 = get_image_base64("/home/ubuntu/side/SmartAid/data/dtha.png")
-except:
-    dtha_b64 = ""
-
-# If images couldn't be loaded, provide fallback paths
-if not dyscalc_b64:
-    try:
-        dyscalc_b64 = get_image_base64("data/dyscalc.png")
-    except:
-        dyscalc_b64 = ""
-
-if not dtha_b64:
-    try:
-        dtha_b64 = get_image_base64("data/dtha.png")
-    except:
-        dtha_b64 = ""
-
-# Add dyslexie image with the same pattern
-try:
-    dyslexie_b64 = get_image_base64("/home/ubuntu/side/SmartAid/data/dyslexie.png")
-except:
-    dyslexie_b64 = ""
+# Directories searched for the page images, in order
+IMAGE_DIRECTORIES = ["/home/ubuntu/side/SmartAid/data", "data"]
 
-if not dyslexie_b64:
-    try:
-        dyslexie_b64 = get_image_base64("data/dyslexie.png")
-    except:
-        dyslexie_b64 = ""
-
-# If still no image, provide a placeholder base64
-if not dyslexie_b64:
-    dyslexie_b64 = """
+# Placeholder used when an image file is missing
+PLACEHOLDER_B64 = """
     iVBORw0KGgoAAAANSUhEUgAAASwAAAD6CAYAAAAbbXrzAAAABGdBTUEAALGPC/SxoQAAAWFJREFUeJzt1DEBACAMwDDAv+dxIoEeiYK+2d0zAQL+dwMAHoYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZCzn0QJm8zHRjwAAAABJRU5ErkJggg==
     """
 
-# Add dysgraphie image with the same pattern
-try:
-    dysgraphie_b64 = get_image_base64("/home/ubuntu/side/SmartAid/data/dysgraphie.png")
-except:
-    dysgraphie_b64 = ""
-
-if not dysgraphie_b64:
-    try:
-        dysgraphie_b64 = get_image_base64("data/dysgraphie.png")
-    except:
-        dysgraphie_b64 = ""
+# Images embedded in the pages: module attribute -> (file name, value if missing).
+# They are read on first access (see __getattr__), so importing this module
+# only reads the images the current page uses
+IMAGE_FILES = {
+    "dyscalc_b64": ("dyscalc.png", ""),
+    "dtha_b64": ("dtha.png", ""),
+    "dyslexie_b64": ("dyslexie.png", PLACEHOLDER_B64),
+    "dysgraphie_b64": ("dysgraphie.png", PLACEHOLDER_B64)
+}
 
-# If still no image, provide a placeholder base64
-if not dysgraphie_b64:
-    dysgraphie_b64 = """
-    iVBORw0KGgoAAAANSUhEUgAAASwAAAD6CAYAAAAbbXrzAAAABGdBTUEAALGPC/SxoQAAAWFJREFUeJzt1DEBACAMwDDAv+dxIoEeiYK+2d0zAQL+dwMAHoYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZBgWkGFYQIZhARmGBWQYFpBhWECGYQEZhgVkGBaQYVhAhmEBGYYFZCzn0QJm8zHRjwAAAABJRU5ErkJggg==
-    """
+def __getattr__(name):
+    """Load an image of IMAGE_FILES as base64 on first access, then keep it as a module attribute"""
+    if name not in IMAGE_FILES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    file_name, default = IMAGE_FILES[name]
+    value = ""
+    for directory in IMAGE_DIRECTORIES:
+        try:
+            value = get_image_base64(os.path.join(directory, file_name))
+        except OSError:
+            value = ""
+        if value:
+            break
+    
+    globals()[name] = value or default
+    return globals()[name]
 
 def set_background_image(image_path):
     """
@@ -0,0 +1,50 @@
+"""
+Rolling latency statistics for LLM calls.
+
+Keeps the most recent latencies of one kind of call (e.g. full answers of
+2000-token prompts, or time to first token of streams) and estimates their
+quantiles, which the connector uses to decide when a request is late enough
+to be hedged.
+"""
+
+import threading
+from collections import deque
+from typing import Optional
+
+
+class LatencyTracker:
+    """Thread-safe sliding window of latencies with quantile estimates."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: Number of recent latencies kept
+            min_samples: Samples needed before quantiles are reported
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Adds one observed latency."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a latency quantile over the window.
+
+        Args:
+            q: Quantile between 0 and 1 (0.95 for p95)
+
+        Returns:
+            The latency in seconds, or None while there are too few samples
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
@@ -0,0 +1,439 @@
+"""
+Response cache for LLM calls.
+
+This module stores generated responses in a local SQLite database keyed on a
+hash of the request, so that every Streamlit worker process on the host can
+reuse answers to byte-identical prompts instead of calling Bedrock again.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'llm_cache.sqlite3')
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BUCKET_TTL_SECONDS = 30 * 24 * 3600
+# A hit only rewrites last_access when the stored one is older than this,
+# so LRU order is kept to within this resolution
+DEFAULT_ACCESS_RESOLUTION_SECONDS = 60
+# Lookup counters are kept in memory and written at most this often
+DEFAULT_STATS_FLUSH_SECONDS = 10
+
+
+def make_cache_key(model_id: str,
+                   system_prompt: str,
+                   prompt: str,
+                   max_tokens: int,
+                   temperature: float) -> str:
+    """
+    Builds the content-addressed key of an LLM request.
+
+    Args:
+        model_id: Bedrock model identifier
+        system_prompt: System prompt sent with the request
+        prompt: User prompt sent with the request
+        max_tokens: Maximum number of generated tokens
+        temperature: Sampling temperature
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    material = json.dumps([model_id, system_prompt, prompt, max_tokens, temperature], ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    A SQLite-backed cache with TTL expiry and size-bounded LRU eviction.
+
+    The database runs in WAL mode so several processes can read and write it
+    concurrently. Hit, miss and eviction counters are stored in the database
+    as well, which makes the statistics host-wide rather than per process.
+    A lookup does not write on every hit: last_access is only refreshed once
+    per access_resolution_seconds, and hit/miss counters are batched in
+    memory and flushed every stats_flush_seconds.
+    """
+
+    def __init__(self,
+                 path: str = None,
+                 ttl_seconds: int = None,
+                 max_bytes: int = None,
+                 table: str = 'responses',
+                 access_resolution_seconds: float = None,
+                 stats_flush_seconds: float = None):
+        """
+        Initialize the cache and create its tables if needed.
+        Settings are loaded from environment variables if not provided.
+        """
+        self.path = path or os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv('LLM_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('LLM_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.table = table
+        self.access_resolution_seconds = access_resolution_seconds if access_resolution_seconds is not None else float(
+            os.getenv('LLM_CACHE_ACCESS_RESOLUTION_SECONDS', DEFAULT_ACCESS_RESOLUTION_SECONDS))
+        self.stats_flush_seconds = stats_flush_seconds if stats_flush_seconds is not None else float(
+            os.getenv('LLM_CACHE_STATS_FLUSH_SECONDS', DEFAULT_STATS_FLUSH_SECONDS))
+        self._local = threading.local()
+        self._pending: Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_tables()
+        atexit.register(self.flush_stats)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns the SQLite connection of the current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_tables(self) -> None:
+        """Create the entry and counter tables."""
+        conn = self._connection()
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_access ON {self.table} (last_access)")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table}_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table}_leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _bump(self, conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        """Increment a persistent counter."""
+        conn.execute(
+            f"INSERT INTO {self.table}_stats (name, value) VALUES (?, ?) "
+            f"ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def _count(self, name: str) -> None:
+        """Increment a counter in memory, flushing the batch once it is old enough."""
+        with self._pending_lock:
+            self._pending[name] = self._pending.get(name, 0) + 1
+            due = time.monotonic() - self._last_flush >= self.stats_flush_seconds
+        if due:
+            self.flush_stats()
+
+    def _flush_pending(self, conn: sqlite3.Connection) -> None:
+        """Write the batched counters to the database in one transaction."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, amount in pending.items():
+                    self._bump(conn, name, amount)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            # Keep the counts for the next flush rather than losing them
+            with self._pending_lock:
+                for name, amount in pending.items():
+                    self._pending[name] = self._pending.get(name, 0) + amount
+            raise
+
+    def flush_stats(self) -> None:
+        """Write the hit/miss counters batched by this process to the database."""
+        try:
+            self._flush_pending(self._connection())
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache stats flush failed: {str(e)}")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a cached response.
+
+        Args:
+            key: Cache key built with make_cache_key
+
+        Returns:
+            The cached response, or None on a miss or an expired entry
+        """
+        try:
+            conn = self._connection()
+            now = time.time()
+            row = conn.execute(
+                f"SELECT value, created_at, last_access FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._count('misses')
+                return None
+
+            value, created_at, last_access = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._count('misses')
+                self._count('expirations')
+                return None
+
+            # Hot entries are read far more often than LRU order needs refreshing
+            if now - last_access >= self.access_resolution_seconds:
+                conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            self._count('hits')
+            return value
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+            return None
+
+    def peek(self, key: str) -> Optional[str]:
+        """Returns a fresh cached response without touching statistics or LRU order."""
+        try:
+            row = self._connection().execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or (self.ttl_seconds and time.time() - row[1] > self.ttl_seconds):
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Stores a response and evicts least recently used entries if the cache
+        grew past its size limit.
+
+        Args:
+            key: Cache key built with make_cache_key
+            value: Response text to store
+        """
+        try:
+            conn = self._connection()
+            now = time.time()
+            size = len(value.encode('utf-8'))
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, last_access) "
+                    f"VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now)
+                )
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache store failed: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then the least recently used ones until under max_bytes."""
+        if self.ttl_seconds:
+            expired = conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            if expired:
+                self._bump(conn, 'expirations', expired)
+
+        if not self.max_bytes:
+            return
+
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+
+        if evicted:
+            self._bump(conn, 'evictions', evicted)
+
+    def acquire_lease(self, key: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Claims the right to compute a key, across every process using the cache.
+
+        Args:
+            key: Cache key about to be computed
+            owner: Identifier of the claiming process/thread
+            lease_seconds: How long the claim holds if never released
+
+        Returns:
+            True if the lease was acquired, False if someone else holds it
+        """
+        try:
+            conn = self._connection()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(f"DELETE FROM {self.table}_leases WHERE key = ? AND expires_at < ?", (key, now))
+                acquired = conn.execute(
+                    f"INSERT OR IGNORE INTO {self.table}_leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, owner, now + lease_seconds)
+                ).rowcount == 1
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return acquired
+        except sqlite3.Error as e:
+            # Without a working lock, let the caller compute on its own
+            logger.warning(f"LLM cache lease failed: {str(e)}")
+            return True
+
+    def release_lease(self, key: str, owner: str) -> None:
+        """Releases a lease taken with acquire_lease."""
+        try:
+            self._connection().execute(
+                f"DELETE FROM {self.table}_leases WHERE key = ? AND owner = ?", (key, owner)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache lease release failed: {str(e)}")
+
+    def wait_for_value(self, key: str, timeout: float, poll_interval: float = 0.1) -> Optional[str]:
+        """
+        Waits for another process holding the lease on key to store its result.
+
+        Args:
+            key: Cache key being computed elsewhere
+            timeout: Maximum wait in seconds
+            poll_interval: Delay between two checks
+
+        Returns:
+            The stored response, or None if the lease ended without a result
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            value = self.peek(key)
+            if value is not None:
+                return value
+            try:
+                held = self._connection().execute(
+                    f"SELECT 1 FROM {self.table}_leases WHERE key = ? AND expires_at >= ?", (key, time.time())
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+            if not held:
+                return self.peek(key)
+            time.sleep(poll_interval)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns host-wide cache statistics.
+
+        Returns:
+            Dictionary with hits, misses, hit_ratio, entries, bytes,
+            evictions and expirations
+        """
+        conn = self._connection()
+        self.flush_stats()
+        counters = dict(conn.execute(f"SELECT name, value FROM {self.table}_stats").fetchall())
+        entries, size = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "evictions": counters.get('evictions', 0),
+            "expirations": counters.get('expirations', 0)
+        }
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        conn = self._connection()
+        with self._pending_lock:
+            self._pending = {}
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.execute(f"DELETE FROM {self.table}_stats")
+        conn.execute(f"DELETE FROM {self.table}_leases")
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the shared response cache, or None when caching is disabled
+    with LLM_CACHE_ENABLED=false.
+    """
+    global _response_cache
+    if os.getenv('LLM_CACHE_ENABLED', 'True').lower() != 'true':
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                try:
+                    _response_cache = ResponseCache()
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"LLM cache unavailable, continuing without it: {str(e)}")
+                    return None
+    return _response_cache
+
+
+_bucket_cache = None
+_bucket_cache_lock = threading.Lock()
+
+
+def get_bucket_cache() -> Optional[ResponseCache]:
+    """
+    Returns the second-tier cache, keyed on caller-defined buckets (e.g. a test
+    type and its score vector) instead of the exact prompt text. It shares the
+    database file of the response cache but has its own table, TTL and stats.
+    """
+    global _bucket_cache
+    if os.getenv('LLM_CACHE_ENABLED', 'True').lower() != 'true':
+        return None
+    if _bucket_cache is None:
+        with _bucket_cache_lock:
+            if _bucket_cache is None:
+                try:
+                    _bucket_cache = ResponseCache(
+                        ttl_seconds=int(os.getenv('LLM_BUCKET_CACHE_TTL_SECONDS', DEFAULT_BUCKET_TTL_SECONDS)),
+                        table='bucket_responses'
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"LLM bucket cache unavailable, continuing without it: {str(e)}")
+                    return None
+    return _bucket_cache
@@ -0,0 +1,220 @@
+"""
+Record/replay of Bedrock calls, for reproducible performance tests.
+
+In record mode the connector's Bedrock client is wrapped so every
+InvokeModel and InvokeModelWithResponseStream call appends its request
+hash, response body and timing to a cassette file. In replay mode the
+client is replaced by one serving the cassette, either with the recorded
+latencies (and chunk timings for streams) or at full speed, so results
+pages and response parsers can be benchmarked without network access and
+compared across releases.
+
+Settings:
+    LLM_CASSETTE_MODE: "record", "replay" or unset (off)
+    LLM_CASSETTE_PATH: Cassette file (default .cache/llm_cassette.jsonl)
+    LLM_CASSETTE_TIMING: "recorded" (default) or "fast" when replaying
+
+Run with LLM_CACHE_ENABLED=False so every request reaches the cassette.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASSETTE_PATH = os.path.join('.cache', 'llm_cassette.jsonl')
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_hash(model_id: str, body: str) -> str:
+    """Identifies a request by its model and canonical JSON body."""
+    canonical = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{model_id}\n{canonical}".encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """
+    Append-only file of recorded interactions, one JSON object per line.
+
+    Each interaction holds the request hash, the model, the kind of call
+    ("invoke" or "stream") and either the response body with its latency or
+    the stream chunks with their offsets from the start of the call.
+    Repeated recordings of a request are replayed in turn.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._replayed: Dict[str, int] = defaultdict(int)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        interaction = json.loads(line)
+                        self._interactions[interaction['key']].append(interaction)
+
+    def __len__(self) -> int:
+        return sum(len(interactions) for interactions in self._interactions.values())
+
+    def append(self, interaction: Dict[str, Any]) -> None:
+        """Stores a new interaction on disk and in memory."""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(interaction, ensure_ascii=False) + '\n')
+            self._interactions[interaction['key']].append(interaction)
+
+    def next(self, key: str) -> Dict[str, Any]:
+        """The next recorded interaction for a request, cycling through repeats."""
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                raise CassetteMiss(f"Request {key[:12]} not found in cassette {self.path}")
+            index = self._replayed[key] % len(interactions)
+            self._replayed[key] += 1
+            return interactions[index]
+
+
+class _RecordedStream:
+    """Iterates the events of a live stream, recording their bytes and offsets."""
+
+    def __init__(self, body, on_complete, started: float):
+        self._body = body
+        self._on_complete = on_complete
+        self._started = started
+        self._chunks: List[List[Any]] = []
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for event in self._body:
+            chunk = event.get('chunk')
+            if chunk:
+                self._chunks.append([round(time.monotonic() - self._started, 4), chunk['bytes'].decode('utf-8')])
+            yield event
+        self._on_complete(self._chunks)
+
+    def close(self) -> None:
+        if hasattr(self._body, 'close'):
+            self._body.close()
+
+
+class RecordingClient:
+    """Wraps a Bedrock runtime client and records every model call to a cassette."""
+
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self._cassette = cassette
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        started = time.monotonic()
+        response = self._client.invoke_model(modelId=modelId, body=body, **kwargs)
+        payload = response['body'].read()
+        self._cassette.append({
+            "key": request_hash(modelId, body),
+            "model": modelId,
+            "kind": "invoke",
+            "latency": round(time.monotonic() - started, 4),
+            "body": payload.decode('utf-8')
+        })
+        return dict(response, body=io.BytesIO(payload))
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        started = time.monotonic()
+        response = self._client.invoke_model_with_response_stream(modelId=modelId, body=body, **kwargs)
+        key = request_hash(modelId, body)
+
+        def on_complete(chunks):
+            # Only complete streams are worth replaying; abandoned ones are dropped
+            self._cassette.append({"key": key, "model": modelId, "kind": "stream", "chunks": chunks})
+
+        return dict(response, body=_RecordedStream(response['body'], on_complete, started))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class ReplayClient:
+    """Serves model calls from a cassette, with the recorded timing unless fast is set."""
+
+    def __init__(self, cassette: Cassette, fast: bool = False):
+        self._cassette = cassette
+        self._fast = fast
+
+    def _sleep(self, seconds: float) -> None:
+        if not self._fast and seconds > 0:
+            time.sleep(seconds)
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        interaction = self._cassette.next(request_hash(modelId, body))
+        self._sleep(interaction.get('latency', 0.0))
+        return {"body": io.BytesIO(interaction['body'].encode('utf-8')), "contentType": "application/json"}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        interaction = self._cassette.next(request_hash(modelId, body))
+        return {"body": self._replay_chunks(interaction.get('chunks', [])), "contentType": "application/json"}
+
+    def _replay_chunks(self, chunks: List[List[Any]]) -> Iterator[Dict[str, Any]]:
+        started = time.monotonic()
+        for offset, data in chunks:
+            self._sleep(offset - (time.monotonic() - started))
+            yield {"chunk": {"bytes": data.encode('utf-8')}}
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def cassette_mode() -> Optional[str]:
+    """The configured mode (MODE_RECORD, MODE_REPLAY) or None when off."""
+    mode = os.getenv('LLM_CASSETTE_MODE', '').lower()
+    if mode in (MODE_RECORD, MODE_REPLAY):
+        return mode
+    if mode:
+        logger.warning(f"Ignoring unknown LLM_CASSETTE_MODE {mode!r}")
+    return None
+
+
+def get_cassette() -> Cassette:
+    """Returns the process-wide cassette, loaded on first use."""
+    global _cassette
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(os.getenv('LLM_CASSETTE_PATH', DEFAULT_CASSETTE_PATH))
+                logger.info(f"LLM cassette {_cassette.path}: {len(_cassette)} recorded calls")
+    return _cassette
+
+
+def wrap_client(client_factory) -> Any:
+    """
+    Applies the configured cassette mode to a Bedrock client.
+
+    Args:
+        client_factory: Creates the real client (not called when replaying)
+
+    Returns:
+        The real client, a RecordingClient around it, or a ReplayClient
+    """
+    mode = cassette_mode()
+    if mode == MODE_REPLAY:
+        fast = os.getenv('LLM_CASSETTE_TIMING', 'recorded').lower() == 'fast'
+        return ReplayClient(get_cassette(), fast=fast)
+    client = client_factory()
+    if mode == MODE_RECORD:
+        return RecordingClient(client, get_cassette())
+    return client
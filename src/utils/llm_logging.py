@@ -0,0 +1,73 @@
+"""
+Structured, lazily formatted logging for LLM calls.
+
+Every call logs one compact event with sizes, short hashes and timings
+instead of payloads and responses. Fields are only formatted when the
+logger is enabled. Full request and response bodies are captured for a
+configurable fraction of requests only, on a dedicated logger so they can
+be routed to a separate file.
+
+Settings:
+    LLM_LOG_FORMAT: "text" (event key=value ...) or "json" (one object per line)
+    LLM_LOG_BODY_SAMPLE_RATE: Fraction of requests whose full bodies are logged (default 0)
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any
+
+LOG_FORMAT = os.getenv('LLM_LOG_FORMAT', 'text').lower()
+BODY_SAMPLE_RATE = float(os.getenv('LLM_LOG_BODY_SAMPLE_RATE', '0'))
+
+body_logger = logging.getLogger('src.llm_connector.bodies')
+
+
+def short_hash(text: str) -> str:
+    """Returns a 12-character digest identifying a text without revealing it."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields: Any) -> None:
+    """
+    Logs one structured event. Nothing is formatted when the level is disabled.
+
+    Args:
+        logger: Logger of the calling module
+        event: Event name (e.g. "llm.response")
+        level: Logging level
+        **fields: Event fields; floats are rounded to the millisecond
+    """
+    if not logger.isEnabledFor(level):
+        return
+    fields = {name: round(value, 3) if isinstance(value, float) else value for name, value in fields.items()}
+    if LOG_FORMAT == 'json':
+        logger.log(level, json.dumps(dict(event=event, **fields), ensure_ascii=False, default=str))
+    else:
+        logger.log(level, "%s %s", event, " ".join(f"{name}={value}" for name, value in fields.items()))
+
+
+def body_sampled(request_key: str) -> bool:
+    """
+    Decides whether the bodies of a request are captured.
+
+    The decision is derived from the request key, so the request and its
+    response are captured together and retries of the same request agree.
+    """
+    if BODY_SAMPLE_RATE <= 0 or not body_logger.isEnabledFor(logging.INFO):
+        return False
+    return int(request_key[:8], 16) / 0xFFFFFFFF < BODY_SAMPLE_RATE
+
+
+def log_body(request_key: str, kind: str, body: Any) -> None:
+    """
+    Logs a full request or response body if the request is sampled.
+
+    Args:
+        request_key: Cache key of the request (hex digest)
+        kind: "request" or "response"
+        body: JSON-serialisable body
+    """
+    if body_sampled(request_key):
+        body_logger.info("%s %s %s", kind, request_key[:12], json.dumps(body, ensure_ascii=False, default=str))
@@ -0,0 +1,320 @@
+"""
+Telemetry for LLM calls.
+
+The connector records one CallRecord per call: caller, model, cache tier,
+outcome, queue time, time to first byte, total latency and token counts.
+Records are aggregated per (caller, model) into HDR-style histograms
+(logarithmic buckets with a bounded relative error, so memory stays
+constant however many calls are recorded) and token and cost totals.
+
+Rendered prompts (src/utils/prompt_templates.py) report their estimated
+input tokens per template, so prompt size is tracked alongside latency.
+
+The aggregate is exposed as JSON, optionally through a local HTTP endpoint
+(LLM_METRICS_PORT, GET /metrics) and/or a file rewritten periodically
+(LLM_METRICS_FILE, every LLM_METRICS_FLUSH_SECONDS).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from src.utils.model_router import MODEL_PROFILES
+
+logger = logging.getLogger(__name__)
+
+# Sub-buckets per power of two: values are kept within 1/SUB_BUCKETS of their true value
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations, recorded with microsecond resolution.
+
+    Bucket boundaries grow geometrically (SUB_BUCKETS linear buckets per
+    power of two), so a 50 ms and a 50 s latency are both known to ~3%.
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def _index(micros: int) -> int:
+        exponent = max(0, micros.bit_length() - SUB_BUCKET_BITS)
+        return (exponent << SUB_BUCKET_BITS) + (micros >> exponent)
+
+    @staticmethod
+    def _value(index: int) -> float:
+        """Midpoint of a bucket, in seconds."""
+        exponent = index >> SUB_BUCKET_BITS
+        mantissa = index & (SUB_BUCKETS - 1) if exponent else index
+        low = mantissa << exponent
+        high = ((mantissa + 1) << exponent) - 1
+        return (low + high) / 2 / 1e6
+
+    def record(self, seconds: float) -> None:
+        """Adds one duration."""
+        seconds = max(0.0, seconds)
+        self.counts[self._index(int(seconds * 1e6))] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated quantile in seconds, or None if empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean, p50/p90/p95/p99 and max, in seconds."""
+        if not self.count:
+            return {"count": 0}
+        summary = {"count": self.count, "mean": round(self.total / self.count, 4), "max": round(self.max, 4)}
+        for q in (0.5, 0.9, 0.95, 0.99):
+            summary[f"p{int(q * 100)}"] = round(self.quantile(q), 4)
+        return summary
+
+
+class CallRecord:
+    """
+    Telemetry of one call, filled in as the call progresses.
+
+    tier is where the answer came from: "bucket", "exact" or "precomputed"
+    (cache tiers), "joined" (another caller's identical request), "miss"
+    (a Bedrock call) or "mock". outcome is "ok" or the error class name.
+    """
+
+    def __init__(self, caller: str, model: str, stream: bool = False):
+        self.caller = caller or "unknown"
+        self.model = model
+        self.stream = stream
+        self.started = time.monotonic()
+        self.tier = "joined"
+        self.outcome = "ok"
+        self.queue_seconds: Optional[float] = None
+        self.first_byte_seconds: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        # A Bedrock call may finish after its caller gave up (deadline), so the
+        # caller's view and the usage are aggregated whenever each is ready
+        self.recorded = False
+        self.usage_ready = False
+
+
+class _Series:
+    """Aggregate of the calls of one (caller, model) pair."""
+
+    def __init__(self):
+        self.calls = 0
+        self.tiers: Counter = Counter()
+        self.outcomes: Counter = Counter()
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.total = LatencyHistogram()
+        self.first_byte = LatencyHistogram()
+        self.queue = LatencyHistogram()
+
+
+class _PromptSeries:
+    """Estimated sizes of the prompts rendered from one template."""
+
+    def __init__(self):
+        self.renders = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+
+
+class LLMMetrics:
+    """Thread-safe registry of call telemetry."""
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._prompts: Dict[str, _PromptSeries] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, call: CallRecord) -> None:
+        """Adds a call, as seen by its caller, to the aggregates."""
+        if call.total_seconds is None:
+            call.total_seconds = time.monotonic() - call.started
+        with self._lock:
+            series = self._series.setdefault((call.caller, call.model), _Series())
+            series.calls += 1
+            series.tiers[call.tier] += 1
+            series.outcomes[call.outcome] += 1
+            series.total.record(call.total_seconds)
+            call.recorded = True
+            if call.usage_ready:
+                self._add_usage(series, call)
+
+    def record_usage(self, call: CallRecord) -> None:
+        """Adds the queue time, time to first byte and tokens of a completed Bedrock call."""
+        with self._lock:
+            call.usage_ready = True
+            if call.recorded:
+                self._add_usage(self._series[(call.caller, call.model)], call)
+
+    @staticmethod
+    def _add_usage(series: _Series, call: CallRecord) -> None:
+        """Aggregate the Bedrock usage of a call (caller holds the lock)."""
+        profile = MODEL_PROFILES.get(call.model, {})
+        series.input_tokens += call.input_tokens
+        series.output_tokens += call.output_tokens
+        series.cost_usd += (call.input_tokens * profile.get("input_cost", 0.0)
+                            + call.output_tokens * profile.get("output_cost", 0.0)) / 1000
+        if call.first_byte_seconds is not None:
+            series.first_byte.record(call.first_byte_seconds)
+        if call.queue_seconds is not None:
+            series.queue.record(call.queue_seconds)
+
+    def record_prompt(self, template: str, estimated_tokens: int) -> None:
+        """Adds the estimated input tokens of a rendered prompt."""
+        with self._lock:
+            prompts = self._prompts.setdefault(template, _PromptSeries())
+            prompts.renders += 1
+            prompts.total_tokens += estimated_tokens
+            prompts.max_tokens = max(prompts.max_tokens, estimated_tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the aggregates as a JSON-serialisable dictionary."""
+        with self._lock:
+            series = [
+                {
+                    "caller": caller,
+                    "model": model,
+                    "calls": data.calls,
+                    "tiers": dict(data.tiers),
+                    "cache_hit_ratio": round(
+                        sum(data.tiers[tier] for tier in ("bucket", "exact", "precomputed")) / data.calls, 4
+                    ),
+                    "outcomes": dict(data.outcomes),
+                    "input_tokens": data.input_tokens,
+                    "output_tokens": data.output_tokens,
+                    "cost_usd": round(data.cost_usd, 6),
+                    "latency": data.total.summary(),
+                    "first_byte": data.first_byte.summary(),
+                    "queue": data.queue.summary()
+                }
+                for (caller, model), data in sorted(self._series.items())
+            ]
+            prompts = [
+                {
+                    "template": template,
+                    "renders": data.renders,
+                    "mean_tokens": round(data.total_tokens / data.renders, 1),
+                    "max_tokens": data.max_tokens
+                }
+                for template, data in sorted(self._prompts.items())
+            ]
+        return {"started_at": self.started_at, "generated_at": time.time(), "series": series, "prompts": prompts}
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics as JSON."""
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = json.dumps(get_llm_metrics().snapshot(), ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serves the metrics on http://host:port/metrics from a background thread.
+
+    Returns:
+        The server, or None if the port is unavailable (e.g. taken by another worker)
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"LLM metrics endpoint not started on port {port}: {str(e)}")
+        return None
+    threading.Thread(target=server.serve_forever, name="llm-metrics-http", daemon=True).start()
+    return server
+
+
+def flush_metrics(path: str) -> None:
+    """Writes the current metrics to a JSON file atomically."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(get_llm_metrics().snapshot(), f, ensure_ascii=False, indent=2)
+    os.replace(temporary, path)
+
+
+def start_metrics_flusher(path: str, interval: float) -> threading.Thread:
+    """Rewrites the metrics file every interval seconds from a background thread."""
+    def flush_forever():
+        while True:
+            time.sleep(interval)
+            try:
+                flush_metrics(path)
+            except OSError as e:
+                logger.warning(f"Could not write LLM metrics to {path}: {str(e)}")
+
+    thread = threading.Thread(target=flush_forever, name="llm-metrics-flush", daemon=True)
+    thread.start()
+    return thread
+
+
+_metrics: Optional[LLMMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """
+    Returns the process-wide metrics registry, starting the endpoint and the
+    file flusher on first use when LLM_METRICS_PORT / LLM_METRICS_FILE are set.
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = LLMMetrics()
+                port = os.getenv('LLM_METRICS_PORT')
+                if port:
+                    start_metrics_server(int(port))
+                path = os.getenv('LLM_METRICS_FILE')
+                if path:
+                    start_metrics_flusher(path, float(os.getenv('LLM_METRICS_FLUSH_SECONDS', '60')))
+    return _metrics
+
+
+def record_call(call: CallRecord) -> None:
+    """Adds a finished call to the process-wide metrics."""
+    get_llm_metrics().record(call)
+
+
+def record_usage(call: CallRecord) -> None:
+    """Adds the Bedrock usage of a call to the process-wide metrics."""
+    get_llm_metrics().record_usage(call)
@@ -0,0 +1,162 @@
+"""
+Concurrent orchestration of LLM calls.
+
+Results pages need several independent Bedrock calls (analysis, solution,
+activity selection). This module runs them on a shared thread pool so a
+page pays the latency of the slowest call instead of the sum of all of them,
+and joins them under a single deadline.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv('LLM_PAGE_DEADLINE_SECONDS', '60'))
+
+# Time a results page may wait for its LLM answers before showing the
+# cached or rule-based ones (override with LLM_BUDGET_SECONDS_<PAGE>)
+PAGE_LATENCY_BUDGETS = {
+    'resultats_dyscalculie': 6.0,
+    'resultats_tdah': 6.0,
+    'resultats_dyslexie': 4.0,
+    'resultats_dysgraphie': 4.0
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide executor used for LLM calls."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('LLM_EXECUTOR_WORKERS', '16')),
+                    thread_name_prefix='llm'
+                )
+    return _executor
+
+
+def latency_budget(page: str) -> float:
+    """
+    Returns the latency budget of a page in seconds.
+
+    Args:
+        page: Page name as used by the router (e.g. 'resultats_tdah')
+
+    Returns:
+        The budget from the environment, PAGE_LATENCY_BUDGETS, or DEFAULT_DEADLINE_SECONDS
+    """
+    override = os.getenv(f'LLM_BUDGET_SECONDS_{page.upper()}')
+    if override:
+        return float(override)
+    return PAGE_LATENCY_BUDGETS.get(page, DEFAULT_DEADLINE_SECONDS)
+
+
+def submit_llm_call(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """
+    Runs an LLM-backed function in the background.
+
+    The function must not use Streamlit: worker threads have no script
+    run context.
+
+    Returns:
+        Future holding the function result
+    """
+    return get_executor().submit(fn, *args, **kwargs)
+
+
+def wait_for(future: Optional[Future], timeout: float = None, default: Any = None) -> Any:
+    """
+    Waits for a background call started with submit_llm_call.
+
+    Args:
+        future: Future to wait for (None returns default)
+        timeout: Maximum wait in seconds, defaults to DEFAULT_DEADLINE_SECONDS
+        default: Value returned on failure or timeout
+
+    Returns:
+        The call result, or default
+    """
+    if future is None:
+        return default
+    if timeout is None:
+        timeout = DEFAULT_DEADLINE_SECONDS
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning("Background LLM call missed its deadline")
+        return default
+    except Exception as e:
+        logger.error(f"Background LLM call failed: {str(e)}")
+        return default
+
+
+class LLMCallGroup:
+    """
+    A set of concurrent LLM calls sharing one deadline.
+
+    Calls start as soon as they are submitted. Results are collected with
+    result(), which waits at most for what is left of the deadline and
+    returns the given default if the call failed or did not finish in time.
+    """
+
+    def __init__(self, deadline_seconds: float = None):
+        """
+        Args:
+            deadline_seconds: Time budget shared by every call in the group
+        """
+        if deadline_seconds is None:
+            deadline_seconds = DEFAULT_DEADLINE_SECONDS
+        self.deadline = time.monotonic() + deadline_seconds
+        self.futures: Dict[str, Future] = {}
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Start a named call in the background."""
+        future = submit_llm_call(fn, *args, **kwargs)
+        self.futures[name] = future
+        return future
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline."""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def result(self, name: str, default: Any = None) -> Any:
+        """
+        Waits for a named call within the group deadline.
+
+        Args:
+            name: Name given to submit()
+            default: Value returned on failure or timeout
+
+        Returns:
+            The call result, or default
+        """
+        future = self.futures.get(name)
+        if future is None:
+            return default
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeoutError:
+            logger.warning(f"LLM call '{name}' missed its deadline")
+            return default
+        except Exception as e:
+            logger.error(f"LLM call '{name}' failed: {str(e)}")
+            return default
+
+    def results(self, defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Collects every call of the group, see result()."""
+        defaults = defaults or {}
+        return {name: self.result(name, defaults.get(name)) for name in self.futures}
+
+    def pending(self) -> Dict[str, Future]:
+        """Calls still running, e.g. after the deadline expired."""
+        return {name: future for name, future in self.futures.items() if not future.done()}
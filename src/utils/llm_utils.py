@@ -1,262 +1,344 @@
 # File path: src/utils/llm_utils.py
+import copy
+import hashlib
+import json
 import logging
-from src.llm_connector import get_llm_connector
+from src.llm_connector import LLMDeadlineExceeded, get_llm_connector
+from src.utils.admission import PRIORITY_INTERACTIVE, PRIORITY_PREFETCH, PriorityTicket
+from src.utils.llm_metrics import CallRecord, record_call
+from src.utils.model_router import TASK_GENERATION
+from src.utils.prompt_templates import register_template
+from src.utils.llm_orchestrator import submit_llm_call
+from src.utils.recommendation_nlg import compose_recommendations
+from src.utils.recommendation_table import lookup_precomputed
+from src.utils.score_utils import DYSCALCULIE_CORRECT_ANSWERS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def generate_dyscalculie_recommendations(test_summary, total_score, max_score):
+# Notes up to this length (e.g. "RAS", "ok") don't change the recommendation
+UNIMPORTANT_NOTES_MAX_CHARS = 20
+
+# Shared prompt of the recommendation engine. The disorder-specific wording
+# comes from each RecommendationSpec and is substituted at registration; the
+# instructions come first and the child's results last, so the provider can
+# cache the shared prefix (see LLMConnector._construct_payload)
+RECOMMENDATIONS_PROMPT_TEXT = """
+    Tu es un expert en troubles d'apprentissage, spécialisé dans {specialty}. Un enfant vient de passer un test de dépistage {screening}. Ses résultats sont donnés à la fin.
+    
+    Génère des recommandations personnalisées pour aider cet enfant à {goal}. Inclus:
+    1. Une évaluation du risque de {label} (faible, modéré, élevé)
+    2. {activities}
+    3. Des conseils pour les parents et enseignants
+    4. {strategies}
+    
+    Formaté en HTML simple avec des titres, paragraphes et listes.
+    
+    Résultats du test:
+    
+    {test_summary}
+    
+    Score total: {total_score}/{max_score}
     """
-    Generate personalized recommendations for dyscalculia based on test results.
+
+RECOMMENDATIONS_SYSTEM_PROMPT = "Tu es un pédagogue spécialisé dans l'évaluation des enfants ayant des {focus}. Tu donnes des analyses bienveillantes, positives et encourageantes."
+
+class RecommendationSpec:
+    """
+    Declarative description of the recommendations of one test type.
     
-    Args:
-        test_summary (str): Summary of test results
-        total_score (int): Total score obtained
-        max_score (int): Maximum possible score
-        
-    Returns:
-        str: Personalized recommendations
+    Everything that differs between disorders lives here: the prompt
+    wording, the display names of the sub-tests, where the detailed results
+    are found in the responses, the risk thresholds and the generic advice.
+    The engine (generate_recommendations) is shared.
     """
-    # Get the LLM connector
-    llm_connector = get_llm_connector()
     
-    try:
-        prompt = f"""
-        Tu es un expert en troubles d'apprentissage, spécialisé dans la dyscalculie. Un enfant vient de passer un test de dépistage de la dyscalculie avec les résultats suivants:
-        
-        {test_summary}
-        
-        Score total: {total_score}/{max_score}
-        
-        Génère des recommandations personnalisées pour aider cet enfant à améliorer ses compétences mathématiques. Inclus:
-        1. Une évaluation du risque de dyscalculie (faible, modéré, élevé)
-        2. Des activités spécifiques adaptées à ses difficultés
-        3. Des conseils pour les parents et enseignants
-        4. Des stratégies d'apprentissage adaptées
-        
-        Formaté en HTML simple avec des titres, paragraphes et listes.
+    def __init__(self, test_type, label, prompt, focus, categories, risk_thresholds, advice, specialist,
+                 results_key='detailed_results', results=None):
         """
-        
-        # System prompt for the model
-        system_prompt = "Tu es un pédagogue spécialisé dans l'évaluation des enfants ayant des troubles d'apprentissage. Tu donnes des analyses bienveillantes, positives et encourageantes."
-        
-        # Call the LLM model
-        recommendations = llm_connector.generate_response(
-            prompt=prompt,
-            system_prompt=system_prompt,
-            max_tokens=800,
-            temperature=0.7
-        )
-        
-        # Check that the response is not None or empty
-        if recommendations is None or recommendations.strip() == "":
-            logger.error("The LLM response is empty or None!")
-            return "Je n'ai pas pu générer des recommandations. Veuillez réessayer plus tard."
-        
-        return recommendations
-        
-    except Exception as e:
-        logger.error(f"Error generating dyscalculie recommendations: {str(e)}")
-        
-        # Fallback recommendations if LLM fails
-        risk_level = "élevé" if total_score / max_score < 0.5 else "modéré" if total_score / max_score < 0.8 else "faible"
-        
-        fallback = f"""
-        <h3>Évaluation du risque de dyscalculie: {risk_level}</h3>
-        <p>Basé sur les résultats du test, voici quelques recommandations:</p>
-        <ul>
-            <li>Pratiquer régulièrement des activités avec les nombres</li>
-            <li>Utiliser des supports visuels et manipulatifs</li>
-            <li>Décomposer les problèmes mathématiques en étapes plus simples</li>
-            <li>Renforcer les concepts de base avant de passer à des concepts plus avancés</li>
-        </ul>
-        <p>Si les difficultés persistent, une consultation avec un professionnel spécialisé est recommandée.</p>
+        Args:
+            test_type (str): Type of test (dyscalculie, tdah, dyslexie, dysgraphie)
+            label (str): Name of the disorder shown to the user (e.g. "TDAH")
+            prompt (dict): Wording substituted in the shared prompt: specialty,
+                screening, goal, activities and strategies
+            focus (str): Difficulties the system prompt's pedagogue specialises in
+            categories (dict): Display names of the sub-tests, by key
+            risk_thresholds (tuple): Score ratios (high, moderate) below which the
+                risk is "élevé" and "modéré"
+            advice (list): Generic recommendations completing the local fallback
+            specialist (str): Professional suggested when difficulties persist
+            results_key (str): Responses key holding the detailed results
+            results (callable): Optional function building the detailed results
+                from the responses, for tests recording raw answers
         """
-        
-        return fallback
+        self.test_type = test_type
+        self.label = label
+        self.categories = categories
+        self.risk_thresholds = risk_thresholds
+        self.advice = advice
+        self.specialist = specialist
+        self.results_key = results_key
+        self.results = results
+        self.template = register_template(
+            f"recommendations.{test_type}",
+            RECOMMENDATIONS_PROMPT_TEXT,
+            system=RECOMMENDATIONS_SYSTEM_PROMPT.format(focus=focus),
+            static=dict(prompt, label=label)
+        )
+    
+    def detailed_results(self, responses):
+        """Per-category results (score, max, notes) of the test responses."""
+        if self.results is not None:
+            return self.results(responses)
+        return responses.get(self.results_key, {})
+    
+    def risk_level(self, total_score, max_score):
+        """Rule-based risk level of a total score."""
+        ratio = total_score / max_score if max_score else 1.0
+        high, moderate = self.risk_thresholds
+        return "élevé" if ratio < high else "modéré" if ratio < moderate else "faible"
+
+# Recommendation spec of each test type handled by analyze_results_with_ai
+RECOMMENDATION_SPECS = {}
+
+def register_recommendation_spec(spec):
+    """
+    Adds a test type to the recommendation engine.
+    
+    Returns:
+        RecommendationSpec: The spec, so modules can keep a direct reference
+    """
+    RECOMMENDATION_SPECS[spec.test_type] = spec
+    return spec
 
-def generate_tdah_recommendations(test_summary, total_score, max_score):
+def age_band(age):
     """
-    Generate personalized recommendations for ADHD based on test results.
+    Group an age into the bands used by the score-bucket cache.
     
     Args:
-        test_summary (str): Summary of test results
-        total_score (int): Total score obtained
-        max_score (int): Maximum possible score
+        age: Age of the child (int, str or None)
         
     Returns:
-        str: Personalized recommendations
+        str: Age band label
     """
-    # Get the LLM connector
-    llm_connector = get_llm_connector()
-    
     try:
-        prompt = f"""
-        Tu es un expert en troubles d'apprentissage, spécialisé dans le TDAH. Un enfant vient de passer un test de dépistage du TDAH avec les résultats suivants:
-        
-        {test_summary}
-        
-        Score total: {total_score}/{max_score}
-        
-        Génère des recommandations personnalisées pour aider cet enfant à améliorer son attention et sa concentration. Inclus:
-        1. Une évaluation du risque de TDAH (faible, modéré, élevé)
-        2. Des stratégies spécifiques adaptées à ses difficultés
-        3. Des conseils pour les parents et enseignants
-        4. Des techniques d'organisation et de gestion du temps
-        
-        Formaté en HTML simple avec des titres, paragraphes et listes.
-        """
-        
-        # System prompt for the model
-        system_prompt = "Tu es un pédagogue spécialisé dans l'évaluation des enfants ayant des troubles d'attention. Tu donnes des analyses bienveillantes, positives et encourageantes."
-        
-        # Call the LLM model
-        recommendations = llm_connector.generate_response(
-            prompt=prompt,
-            system_prompt=system_prompt,
-            max_tokens=800,
-            temperature=0.7
-        )
-        
-        # Check that the response is not None or empty
-        if recommendations is None or recommendations.strip() == "":
-            logger.error("The LLM response is empty or None!")
-            return "Je n'ai pas pu générer des recommandations. Veuillez réessayer plus tard."
-        
-        return recommendations
-        
-    except Exception as e:
-        logger.error(f"Error generating TDAH recommendations: {str(e)}")
-        
-        # Fallback recommendations if LLM fails
-        risk_level = "élevé" if total_score / max_score > 0.7 else "modéré" if total_score / max_score > 0.4 else "faible"
-        
-        fallback = f"""
-        <h3>Évaluation du risque de TDAH: {risk_level}</h3>
-        <p>Basé sur les résultats du test, voici quelques recommandations:</p>
-        <ul>
-            <li>Créer un environnement de travail avec peu de distractions</li>
-            <li>Établir des routines claires et prévisibles</li>
-            <li>Diviser les tâches en étapes plus petites et gérable</li>
-            <li>Utiliser des outils visuels comme des minuteurs et des listes</li>
-        </ul>
-        <p>Si les difficultés persistent, une consultation avec un professionnel spécialisé est recommandée.</p>
-        """
-        
-        return fallback
+        age = int(age)
+    except (TypeError, ValueError):
+        return "unknown"
+    
+    if age <= 6:
+        return "6-"
+    elif age <= 8:
+        return "7-8"
+    elif age <= 10:
+        return "9-10"
+    elif age <= 13:
+        return "11-13"
+    return "14+"
 
-def generate_dyslexie_recommendations(test_summary, total_score, max_score):
+def score_bucket_key(test_type, detailed_results, age=None, model_id=None):
     """
-    Generate personalized recommendations for dyslexia based on test results.
+    Build the score-bucket cache key shared by every child with the same
+    per-category scores and age band. Like the exact-request key, it also
+    covers the model and the prompt template version, so a routing change or
+    a template edit does not keep serving answers of the old model or wording.
     
     Args:
-        test_summary (str): Summary of test results
-        total_score (int): Total score obtained
-        max_score (int): Maximum possible score
+        test_type (str): Type of test (dyscalculie, tdah, dyslexie, dysgraphie)
+        detailed_results (dict): Per-category results with score, max and notes
+        age: Age of the child
+        model_id (str): Model answering the request
         
     Returns:
-        str: Personalized recommendations
+        str: Cache key, or None when the notes are specific enough to matter
     """
-    # Get the LLM connector
-    llm_connector = get_llm_connector()
+    for test_data in detailed_results.values():
+        if len(str(test_data.get('notes') or '').strip()) > UNIMPORTANT_NOTES_MAX_CHARS:
+            return None
     
-    try:
-        prompt = f"""
-        Tu es un expert en troubles d'apprentissage, spécialisé dans la dyslexie. Un enfant vient de passer un test de dépistage de la dyslexie avec les résultats suivants:
-        
-        {test_summary}
-        
-        Score total: {total_score}/{max_score}
-        
-        Génère des recommandations personnalisées pour aider cet enfant à améliorer ses compétences en lecture. Inclus:
-        1. Une évaluation du risque de dyslexie (faible, modéré, élevé)
-        2. Des activités spécifiques pour renforcer la conscience phonologique
-        3. Des conseils pour les parents et enseignants
-        4. Des stratégies de lecture et d'apprentissage adaptées
-        
-        Formaté en HTML simple avec des titres, paragraphes et listes.
-        """
-        
-        # System prompt for the model
-        system_prompt = "Tu es un pédagogue spécialisé dans l'évaluation des enfants ayant des troubles de lecture. Tu donnes des analyses bienveillantes, positives et encourageantes."
-        
-        # Call the LLM model
-        recommendations = llm_connector.generate_response(
-            prompt=prompt,
-            system_prompt=system_prompt,
-            max_tokens=800,
-            temperature=0.7
-        )
-        
-        # Check that the response is not None or empty
-        if recommendations is None or recommendations.strip() == "":
-            logger.error("The LLM response is empty or None!")
-            return "Je n'ai pas pu générer des recommandations. Veuillez réessayer plus tard."
-        
-        return recommendations
-        
-    except Exception as e:
-        logger.error(f"Error generating dyslexie recommendations: {str(e)}")
-        
-        # Fallback recommendations if LLM fails
-        risk_level = "élevé" if total_score / max_score < 0.3 else "modéré" if total_score / max_score < 0.7 else "faible"
-        
-        fallback = f"""
-        <h3>Évaluation du risque de dyslexie: {risk_level}</h3>
-        <p>Basé sur les résultats du test, voici quelques recommandations:</p>
-        <ul>
-            <li>Pratiquer régulièrement des exercices de conscience phonologique</li>
-            <li>Utiliser des approches multisensorielles pour l'apprentissage de la lecture</li>
-            <li>Lire à haute voix avec un adulte 10-15 minutes par jour</li>
-            <li>Utiliser des outils visuels et des supports adaptés</li>
-        </ul>
-        <p>Si les difficultés persistent, une consultation avec un orthophoniste est recommandée.</p>
-        """
+    scores = [
+        [test_key, test_data.get('score', 0), test_data.get('max', 0)]
+        for test_key, test_data in sorted(detailed_results.items())
+    ]
+    template_version = RECOMMENDATION_SPECS[test_type].template.version
+    material = json.dumps([test_type, scores, age_band(age), model_id, template_version])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def dyscalculie_detailed_results(responses):
+    """
+    Per-question results of the dyscalculia test, which records raw answers.
+    
+    Args:
+        responses (dict): Test responses with the answers q1-q4
         
-        return fallback
+    Returns:
+        dict: One result (score 0 or 1, max 1) per answered question
+    """
+    return {
+        question: {"score": int(str(responses[question]) == str(expected)), "max": 1, "notes": ""}
+        for question, expected in DYSCALCULIE_CORRECT_ANSWERS.items()
+        if question in responses
+    }
+
+register_recommendation_spec(RecommendationSpec(
+    "dyscalculie",
+    label="dyscalculie",
+    prompt={
+        "specialty": "la dyscalculie",
+        "screening": "de la dyscalculie",
+        "goal": "améliorer ses compétences mathématiques",
+        "activities": "Des activités spécifiques adaptées à ses difficultés",
+        "strategies": "Des stratégies d'apprentissage adaptées"
+    },
+    focus="troubles d'apprentissage",
+    categories={
+        "q1": "Addition (5 + 3)",
+        "q2": "Soustraction (10 - 4)",
+        "q3": "Suite logique (2, 4, 6, 8, ...)",
+        "q4": "Comparaison de poids"
+    },
+    risk_thresholds=(0.5, 0.8),
+    advice=[
+        "Pratiquer régulièrement des activités avec les nombres",
+        "Utiliser des supports visuels et manipulatifs",
+        "Décomposer les problèmes mathématiques en étapes plus simples",
+        "Renforcer les concepts de base avant de passer à des concepts plus avancés"
+    ],
+    specialist="un professionnel spécialisé",
+    results=dyscalculie_detailed_results
+))
+
+register_recommendation_spec(RecommendationSpec(
+    "tdah",
+    label="TDAH",
+    prompt={
+        "specialty": "le TDAH",
+        "screening": "du TDAH",
+        "goal": "améliorer son attention et sa concentration",
+        "activities": "Des stratégies spécifiques adaptées à ses difficultés",
+        "strategies": "Des techniques d'organisation et de gestion du temps"
+    },
+    focus="troubles d'attention",
+    categories={
+        "memorisation": "Mémorisation",
+        "attention": "Attention Soutenue",
+        "impulsivite": "Contrôle de l'Impulsivité",
+        "memoire": "Mémoire de Travail",
+        "organisation": "Organisation",
+        "flexibilite": "Flexibilité Cognitive"
+    },
+    risk_thresholds=(0.3, 0.6),
+    advice=[
+        "Créer un environnement de travail avec peu de distractions",
+        "Établir des routines claires et prévisibles",
+        "Diviser les tâches en étapes plus petites et gérables",
+        "Utiliser des outils visuels comme des minuteurs et des listes"
+    ],
+    specialist="un professionnel spécialisé"
+))
+
+register_recommendation_spec(RecommendationSpec(
+    "dyslexie",
+    label="dyslexie",
+    prompt={
+        "specialty": "la dyslexie",
+        "screening": "de la dyslexie",
+        "goal": "améliorer ses compétences en lecture",
+        "activities": "Des activités spécifiques pour renforcer la conscience phonologique",
+        "strategies": "Des stratégies de lecture et d'apprentissage adaptées"
+    },
+    focus="troubles de lecture",
+    categories={
+        "denomination_rapide": "Dénomination Rapide",
+        "pseudo_mots": "Décodage Pseudo-Mots",
+        "suppression_phonemique": "Suppression Phonémique",
+        "fluidite_lecture": "Fluidité de Lecture",
+        "memoire_sons": "Mémoire des Sons",
+        "confusion_lettres": "Confusion de Lettres"
+    },
+    risk_thresholds=(0.3, 0.7),
+    advice=[
+        "Pratiquer régulièrement des exercices de conscience phonologique",
+        "Utiliser des approches multisensorielles pour l'apprentissage de la lecture",
+        "Lire à haute voix avec un adulte 10-15 minutes par jour",
+        "Utiliser des outils visuels et des supports adaptés"
+    ],
+    specialist="un orthophoniste",
+    results_key='dyslexie_detailed_results'
+))
+
+register_recommendation_spec(RecommendationSpec(
+    "dysgraphie",
+    label="dysgraphie",
+    prompt={
+        "specialty": "la dysgraphie",
+        "screening": "de la dysgraphie",
+        "goal": "améliorer ses compétences en écriture",
+        "activities": "Des activités spécifiques adaptées à ses difficultés en motricité fine",
+        "strategies": "Des stratégies d'apprentissage adaptées"
+    },
+    focus="troubles d'écriture",
+    categories={
+        "copie_texte": "Copie de Texte",
+        "ecriture_spontanee": "Écriture Spontanée",
+        "vitesse_endurance": "Vitesse et Endurance",
+        "graphisme_coordination": "Graphisme et Coordination Fine",
+        "lisibilite_orthographe": "Lisibilité et Orthographe"
+    },
+    risk_thresholds=(0.5, 0.8),
+    advice=[
+        "Pratiquer régulièrement des activités de motricité fine",
+        "Utiliser des supports adaptés pour l'écriture (papier quadrillé, guide-doigts)",
+        "Encourager les activités multisensorielles pour renforcer la mémoire motrice",
+        "Proposer des exercices ludiques pour améliorer la coordination main-œil"
+    ],
+    specialist="un ergothérapeute"
+))
 
-def generate_dysgraphie_recommendations(test_summary, total_score, max_score):
+def generate_recommendations(test_type, detailed_results, bucket_key=None, timeout=None,
+                             priority=PRIORITY_INTERACTIVE, age=None, classe=None, llm_connector=None):
     """
-    Generate personalized recommendations for dysgraphie based on test results.
+    Generate personalized recommendations for a test type based on its results.
+    
+    When the LLM fails, misses its deadline or is shed, the recommendations
+    are composed locally from the phrase bank (see src/utils/recommendation_nlg.py).
     
     Args:
-        test_summary (str): Summary of test results
-        total_score (int): Total score obtained
-        max_score (int): Maximum possible score
+        test_type (str): Type of test, a key of RECOMMENDATION_SPECS
+        detailed_results (dict): Per-category results with score, max and notes
+        bucket_key (str): Optional score-bucket cache key (see score_bucket_key),
+            built for the model of llm_connector
+        timeout (float): Optional latency budget in seconds; past it the fallback is returned
+        priority (int): Admission priority of the LLM call (see src/utils/admission.py)
+        age: Age of the child, for the local fallback
+        classe (str): Class of the child, for the local fallback
+        llm_connector: Connector to call, defaults to the model routed for generation
         
     Returns:
         str: Personalized recommendations
     """
+    spec = RECOMMENDATION_SPECS[test_type]
+    test_summary, total_score, max_score = summarize_results(test_type, detailed_results)
+    
     # Get the LLM connector
-    llm_connector = get_llm_connector()
+    if llm_connector is None:
+        llm_connector = get_llm_connector(task=TASK_GENERATION)
     
     try:
-        prompt = f"""
-        Tu es un expert en troubles d'apprentissage, spécialisé dans la dysgraphie. Un enfant vient de passer un test de dépistage de la dysgraphie avec les résultats suivants:
-        
-        {test_summary}
-        
-        Score total: {total_score}/{max_score}
-        
-        Génère des recommandations personnalisées pour aider cet enfant à améliorer ses compétences en écriture. Inclus:
-        1. Une évaluation du risque de dysgraphie (faible, modéré, élevé)
-        2. Des activités spécifiques adaptées à ses difficultés en motricité fine
-        3. Des conseils pour les parents et enseignants
-        4. Des stratégies d'apprentissage adaptées
-        
-        Formaté en HTML simple avec des titres, paragraphes et listes.
-        """
-        
-        # System prompt for the model
-        system_prompt = "Tu es un pédagogue spécialisé dans l'évaluation des enfants ayant des troubles d'écriture. Tu donnes des analyses bienveillantes, positives et encourageantes."
+        template = spec.template
+        prompt = template.render(test_summary=test_summary, total_score=total_score, max_score=max_score)
         
         # Call the LLM model
         recommendations = llm_connector.generate_response(
             prompt=prompt,
-            system_prompt=system_prompt,
+            system_prompt=template.system,
             max_tokens=800,
-            temperature=0.7
+            temperature=0.7,
+            bucket_key=bucket_key,
+            timeout=timeout,
+            priority=priority,
+            caller=template.name
         )
         
         # Check that the response is not None or empty
@@ -266,27 +348,45 @@ def generate_dysgraphie_recommendations(test_summary, total_score, max_score):
         
         return recommendations
         
+    except LLMDeadlineExceeded as e:
+        # Expected once a page's budget is spent: the answer still lands in the cache
+        logger.info(f"Composing {test_type} recommendations locally: {str(e)}")
+        return compose_recommendations(spec, detailed_results, age, classe)
     except Exception as e:
-        logger.error(f"Error generating dysgraphie recommendations: {str(e)}")
+        logger.error(f"Error generating {test_type} recommendations: {str(e)}")
         
-        # Fallback recommendations if LLM fails
-        risk_level = "élevé" if total_score / max_score < 0.5 else "modéré" if total_score / max_score < 0.8 else "faible"
-        
-        fallback = f"""
-        <h3>Évaluation du risque de dysgraphie: {risk_level}</h3>
-        <p>Basé sur les résultats du test, voici quelques recommandations:</p>
-        <ul>
-            <li>Pratiquer régulièrement des activités de motricité fine</li>
-            <li>Utiliser des supports adaptés pour l'écriture (papier quadrillé, guide-doigts)</li>
-            <li>Encourager les activités multisensorielles pour renforcer la mémoire motrice</li>
-            <li>Proposer des exercices ludiques pour améliorer la coordination main-œil</li>
-        </ul>
-        <p>Si les difficultés persistent, une consultation avec un ergothérapeute est recommandée.</p>
-        """
+        # Fallback recommendations if LLM fails, personalised without the LLM
+        return compose_recommendations(spec, detailed_results, age, classe)
+
+def summarize_results(test_type, detailed_results):
+    """
+    Build the text summary and totals of detailed sub-test results.
+    
+    Args:
+        test_type (str): Type of test, a key of RECOMMENDATION_SPECS
+        detailed_results (dict): Per-category results with score, max and notes
         
-        return fallback
+    Returns:
+        tuple: (test_summary, total_score, max_score)
+    """
+    test_names = RECOMMENDATION_SPECS[test_type].categories
+    
+    # Create a summary of test results
+    test_summary = ""
+    for test_key, test_data in detailed_results.items():
+        test_name = test_names.get(test_key, test_key)
+        
+        test_summary += f"{test_name}: {test_data.get('score', 0)}/{test_data.get('max', 0)}\n"
+        if test_data.get('notes'):
+            test_summary += f"  Notes: {test_data.get('notes')}\n"
+    
+    # Calculate total score
+    total_score = sum(test_data.get("score", 0) for test_data in detailed_results.values())
+    max_score = sum(test_data.get("max", 0) for test_data in detailed_results.values())
+    
+    return test_summary, total_score, max_score
 
-def analyze_results_with_ai(test_type, responses):
+def analyze_results_with_ai(test_type, responses, timeout=None, priority=PRIORITY_INTERACTIVE):
     """
     Interface function to analyze test results with AI
     Used to handle various test types
@@ -294,62 +394,66 @@ def analyze_results_with_ai(test_type, responses):
     Args:
         test_type (str): Type of test (dyscalculie, tdah, dyslexie, dysgraphie)
         responses (dict): Test responses
+        timeout (float): Optional latency budget in seconds. Past it, the
+            rule-based recommendation is returned and the LLM answer lands in
+            the cache later; timeout=0 returns the cached or rule-based answer
+            without waiting.
+        priority (int): Admission priority of the LLM call
         
     Returns:
         str: Analysis and recommendations
     """
-    if test_type == "dyslexie":
-        # Extract detailed results for dyslexia
-        detailed_results = responses.get('dyslexie_detailed_results', {})
-        
-        # Create a summary of test results
-        test_summary = ""
-        for test_key, test_data in detailed_results.items():
-            test_name = {
-                "denomination_rapide": "Dénomination Rapide",
-                "pseudo_mots": "Décodage Pseudo-Mots",
-                "suppression_phonemique": "Suppression Phonémique",
-                "fluidite_lecture": "Fluidité de Lecture",
-                "memoire_sons": "Mémoire des Sons",
-                "confusion_lettres": "Confusion de Lettres"
-            }.get(test_key, test_key)
-            
-            test_summary += f"{test_name}: {test_data.get('score', 0)}/{test_data.get('max', 0)}\n"
-            if test_data.get('notes'):
-                test_summary += f"  Notes: {test_data.get('notes')}\n"
-        
-        # Calculate total score
-        total_score = sum(test_data.get("score", 0) for test_data in detailed_results.values())
-        max_score = sum(test_data.get("max", 0) for test_data in detailed_results.values())
-        
-        # Generate recommendations
-        return generate_dyslexie_recommendations(test_summary, total_score, max_score)
+    spec = RECOMMENDATION_SPECS.get(test_type)
+    if spec is None:
+        logger.warning(f"No recommendation spec for test type {test_type}")
+        return None
     
-    elif test_type == "dysgraphie":
-        # Extract detailed results for dysgraphie
-        detailed_results = responses.get('detailed_results', {})
-        
-        # Create a summary of test results
-        test_summary = ""
-        for test_key, test_data in detailed_results.items():
-            test_name = {
-                "copie_texte": "Copie de Texte",
-                "ecriture_spontanee": "Écriture Spontanée",
-                "vitesse_endurance": "Vitesse et Endurance",
-                "graphisme_coordination": "Graphisme et Coordination Fine",
-                "lisibilite_orthographe": "Lisibilité et Orthographe"
-            }.get(test_key, test_key)
-            
-            test_summary += f"{test_name}: {test_data.get('score', 0)}/{test_data.get('max', 0)}\n"
-            if test_data.get('notes'):
-                test_summary += f"  Notes: {test_data.get('notes')}\n"
-        
-        # Calculate total score
-        total_score = sum(test_data.get("score", 0) for test_data in detailed_results.values())
-        max_score = sum(test_data.get("max", 0) for test_data in detailed_results.values())
+    detailed_results = spec.detailed_results(responses)
+    
+    # The model is routed once, so the bucket key names the model that answers
+    llm_connector = get_llm_connector(task=TASK_GENERATION)
+    
+    # Notes-free results are answered from the precomputed table when possible
+    bucket_key = score_bucket_key(test_type, detailed_results, responses.get('age'), llm_connector.model_id)
+    if bucket_key is not None:
+        precomputed = lookup_precomputed(test_type, detailed_results)
+        if precomputed is not None:
+            call = CallRecord(spec.template.name, "precomputed-table")
+            call.tier = "precomputed"
+            record_call(call)
+            return precomputed
+    
+    # Generate recommendations, shared by every child with the same scores
+    return generate_recommendations(test_type, detailed_results, bucket_key, timeout, priority,
+                                    age=responses.get('age'), classe=responses.get('classe'),
+                                    llm_connector=llm_connector)
+
+def prefetch_analysis(test_type, responses):
+    """
+    Start analyze_results_with_ai in the background so the results page
+    finds a warm result instead of starting a cold LLM call.
+    
+    Args:
+        test_type (str): Type of test (dyscalculie, tdah, dyslexie, dysgraphie)
+        responses (dict): Test responses (copied, so later edits don't leak in)
         
-        # Generate recommendations
-        return generate_dysgraphie_recommendations(test_summary, total_score, max_score)
+    Returns:
+        Future: Resolves to the analysis and recommendations; see promote_analysis
+    """
+    ticket = PriorityTicket(PRIORITY_PREFETCH)
+    future = submit_llm_call(analyze_results_with_ai, test_type, copy.deepcopy(responses), priority=ticket)
+    future.priority_ticket = ticket
+    return future
+
+def promote_analysis(future):
+    """
+    Raise a call started with prefetch_analysis to interactive priority, once
+    a page waits on it: if it is still queued for a Bedrock slot, it moves
+    ahead of the speculative prefetches instead of waiting behind them.
     
-    # For other test types, return None or implement similar logic
-    return None
\ No newline at end of file
+    Args:
+        future (Future): Future returned by prefetch_analysis
+    """
+    ticket = getattr(future, 'priority_ticket', None)
+    if ticket is not None:
+        ticket.raise_to(PRIORITY_INTERACTIVE)
\ No newline at end of file
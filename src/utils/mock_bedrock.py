@@ -0,0 +1,348 @@
+"""
+Deterministic local stand-in for the Bedrock runtime API, for load testing.
+
+Serves InvokeModel and InvokeModelWithResponseStream for Anthropic models
+over plain HTTP, with configurable latency, token throughput, error
+injection and one response template per prompt family. Point the connector
+at it with BEDROCK_ENDPOINT_URL to exercise the real code path (boto3,
+caching, streaming, parsing) without network access.
+
+Usage:
+    python -m src.utils.mock_bedrock [--port 8765] [--latency lognormal:0.8:0.4]
+        [--tokens-per-second 60] [--error-rate 0.02] [--throttle-rate 0.05] [--seed 0]
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Responses per prompt family, shaped like what the real prompts ask for
+RESPONSE_TEMPLATES = {
+    "activities": '```json\n["calculator", "number_line", "monster_game"]\n```',
+    "tdah_solution": """## Techniques d'Organisation Visuelles
+
+1. **Le tableau des couleurs** 🎨: un post-it de couleur pour chaque type de tâche.
+2. **La montre magique** ⏰: un minuteur visuel de 10 minutes par exercice.
+3. **Le cartable rangé** 🎒: une photo de chaque étape de préparation.
+
+## Jeux pour Améliorer l'Attention
+
+1. **Jacques a dit** 🗣️: n'agis que lorsque la consigne commence par "Jacques a dit".
+2. **Le détective** 🔍: observe une image 30 secondes puis retrouve les détails.
+
+## Système de Récompense
+
+Chaque tâche terminée rapporte une étoile ⭐. Cinq étoiles donnent droit à une activité choisie.
+
+## Messages d'Encouragement
+
+1. Ton cerveau devient plus fort à chaque effort! 💪
+2. Chaque petit pas compte! 🚀
+3. Tu es capable de grandes choses! 🌟
+""",
+    "dyscalculie_solution": """## Exercices Visuels de Mathématiques
+
+1. **Les tours de blocs** 🧱: construis une tour pour chaque nombre.
+2. **La ligne des nombres** 📏: avance ton pion case par case.
+3. **Les paquets de dix** 📦: regroupe les jetons par dizaines.
+
+## Jeux Mathématiques Amusants
+
+1. **La bataille des dés** 🎲: additionne deux dés, le plus grand total gagne.
+2. **Le marchand** 🛒: paie avec des jetons et rends la monnaie.
+
+## Calculatrice Assistée
+
+Pour 24 + 18: sépare les dizaines (20 + 10 = 30), puis les unités (4 + 8 = 12), et combine: 42.
+
+## Messages d'Encouragement
+
+1. Chaque calcul te rend plus fort! 💪
+2. Les erreurs t'aident à apprendre! 🌱
+3. Les maths sont un jeu! 🎉
+""",
+    "tdah": """<h3>Évaluation du risque de TDAH: modéré</h3>
+<p>L'enfant montre de bonnes capacités de mémorisation et peut progresser en attention soutenue.</p>
+<ul>
+    <li>Travailler dans un environnement calme</li>
+    <li>Diviser les tâches en petites étapes</li>
+    <li>Utiliser des minuteurs visuels</li>
+</ul>
+""",
+    "dyscalculie": """<h3>Évaluation du risque de dyscalculie: modéré</h3>
+<p>Les bases du calcul sont présentes; les suites logiques demandent de l'entraînement.</p>
+<ul>
+    <li>Manipuler des objets pour compter</li>
+    <li>Jouer aux dés et aux cartes</li>
+</ul>
+""",
+    "dyslexie": """<h3>Évaluation du risque de dyslexie: modéré</h3>
+<p>La conscience phonologique est en cours d'acquisition.</p>
+<ul>
+    <li>Jeux de rimes et de syllabes</li>
+    <li>Lecture partagée 10-15 minutes par jour</li>
+</ul>
+""",
+    "dysgraphie": """<h3>Évaluation du risque de dysgraphie: modéré</h3>
+<p>Le geste graphique gagne à être renforcé par la motricité fine.</p>
+<ul>
+    <li>Pâte à modeler et découpage</li>
+    <li>Papier à lignes adaptées</li>
+</ul>
+"""
+}
+
+
+def classify_prompt(prompt: str) -> str:
+    """
+    Picks the response template of a prompt from the markers the real prompts contain.
+
+    Args:
+        prompt: User prompt of the request
+
+    Returns:
+        Key of RESPONSE_TEMPLATES
+    """
+    lowered = prompt.lower()
+    if "tableau json" in lowered or "ids des activités" in lowered:
+        return "activities"
+    if "## techniques d'organisation visuelles" in lowered:
+        return "tdah_solution"
+    if "## exercices visuels de mathématiques" in lowered:
+        return "dyscalculie_solution"
+    for family in ("dysgraphie", "dyslexie", "dyscalculie", "tdah"):
+        if family in lowered:
+            return family
+    return "tdah"
+
+
+class LatencyModel:
+    """
+    Time-to-first-byte distribution, parsed from a spec string:
+    "fixed:0.5", "uniform:0.2:1.5" or "lognormal:<median seconds>:<sigma>".
+    """
+
+    def __init__(self, spec: str):
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        if self.kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Draws one latency in seconds."""
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        median, sigma = self.params
+        return rng.lognormvariate(0, sigma) * median
+
+
+def _tokenize(text: str) -> List[str]:
+    """Splits text into word-sized pieces, keeping the whitespace."""
+    return re.findall(r'\S+\s*|\s+', text)
+
+
+def encode_event(payload: Dict[str, Any], event_type: str = "chunk") -> bytes:
+    """
+    Encodes one message of the AWS event-stream format used by
+    InvokeModelWithResponseStream (prelude, headers, payload, CRC32s).
+    """
+    headers = b""
+    for name, value in ((":event-type", event_type), (":content-type", "application/json"), (":message-type", "event")):
+        name_bytes = name.encode('utf-8')
+        value_bytes = value.encode('utf-8')
+        headers += struct.pack('>B', len(name_bytes)) + name_bytes + b'\x07' + struct.pack('>H', len(value_bytes)) + value_bytes
+
+    body = json.dumps(payload).encode('utf-8')
+    total_length = 12 + len(headers) + len(body) + 4
+    prelude = struct.pack('>II', total_length, len(headers))
+    prelude_crc = struct.pack('>I', binascii.crc32(prelude) & 0xffffffff)
+    message = prelude + prelude_crc + headers + body
+    return message + struct.pack('>I', binascii.crc32(message) & 0xffffffff)
+
+
+class MockBedrockConfig:
+    """Settings shared by every request handled by the server."""
+
+    def __init__(self,
+                 latency: str = "lognormal:0.8:0.4",
+                 tokens_per_second: float = 60.0,
+                 error_rate: float = 0.0,
+                 throttle_rate: float = 0.0,
+                 seed: int = 0):
+        self.latency = LatencyModel(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.seed = seed
+        # Requests received per body, so a retry draws a new roll
+        self._occurrences: Dict[str, int] = {}
+        self._occurrences_lock = threading.Lock()
+
+    def rng_for(self, body: bytes) -> random.Random:
+        """
+        Random generator seeded by the request and by how many times the same
+        body was received before. Identical runs behave identically, while
+        retries and repeated prompts draw their errors independently, so the
+        error rates apply per request.
+        """
+        body_hash = hashlib.sha256(body).hexdigest()
+        with self._occurrences_lock:
+            occurrence = self._occurrences.get(body_hash, 0)
+            self._occurrences[body_hash] = occurrence + 1
+        digest = hashlib.sha256(f"{body_hash}:{self.seed}:{occurrence}".encode('utf-8')).digest()
+        return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+class MockBedrockHandler(BaseHTTPRequestHandler):
+    """Handles POST /model/<id>/invoke and /model/<id>/invoke-with-response-stream."""
+
+    config: MockBedrockConfig = MockBedrockConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_error(self, status: int, error_type: str, message: str) -> None:
+        body = json.dumps({"message": message}).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("x-amzn-ErrorType", error_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        match = re.match(r'^/model/([^/]+)/(invoke|invoke-with-response-stream)$', self.path)
+        if not match:
+            self._send_error(404, "UnknownOperationException", f"Unknown path {self.path}")
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            request = json.loads(body)
+        except ValueError:
+            self._send_error(400, "ValidationException", "Malformed request body")
+            return
+
+        rng = self.config.rng_for(body)
+        roll = rng.random()
+        if roll < self.config.throttle_rate:
+            self._send_error(429, "ThrottlingException", "Rate exceeded")
+            return
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            self._send_error(500, "InternalServerException", "Injected failure")
+            return
+
+        prompt = " ".join(
+            block.get("text", "")
+            for message in request.get("messages", [])
+            for block in (message.get("content") if isinstance(message.get("content"), list) else [{"text": message.get("content", "")}])
+        )
+        tokens = _tokenize(RESPONSE_TEMPLATES[classify_prompt(prompt)])[:request.get("max_tokens", 1000)]
+        input_tokens = max(1, len(prompt) // 4)
+
+        time.sleep(self.config.latency.sample(rng))
+
+        if match.group(2) == "invoke":
+            self._send_full(tokens, input_tokens)
+        else:
+            self._send_stream(tokens, input_tokens)
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+
+    def _send_full(self, tokens: List[str], input_tokens: int) -> None:
+        # Generation time is paid before the first byte, as with the real API
+        time.sleep(self._token_delay() * len(tokens))
+        body = json.dumps({
+            "id": "msg_mock",
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "text", "text": "".join(tokens)}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": input_tokens, "output_tokens": len(tokens)}
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Amzn-Bedrock-Input-Token-Count", str(input_tokens))
+        self.send_header("X-Amzn-Bedrock-Output-Token-Count", str(len(tokens)))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self, tokens: List[str], input_tokens: int) -> Iterator[Dict[str, Any]]:
+        yield {"type": "message_start", "message": {"id": "msg_mock", "usage": {"input_tokens": input_tokens, "output_tokens": 0}}}
+        yield {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}
+        for token in tokens:
+            time.sleep(self._token_delay())
+            yield {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}}
+        yield {"type": "content_block_stop", "index": 0}
+        yield {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": len(tokens)}}
+        yield {"type": "message_stop"}
+
+    def _send_stream(self, tokens: List[str], input_tokens: int) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in self._stream_events(tokens, input_tokens):
+            chunk = {"bytes": base64.b64encode(json.dumps(event).encode('utf-8')).decode('ascii')}
+            message = encode_event(chunk)
+            self.wfile.write(f"{len(message):X}\r\n".encode('ascii') + message + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def serve(port: int = 8765, config: Optional[MockBedrockConfig] = None, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Starts the mock server in a background thread.
+
+    Returns:
+        The running server (call shutdown() to stop it)
+    """
+    handler = type("ConfiguredMockBedrockHandler", (MockBedrockHandler,), {"config": config or MockBedrockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Mock Bedrock listening on http://{host}:{port}")
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deterministic local Bedrock stand-in for load testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.8:0.4",
+                        help="fixed:<s>, uniform:<min>:<max> or lognormal:<median>:<sigma>")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests throttled with HTTP 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = MockBedrockConfig(args.latency, args.tokens_per_second, args.error_rate, args.throttle_rate, args.seed)
+    server = serve(args.port, config, args.host)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
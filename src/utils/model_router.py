@@ -0,0 +1,164 @@
+"""
+Model routing by task class.
+
+Call sites declare what kind of work they need instead of naming a model:
+short structured selections (e.g. picking 2-3 activity ids) can run on a
+small fast model, while long-form generation stays on the large one. Among
+the models allowed for a task, the router picks the one with the best
+trade-off between observed latency and token cost.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SONNET_MODEL_ID = 'anthropic.claude-3-sonnet-20240229-v1:0'
+HAIKU_MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+
+# Task classes declared by call sites
+TASK_SELECTION = "selection"
+TASK_GENERATION = "generation"
+
+# Price in USD per 1000 tokens, the speed assumed before any call is observed, and
+# whether Bedrock accepts cache_control prompt-caching breakpoints for the model
+MODEL_PROFILES = {
+    SONNET_MODEL_ID: {"input_cost": 0.003, "output_cost": 0.015, "prior_seconds_per_token": 0.02,
+                      "prompt_caching": False},
+    HAIKU_MODEL_ID: {"input_cost": 0.00025, "output_cost": 0.00125, "prior_seconds_per_token": 0.008,
+                     "prompt_caching": False}
+}
+
+# Models allowed for each task, in order of preference, and its typical size
+TASK_CLASSES = {
+    TASK_SELECTION: {"models": [HAIKU_MODEL_ID, SONNET_MODEL_ID], "input_tokens": 1500, "output_tokens": 50},
+    TASK_GENERATION: {"models": [SONNET_MODEL_ID], "input_tokens": 800, "output_tokens": 1500}
+}
+
+# Value of one dollar expressed in seconds of waiting, to weigh cost against latency
+SECONDS_PER_DOLLAR = float(os.getenv('LLM_ROUTER_SECONDS_PER_DOLLAR', '1000'))
+
+# Weight of the newest observation in the latency moving averages
+EWMA_ALPHA = 0.2
+
+
+def prompt_caching_enabled(model_id: str) -> bool:
+    """
+    Whether requests to a model mark their static prefix for provider-side caching.
+
+    LLM_PROMPT_CACHING_MODELS (comma-separated ids, or "none") overrides the
+    prompt_caching flag of MODEL_PROFILES, e.g. when moving to a model version
+    that supports it.
+    """
+    override = os.getenv('LLM_PROMPT_CACHING_MODELS')
+    if override is not None:
+        return model_id in {model.strip() for model in override.split(',')}
+    return MODEL_PROFILES.get(model_id, {}).get("prompt_caching", False)
+
+
+class ModelRouter:
+    """
+    Picks a model per task class from the observed latency and token cost.
+
+    The connector reports every completed call with observe(); the router
+    keeps an exponentially weighted moving average of the overhead and of the
+    time per output token of each model, so its estimates follow the service
+    as it speeds up or slows down.
+    """
+
+    def __init__(self, task_classes: Dict[str, Dict] = None, profiles: Dict[str, Dict] = None):
+        """
+        Args:
+            task_classes: Allowed models and typical size of each task class
+            profiles: Token prices and prior speed of each model
+        """
+        self.task_classes = task_classes or self._configured_task_classes()
+        self.profiles = profiles or MODEL_PROFILES
+        self._seconds_per_token: Dict[str, float] = {}
+        self._overhead: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _configured_task_classes() -> Dict[str, Dict]:
+        """TASK_CLASSES, with model lists overridable by LLM_MODELS_<TASK> (comma-separated ids)."""
+        task_classes = {}
+        for task, spec in TASK_CLASSES.items():
+            override = os.getenv(f'LLM_MODELS_{task.upper()}')
+            models = [model.strip() for model in override.split(',') if model.strip()] if override else spec["models"]
+            task_classes[task] = dict(spec, models=models)
+        return task_classes
+
+    def observe(self, model_id: str, seconds: float, output_tokens: Optional[int] = None) -> None:
+        """
+        Records a completed call.
+
+        Args:
+            model_id: Model that answered
+            seconds: Total latency of the call
+            output_tokens: Generated tokens, if the response reported them
+        """
+        with self._lock:
+            if output_tokens:
+                # Attribute the first second to the request overhead, the rest to generation
+                overhead = min(seconds, 1.0)
+                per_token = max(seconds - overhead, 0.0) / output_tokens
+                self._overhead[model_id] = self._ewma(self._overhead.get(model_id), overhead)
+                self._seconds_per_token[model_id] = self._ewma(self._seconds_per_token.get(model_id), per_token)
+            else:
+                self._overhead[model_id] = self._ewma(self._overhead.get(model_id), seconds)
+
+    @staticmethod
+    def _ewma(previous: Optional[float], value: float) -> float:
+        if previous is None:
+            return value
+        return EWMA_ALPHA * value + (1 - EWMA_ALPHA) * previous
+
+    def expected_latency(self, model_id: str, task: str) -> float:
+        """Estimated latency in seconds of a typical call of the task on the model."""
+        spec = self.task_classes[task]
+        profile = self.profiles.get(model_id, {})
+        with self._lock:
+            per_token = self._seconds_per_token.get(model_id, profile.get("prior_seconds_per_token", 0.02))
+            overhead = self._overhead.get(model_id, 1.0)
+        return overhead + per_token * spec["output_tokens"]
+
+    def expected_cost(self, model_id: str, task: str) -> float:
+        """Token cost in USD of a typical call of the task on the model."""
+        spec = self.task_classes[task]
+        profile = self.profiles.get(model_id, {})
+        return (spec["input_tokens"] * profile.get("input_cost", 0.0)
+                + spec["output_tokens"] * profile.get("output_cost", 0.0)) / 1000
+
+    def rank(self, task: str) -> List[str]:
+        """
+        Orders the models allowed for a task, best first.
+
+        Args:
+            task: Task class (TASK_SELECTION, TASK_GENERATION)
+
+        Returns:
+            List of model ids
+        """
+        if task not in self.task_classes:
+            raise ValueError(f"Unknown task class: {task}")
+        models = self.task_classes[task]["models"]
+        return sorted(
+            models,
+            key=lambda model_id: self.expected_latency(model_id, task) + SECONDS_PER_DOLLAR * self.expected_cost(model_id, task)
+        )
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Returns the process-wide model router."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter()
+    return _router
@@ -0,0 +1,154 @@
+"""
+Offline batch job precomputing recommendations for the whole score space.
+
+Enumerates every score vector allowed by the sub-test maxima of each test, generates the notes-free recommendation of each one through the
+shared LLMConnector with bounded concurrency, and writes the lookup table
+read by analyze_results_with_ai.
+
+Usage:
+    python -m src.utils.precompute_recommendations [--tests dyscalculie tdah dyslexie dysgraphie]
+        [--output data/recommendations_table.json.gz] [--concurrency 4] [--limit N]
+"""
+
+import argparse
+import itertools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, Optional
+
+from src.llm_connector import get_llm_connector
+from src.utils.admission import PRIORITY_BATCH
+from src.utils.llm_cache import get_bucket_cache
+from src.utils.llm_utils import generate_recommendations, score_bucket_key
+from src.utils.model_router import TASK_GENERATION
+from src.utils.recommendation_table import DEFAULT_TABLE_PATH, load_table, save_table, table_key
+from src.utils.score_utils import (
+    DYSCALCULIE_CORRECT_ANSWERS,
+    DYSGRAPHIE_MAX_SCORES,
+    DYSLEXIE_MAX_SCORES,
+    TDAH_MAX_SCORES
+)
+
+logger = logging.getLogger(__name__)
+
+# Sub-test maxima defining the score space of each test type
+SCORE_SPACES = {
+    "dyscalculie": {question: 1 for question in DYSCALCULIE_CORRECT_ANSWERS},
+    "tdah": TDAH_MAX_SCORES,
+    "dyslexie": DYSLEXIE_MAX_SCORES,
+    "dysgraphie": DYSGRAPHIE_MAX_SCORES
+}
+
+
+def enumerate_score_space(test_type: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the detailed results of every possible score vector of a test.
+
+    Args:
+        test_type: Type of test, a key of SCORE_SPACES
+
+    Yields:
+        Detailed results with empty notes
+    """
+    maxima = SCORE_SPACES[test_type]
+    test_keys = list(maxima)
+    for scores in itertools.product(*(range(maxima[test_key] + 1) for test_key in test_keys)):
+        yield {
+            test_key: {"score": score, "max": maxima[test_key], "notes": ""}
+            for test_key, score in zip(test_keys, scores)
+        }
+
+
+def generate_entry(test_type: str, detailed_results: Dict[str, Any]) -> Optional[str]:
+    """
+    Generates the recommendation of one score vector.
+
+    The generator goes through the connector with a bucket key, so a
+    successful answer lands in the bucket cache; reading it back from there
+    tells a real answer apart from the generator's local fallback.
+
+    Returns:
+        The recommendation, or None if the LLM call failed
+    """
+    llm_connector = get_llm_connector(task=TASK_GENERATION)
+    bucket_key = score_bucket_key(test_type, detailed_results, model_id=llm_connector.model_id)
+    generate_recommendations(test_type, detailed_results, bucket_key, priority=PRIORITY_BATCH,
+                             llm_connector=llm_connector)
+    return get_bucket_cache().peek(bucket_key)
+
+
+def precompute(test_types, output: str, concurrency: int, limit: Optional[int] = None) -> Dict[str, str]:
+    """
+    Fills the lookup table for the given test types, resuming from any
+    existing table at the output path.
+
+    Args:
+        test_types: Test types to enumerate
+        output: Table file to write
+        concurrency: Maximum number of simultaneous LLM calls
+        limit: Optional maximum number of new entries to generate
+
+    Returns:
+        The complete table
+    """
+    table = load_table(output)
+    pending = []
+    for test_type in test_types:
+        for detailed_results in enumerate_score_space(test_type):
+            key = table_key(test_type, detailed_results)
+            if key not in table:
+                pending.append((key, test_type, detailed_results))
+    if limit is not None:
+        pending = pending[:limit]
+
+    logger.info(f"{len(table)} entries already present, {len(pending)} to generate")
+
+    started = time.monotonic()
+    failures = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(generate_entry, test_type, detailed_results): key
+            for key, test_type, detailed_results in pending
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            try:
+                recommendation = future.result()
+            except Exception as e:
+                logger.error(f"Failed to generate {key}: {str(e)}")
+                recommendation = None
+
+            if recommendation:
+                table[key] = recommendation
+            else:
+                failures += 1
+
+            if done % 100 == 0:
+                # Checkpoint regularly so an interrupted run can resume
+                save_table(table, output)
+                logger.info(f"{done}/{len(pending)} generated in {time.monotonic() - started:.0f}s")
+
+    save_table(table, output)
+    logger.info(f"Wrote {len(table)} entries to {output} ({failures} failures)")
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute notes-free recommendations for every score vector.")
+    parser.add_argument("--tests", nargs="+", choices=sorted(SCORE_SPACES), default=sorted(SCORE_SPACES),
+                        help="Test types to enumerate")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH, help="Lookup table to write")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum simultaneous LLM calls")
+    parser.add_argument("--limit", type=int, default=None, help="Generate at most this many new entries")
+    args = parser.parse_args()
+
+    if get_bucket_cache() is None:
+        parser.error("the LLM cache is required (unset LLM_CACHE_ENABLED=false)")
+
+    logging.basicConfig(level=logging.INFO)
+    precompute(args.tests, args.output, args.concurrency, args.limit)
+
+
+if __name__ == "__main__":
+    main()
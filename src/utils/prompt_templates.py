@@ -0,0 +1,159 @@
+"""
+Registry of the prompts sent to the LLM.
+
+Each prompt is declared once as a PromptTemplate: its text is dedented
+(source-code indentation is not sent to the model), static values such as
+the activity catalogue are substituted at registration, and the remaining
+placeholders are parsed into literal and field segments so rendering is a
+single join. The literal text before the first placeholder is exposed as
+the template's stable prefix, shared by every request of that template;
+templates keep child-specific fields at the end so that prefix is long,
+and the connector marks it for provider-side prompt caching.
+
+Every render reports the estimated input tokens of the prompt and its
+system prompt to the LLM telemetry (src/utils/llm_metrics.py), so prompt
+size is tracked per template like latency.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import string
+import textwrap
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.llm_logging import log_event
+from src.utils.llm_metrics import get_llm_metrics
+
+logger = logging.getLogger(__name__)
+
+# Average characters per token of the French prompts, for size estimates
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, without calling a tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def compact_text(text: str) -> str:
+    """Dedents a triple-quoted block and drops its leading and trailing blank lines."""
+    return textwrap.dedent(text).strip('\n').rstrip()
+
+
+class PromptTemplate:
+    """
+    A prompt compiled once from a str.format-style text.
+
+    Placeholders are {name} fields; values given as static are substituted
+    at construction, the others on each render.
+    """
+
+    def __init__(self, 
+                 name: str, 
+                 text: str, 
+                 system: str = "", 
+                 static: Optional[Dict[str, Any]] = None,
+                 schema: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            name: Registry name, also used in the telemetry
+            text: Prompt text, typically an indented triple-quoted block
+            system: System prompt sent with the prompt
+            static: Values known at registration (e.g. the activity catalogue)
+            schema: Shape of the JSON answer, for prompts requesting structured
+                output (see src/utils/structured_output.py)
+        """
+        self.name = name
+        self.schema = schema
+        self.system = compact_text(system)
+        self.segments: List[Tuple[str, Optional[str]]] = []
+        static = static or {}
+        literal = ""
+        for text_part, field, _, _ in string.Formatter().parse(compact_text(text)):
+            literal += text_part
+            if field is None:
+                continue
+            if field in static:
+                literal += str(static[field])
+            else:
+                self.segments.append((literal, field))
+                literal = ""
+        self.segments.append((literal, None))
+        self.fields = {field for _, field in self.segments if field is not None}
+        self.prefix = self.segments[0][0]
+        self.system_tokens = estimate_tokens(self.system)
+        # Changes whenever the prompt or system text is edited, for cache keys
+        # that must not outlive the wording that produced their answers
+        self.version = hashlib.sha256(
+            json.dumps([self.system, self.segments], ensure_ascii=False).encode('utf-8')
+        ).hexdigest()[:12]
+
+    def render(self, **values: Any) -> str:
+        """
+        Fills in the placeholders and records the estimated prompt size.
+
+        Raises:
+            KeyError: If a placeholder has no value
+        """
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt template {self.name} is missing {', '.join(sorted(missing))}")
+        prompt = "".join(
+            literal + (str(values[field]) if field is not None else "")
+            for literal, field in self.segments
+        )
+        tokens = self.system_tokens + estimate_tokens(prompt)
+        get_llm_metrics().record_prompt(self.name, tokens)
+        log_event(logger, "llm.prompt", level=logging.DEBUG, template=self.name, estimated_tokens=tokens,
+                  prefix_chars=len(self.prefix))
+        return prompt
+
+
+_templates: Dict[str, PromptTemplate] = {}
+_templates_lock = threading.Lock()
+
+
+def register_template(name: str, 
+                      text: str, 
+                      system: str = "", 
+                      static: Optional[Dict[str, Any]] = None,
+                      schema: Optional[Dict[str, Any]] = None) -> PromptTemplate:
+    """
+    Compiles a template and adds it to the registry (see PromptTemplate for the arguments).
+
+    Returns:
+        The compiled template, so modules can keep a direct reference
+    """
+    template = PromptTemplate(name, text, system, static, schema)
+    with _templates_lock:
+        _templates[name] = template
+    return template
+
+
+def get_template(name: str) -> PromptTemplate:
+    """Returns a registered template."""
+    try:
+        return _templates[name]
+    except KeyError:
+        raise KeyError(f"Unknown prompt template: {name}") from None
+
+
+def static_prefix(prompt: str) -> str:
+    """
+    The stable prefix of the registered template a prompt was rendered from.
+
+    Returns:
+        The longest registered prefix the prompt starts with, or "" if none
+    """
+    with _templates_lock:
+        prefixes = [template.prefix for template in _templates.values() if template.prefix]
+    return max((prefix for prefix in prefixes if prompt.startswith(prefix)), key=len, default="")
+
+
+def registered_templates() -> Dict[str, PromptTemplate]:
+    """All registered templates, by name."""
+    with _templates_lock:
+        return dict(_templates)
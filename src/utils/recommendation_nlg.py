@@ -0,0 +1,265 @@
+"""
+Local generation of personalised recommendations, without Bedrock.
+
+When the LLM is slow, throttled, shed by admission control or behind an
+open circuit breaker, the recommendation engine (src/utils/llm_utils.py)
+falls back to this module. It composes a short HTML text from a curated
+phrase bank: the child's weakest sub-tests (from detailed_results) select
+the activities, the age or class selects the wording suited to the child,
+and the class selects a classroom tip. Choices are deterministic, so the
+same results always give the same text, and composing one takes well
+under a millisecond on CPU.
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Sub-tests scored below this ratio are treated as weaknesses, at or above
+# STRENGTH_RATIO as strengths
+WEAKNESS_RATIO = 0.6
+STRENGTH_RATIO = 0.8
+
+# Most weaknesses and strengths mentioned, weakest and strongest first
+MAX_WEAKNESSES = 3
+MAX_STRENGTHS = 2
+
+# Activities listed: one per weakness, completed with the test's generic advice
+MAX_ACTIVITIES = 4
+
+# Phrase bank: for each test type and sub-test, the skill it measures and an
+# activity for younger children (maternelle to CE2) and older ones (CM1 and up)
+PHRASE_BANK: Dict[str, Dict[str, Dict[str, str]]] = {
+    "dyscalculie": {
+        "q1": {
+            "skill": "l'addition",
+            "young": "Additionner avec des objets du quotidien (jetons, billes, fruits) en comptant le tout à voix haute",
+            "older": "Décomposer les additions en dizaines et unités, en s'aidant d'une droite numérique"
+        },
+        "q2": {
+            "skill": "la soustraction",
+            "young": "Retirer des objets d'une boîte et compter ce qui reste, pour donner du sens à la soustraction",
+            "older": "Vérifier chaque soustraction par l'addition inverse (10 - 4 = 6 car 6 + 4 = 10)"
+        },
+        "q3": {
+            "skill": "les suites logiques",
+            "young": "Compléter des colliers de perles ou des frises de couleurs qui suivent un motif",
+            "older": "Chercher la règle d'une suite (+2, +5, x2) puis inventer ses propres suites"
+        },
+        "q4": {
+            "skill": "la comparaison des grandeurs",
+            "young": "Soupeser et ranger des objets de la maison du plus léger au plus lourd",
+            "older": "Estimer puis mesurer des masses et des longueurs avec une balance ou une règle"
+        }
+    },
+    "tdah": {
+        "memorisation": {
+            "skill": "la mémorisation",
+            "young": "Raconter une courte histoire puis demander à l'enfant de rappeler trois détails",
+            "older": "Résumer une leçon en quelques mots-clés illustrés avant de la réciter"
+        },
+        "attention": {
+            "skill": "l'attention soutenue",
+            "young": "Jouer à « Où est Charlie ? » ou à chercher une lettre dans une page, quelques minutes à la fois",
+            "older": "Travailler par courtes séances minutées (10 à 15 minutes) suivies d'une pause active"
+        },
+        "impulsivite": {
+            "skill": "le contrôle de l'impulsivité",
+            "young": "Jouer à « Jacques a dit » ou au feu rouge-feu vert pour apprendre à attendre le signal",
+            "older": "Prendre l'habitude de relire la consigne et de compter jusqu'à trois avant de répondre"
+        },
+        "memoire": {
+            "skill": "la mémoire de travail",
+            "young": "Jouer au jeu de paires (memory) en augmentant peu à peu le nombre de cartes",
+            "older": "Répéter des séquences de chiffres à l'endroit puis à l'envers, de plus en plus longues"
+        },
+        "organisation": {
+            "skill": "l'organisation",
+            "young": "Suivre un tableau imagé des étapes de la routine du matin et du soir",
+            "older": "Tenir un agenda ou une liste de tâches à cocher, préparée la veille avec un adulte"
+        },
+        "flexibilite": {
+            "skill": "la flexibilité cognitive",
+            "young": "Trier des cartes selon la couleur, puis selon la forme, en changeant de règle en cours de jeu",
+            "older": "Chercher plusieurs façons de résoudre un même problème et comparer les solutions"
+        }
+    },
+    "dyslexie": {
+        "denomination_rapide": {
+            "skill": "la dénomination rapide",
+            "young": "Nommer le plus vite possible des images familières alignées sur une carte",
+            "older": "Lire des grilles de lettres ou de mots fréquents en chronométrant ses progrès"
+        },
+        "pseudo_mots": {
+            "skill": "le décodage",
+            "young": "Fabriquer des syllabes avec des lettres mobiles et les lire à voix haute",
+            "older": "Lire des mots inventés pour s'entraîner à décoder sans deviner"
+        },
+        "suppression_phonemique": {
+            "skill": "la conscience phonologique",
+            "young": "Jouer avec les sons des mots : frapper les syllabes, trouver des rimes",
+            "older": "Enlever ou remplacer un son dans un mot (« bateau » sans [b]) à l'oral"
+        },
+        "fluidite_lecture": {
+            "skill": "la fluidité de lecture",
+            "young": "Lire chaque jour un court texte à voix haute avec un adulte, en le relisant plusieurs fois",
+            "older": "Pratiquer la lecture répétée d'un même passage en mesurant le temps de lecture"
+        },
+        "memoire_sons": {
+            "skill": "la mémoire des sons",
+            "young": "Répéter des comptines et des séries de syllabes de plus en plus longues",
+            "older": "Mémoriser et répéter des listes de mots proches à l'oral (« pain, bain, main »)"
+        },
+        "confusion_lettres": {
+            "skill": "la distinction des lettres proches",
+            "young": "Tracer dans le sable ou la pâte à modeler les lettres qui se ressemblent (b, d, p, q)",
+            "older": "Utiliser des repères visuels (code couleur, mot-référence) pour les lettres souvent confondues"
+        }
+    },
+    "dysgraphie": {
+        "copie_texte": {
+            "skill": "la copie",
+            "young": "Copier des mots courts sur des lignes élargies, en nommant les lettres au fur et à mesure",
+            "older": "Copier par groupes de mots plutôt que lettre par lettre, avec un modèle proche de la feuille"
+        },
+        "ecriture_spontanee": {
+            "skill": "l'écriture spontanée",
+            "young": "Dicter ses idées à un adulte puis en recopier une phrase",
+            "older": "Préparer ses idées sous forme de schéma avant d'écrire, et alterner clavier et stylo"
+        },
+        "vitesse_endurance": {
+            "skill": "la vitesse et l'endurance d'écriture",
+            "young": "Faire des exercices d'échauffement des doigts et du poignet avant d'écrire",
+            "older": "Écrire par courtes périodes avec des pauses, et réduire la quantité à copier"
+        },
+        "graphisme_coordination": {
+            "skill": "la motricité fine",
+            "young": "Enfiler des perles, découper, modeler de la pâte pour muscler la main",
+            "older": "Tracer des boucles et des formes continues sur papier quadrillé, sans lever le crayon"
+        },
+        "lisibilite_orthographe": {
+            "skill": "la lisibilité",
+            "young": "Utiliser un crayon ergonomique et du papier à lignes colorées pour bien placer les lettres",
+            "older": "Relire sa production avec une liste de vérification (espaces, hauteur des lettres, accents)"
+        }
+    }
+}
+
+# Classroom tip by school stage, completed with the weakest skill
+CLASSROOM_TIPS = {
+    "maternelle": "À l'école maternelle, l'enseignant peut aborder {skill} par le jeu et la manipulation, en petit groupe.",
+    "cycle 2": "En {classe}, des supports visuels au tableau et un peu plus de temps pour les exercices aident à consolider {skill}.",
+    "cycle 3": "En {classe}, des consignes courtes et un tutorat avec un camarade peuvent soutenir {skill}.",
+    "college": "Au collège, un aménagement (temps supplémentaire, supports adaptés) peut être discuté avec l'équipe pédagogique pour {skill}."
+}
+
+# Opening sentence by risk level
+OPENINGS = {
+    "faible": "Les résultats montrent un risque faible de {label}.",
+    "modéré": "Les résultats montrent un risque modéré de {label} : quelques compétences méritent un entraînement régulier.",
+    "élevé": "Les résultats montrent un risque élevé de {label} : un accompagnement ciblé est recommandé."
+}
+
+# Default class name of each stage, when only the age is known
+STAGE_CLASSES = {"maternelle": "maternelle", "cycle 2": "CE1", "cycle 3": "CM1", "college": "6e"}
+
+_CLASS_STAGES = (
+    (re.compile(r'\b(maternelle|ps|ms|gs)\b'), "maternelle"),
+    (re.compile(r'\b(cp|ce1|ce2)\b'), "cycle 2"),
+    (re.compile(r'\b(cm1|cm2)\b'), "cycle 3"),
+    (re.compile(r'\b(6|5|4|3)\s*(e|eme|ème)\b|\bcoll[eè]ge\b'), "college")
+)
+
+
+def school_stage(age: Any = None, classe: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Places a child in a school stage, from the class when it is recognised,
+    otherwise from the age.
+
+    Args:
+        age: Age of the child (int, str or None)
+        classe: Class as typed in the test form (e.g. "CE2", "6ème")
+
+    Returns:
+        (stage, class name) where stage is a key of CLASSROOM_TIPS
+    """
+    text = str(classe or "").strip()
+    for pattern, stage in _CLASS_STAGES:
+        if pattern.search(text.casefold()):
+            return stage, text
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        age = 8
+    stage = "maternelle" if age <= 5 else "cycle 2" if age <= 8 else "cycle 3" if age <= 11 else "college"
+    return stage, STAGE_CLASSES[stage]
+
+
+def rank_categories(detailed_results: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Splits the sub-tests into weaknesses (weakest first) and strengths
+    (strongest first). Sub-tests without a maximum are ignored.
+    """
+    ratios = {
+        category: data.get('score', 0) / data['max']
+        for category, data in detailed_results.items()
+        if data.get('max')
+    }
+    ordered = sorted(ratios, key=lambda category: (ratios[category], category))
+    weaknesses = [category for category in ordered if ratios[category] < WEAKNESS_RATIO][:MAX_WEAKNESSES]
+    strengths = [category for category in reversed(ordered) if ratios[category] >= STRENGTH_RATIO][:MAX_STRENGTHS]
+    return weaknesses, strengths
+
+
+def compose_recommendations(spec, detailed_results: Dict[str, Any], age: Any = None,
+                            classe: Optional[str] = None) -> str:
+    """
+    Composes personalised recommendations from the phrase bank.
+
+    Args:
+        spec: RecommendationSpec of the test type (label, risk thresholds,
+            generic advice and specialist)
+        detailed_results: Per-category results with score and max
+        age: Age of the child
+        classe: Class of the child
+
+    Returns:
+        str: Recommendations as simple HTML
+    """
+    phrases = PHRASE_BANK.get(spec.test_type, {})
+    total_score = sum(data.get('score', 0) for data in detailed_results.values())
+    max_score = sum(data.get('max', 0) for data in detailed_results.values())
+    risk_level = spec.risk_level(total_score, max_score)
+    stage, class_name = school_stage(age, classe)
+    variant = "young" if stage in ("maternelle", "cycle 2") else "older"
+
+    weaknesses, strengths = rank_categories(detailed_results)
+    weaknesses = [category for category in weaknesses if category in phrases]
+    strengths = [category for category in strengths if category in phrases]
+
+    parts = [f"<h3>Évaluation du risque de {spec.label}: {risk_level}</h3>",
+             f"<p>{OPENINGS[risk_level].format(label=spec.label)}"]
+    if strengths:
+        skills = " et ".join(phrases[category]["skill"] for category in strengths)
+        if len(strengths) > 1:
+            parts[-1] += f" Points forts : {skills}, de bons appuis pour garder la motivation."
+        else:
+            parts[-1] += f" Point fort : {skills}, un bon appui pour garder la motivation."
+    parts[-1] += "</p>"
+
+    # Activities for the weakest skills, completed with the generic advice
+    items = [phrases[category][variant] for category in weaknesses]
+    offset = int(hashlib.sha256(",".join(weaknesses).encode('utf-8')).hexdigest(), 16) % len(spec.advice)
+    for index in range(min(len(spec.advice), MAX_ACTIVITIES - len(items))):
+        items.append(spec.advice[(offset + index) % len(spec.advice)])
+    focus = ", ".join(phrases[category]["skill"] for category in weaknesses)
+    parts.append(f"<p>Activités conseillées{f' pour travailler {focus}' if focus else ''} :</p>")
+    parts.append("<ul>\n" + "\n".join(f"    <li>{item}</li>" for item in items) + "\n</ul>")
+
+    if weaknesses:
+        skill = phrases[weaknesses[0]]["skill"]
+        parts.append(f"<p>{CLASSROOM_TIPS[stage].format(classe=class_name, skill=skill)}</p>")
+    parts.append("<p>Quelques minutes par jour, dans un cadre ludique et encourageant, valent mieux que de longues séances.</p>")
+    if risk_level != "faible":
+        parts.append(f"<p>Si les difficultés persistent, une consultation avec {spec.specialist} est recommandée.</p>")
+    return "\n".join(parts)
@@ -0,0 +1,113 @@
+"""
+Precomputed recommendation table.
+
+The sub-tests of every screening test have small score ranges, so the set
+of possible score vectors is finite. The batch job in
+src/utils/precompute_recommendations.py generates a recommendation for each
+vector once, offline, and stores them in a compressed lookup table shipped
+with the app. analyze_results_with_ai consults it before calling Bedrock.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_PATH = os.path.join('data', 'recommendations_table.json.gz')
+TABLE_VERSION = 1
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def table_key(test_type: str, detailed_results: Dict[str, Any]) -> str:
+    """
+    Builds the lookup key of a score vector, e.g. "dyslexie|1,4,0,2,3,5".
+    Sub-tests are ordered by name so the key doesn't depend on dict order.
+
+    Args:
+        test_type: Type of test (dyscalculie, tdah, dyslexie, dysgraphie)
+        detailed_results: Per-category results with a score field
+
+    Returns:
+        The table key
+    """
+    scores = ",".join(
+        str(detailed_results[test_key].get('score', 0)) for test_key in sorted(detailed_results)
+    )
+    return f"{test_type}|{scores}"
+
+
+def load_table(path: str = None) -> Dict[str, str]:
+    """
+    Reads a lookup table written by save_table.
+
+    Args:
+        path: Table file, defaults to LLM_PRECOMPUTED_TABLE or DEFAULT_TABLE_PATH
+
+    Returns:
+        Mapping of table key to recommendation (empty if the file is missing)
+    """
+    path = path or os.getenv('LLM_PRECOMPUTED_TABLE', DEFAULT_TABLE_PATH)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read recommendation table {path}: {str(e)}")
+        return {}
+
+    if data.get('version') != TABLE_VERSION:
+        logger.warning(f"Ignoring recommendation table {path} with unsupported version {data.get('version')}")
+        return {}
+
+    # Identical texts are stored once and referenced by index
+    texts = data.get('texts', [])
+    return {key: texts[index] for key, index in data.get('index', {}).items()}
+
+
+def save_table(table: Dict[str, str], path: str = None) -> None:
+    """
+    Writes a lookup table as compressed JSON, storing each distinct text once.
+
+    Args:
+        table: Mapping of table key to recommendation
+        path: Destination file, defaults to DEFAULT_TABLE_PATH
+    """
+    path = path or DEFAULT_TABLE_PATH
+    texts = []
+    text_index = {}
+    index = {}
+    for key in sorted(table):
+        text = table[key]
+        if text not in text_index:
+            text_index[text] = len(texts)
+            texts.append(text)
+        index[key] = text_index[text]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump({"version": TABLE_VERSION, "texts": texts, "index": index}, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def lookup_precomputed(test_type: str, detailed_results: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the precomputed recommendation of a score vector, if any.
+    The table is loaded once per process, on first use.
+    """
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = load_table()
+                logger.info(f"Loaded {len(_table)} precomputed recommendations")
+    if not _table or not detailed_results:
+        return None
+    return _table.get(table_key(test_type, detailed_results))
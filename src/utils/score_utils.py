@@ -1,3 +1,40 @@
+# Correct answers of the dyscalculia questions
+DYSCALCULIE_CORRECT_ANSWERS = {
+    "q1": 8,
+    "q2": 6,
+    "q3": "10",
+    "q4": "Une voiture"
+}
+
+# Maximum score of each TDAH sub-test
+TDAH_MAX_SCORES = {
+    "memorisation": 3,
+    "attention": 4,
+    "impulsivite": 1,
+    "memoire": 1,
+    "organisation": 1,
+    "flexibilite": 2
+}
+
+# Maximum score of each dyslexia sub-test
+DYSLEXIE_MAX_SCORES = {
+    "denomination_rapide": 3,
+    "pseudo_mots": 4,
+    "suppression_phonemique": 3,
+    "fluidite_lecture": 2,
+    "memoire_sons": 3,
+    "confusion_lettres": 6
+}
+
+# Maximum score of each dysgraphia sub-test
+DYSGRAPHIE_MAX_SCORES = {
+    "copie_texte": 3,
+    "ecriture_spontanee": 3,
+    "vitesse_endurance": 3,
+    "graphisme_coordination": 3,
+    "lisibilite_orthographe": 3
+}
+
 def check_answers_and_provide_solutions(test_type, responses):
     """
     Check answers and provide solutions if needed
@@ -8,16 +45,8 @@ def check_answers_and_provide_solutions(test_type, responses):
     solutions = ""
     
     if test_type == "dyscalculie":
-        # Définir les réponses correctes
-        correct_values = {
-            "q1": 8,
-            "q2": 6,
-            "q3": "10",
-            "q4": "Une voiture"
-        }
-        
         # Vérifier chaque réponse
-        for q, correct_val in correct_values.items():
+        for q, correct_val in DYSCALCULIE_CORRECT_ANSWERS.items():
             if q in responses:
                 total_questions += 1
                 if str(responses[q]) == str(correct_val):
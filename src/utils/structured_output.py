@@ -0,0 +1,180 @@
+"""
+Extraction of structured (JSON) answers from LLM responses.
+
+Prompts that expect structured output ask for JSON and declare a schema.
+The response is scanned once, left to right: the first balanced JSON value
+(object or array, possibly inside a ```json fence or surrounded by prose) is
+parsed, with common defects repaired locally (smart or single quotes,
+trailing commas, a value cut off by max_tokens). The value is then
+validated against the schema, and repaired where the intent is clear
+(unknown enum values dropped, duplicates removed, lists truncated, a lone
+string wrapped in a list), so a sloppy answer does not cost a regeneration.
+As a last resort, a list of allowed strings is read from the prose itself.
+
+Schemas use a small subset of JSON Schema: type, enum, items, minItems,
+maxItems, uniqueItems, properties and required.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '«': '"', '»': '"',
+                               '‘': "'", '’': "'"})
+_TRAILING_COMMA = re.compile(r',\s*([\]}])')
+_CLOSERS = {'{': '}', '[': ']'}
+
+_TYPES = {
+    "array": list,
+    "object": dict,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool
+}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a response holds no value matching the expected schema."""
+
+
+def _candidates(text: str) -> Iterator[Tuple[str, bool]]:
+    """
+    Yields the bracketed spans of a text in one pass, with whether each one is
+    complete. Brackets inside strings are ignored; an unfinished span at the
+    end of the text (a truncated answer) is yielded with its missing closers.
+    """
+    stack = []
+    start = None
+    in_string = None
+    escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == in_string:
+                in_string = None
+            continue
+        if char in '"“' and stack:
+            in_string = '"' if char == '"' else '”'
+        elif char in _CLOSERS:
+            if not stack:
+                start = index
+            stack.append(_CLOSERS[char])
+        elif stack and char == stack[-1]:
+            stack.pop()
+            if not stack:
+                yield text[start:index + 1], True
+        elif stack and char in ']}':
+            # Mismatched closer: give up on this span and resume scanning
+            stack = []
+    if stack:
+        yield text[start:] + (in_string or '') + ''.join(reversed(stack)), False
+
+
+def _repairs(candidate: str) -> Iterator[str]:
+    """The candidate itself, then versions with common defects fixed."""
+    yield candidate
+    fixed = _TRAILING_COMMA.sub(r'\1', candidate.translate(_SMART_QUOTES))
+    yield fixed
+    if '"' not in fixed:
+        yield fixed.replace("'", '"')
+    # A truncated answer may end with a partial element: drop it
+    yield _TRAILING_COMMA.sub(r'\1', re.sub(r',\s*"[^"]*"?\s*([\]}]+)$', r'\1', fixed))
+
+
+def _parse(candidate: str) -> Optional[Any]:
+    for repaired in _repairs(candidate):
+        try:
+            return json.loads(repaired)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def conform(value: Any, schema: Dict[str, Any]) -> Any:
+    """
+    Validates a value against a schema, repairing it where possible.
+
+    Returns:
+        The value, possibly repaired
+
+    Raises:
+        StructuredOutputError: If the value cannot be made to match
+    """
+    expected = schema.get("type")
+    if expected == "array" and isinstance(value, (str, dict)):
+        value = [value]
+    if (expected and not isinstance(value, _TYPES[expected])) or (isinstance(value, bool) and expected in ("integer", "number")):
+        raise StructuredOutputError(f"Expected {expected}, got {type(value).__name__}")
+
+    if "enum" in schema and value not in schema["enum"]:
+        raise StructuredOutputError(f"{value!r} is not one of the allowed values")
+
+    if isinstance(value, list):
+        items = []
+        for item in value:
+            try:
+                items.append(conform(item, schema["items"]) if "items" in schema else item)
+            except StructuredOutputError as e:
+                logger.debug("Dropping invalid item %r: %s", item, e)
+        if schema.get("uniqueItems"):
+            items = [item for index, item in enumerate(items) if item not in items[:index]]
+        if "maxItems" in schema:
+            items = items[:schema["maxItems"]]
+        if len(items) < schema.get("minItems", 0):
+            raise StructuredOutputError(f"Expected at least {schema['minItems']} valid items, got {len(items)}")
+        return items
+
+    if isinstance(value, dict):
+        missing = [name for name in schema.get("required", []) if name not in value]
+        if missing:
+            raise StructuredOutputError(f"Missing properties: {', '.join(missing)}")
+        properties = schema.get("properties", {})
+        return {name: conform(item, properties[name]) if name in properties else item
+                for name, item in value.items()}
+
+    return value
+
+
+def extract_json(text: str, schema: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Returns the first JSON value of a response that matches the schema.
+
+    Args:
+        text: Raw response from the LLM
+        schema: Expected shape of the value (see module docstring)
+
+    Returns:
+        The parsed and conformed value
+
+    Raises:
+        StructuredOutputError: If no value in the response matches
+    """
+    error = None
+    for candidate, complete in _candidates(text or ""):
+        value = _parse(candidate)
+        if value is None:
+            continue
+        if not complete:
+            logger.debug("Repaired a truncated JSON value")
+        if schema is None:
+            return value
+        try:
+            return conform(value, schema)
+        except StructuredOutputError as e:
+            error = e
+
+    # Prose answer naming allowed values, e.g. "calculator puis number_line"
+    allowed = (schema or {}).get("items", {}).get("enum") if (schema or {}).get("type") == "array" else None
+    if allowed and text:
+        positions = [(match.start(), value) for value in allowed
+                     for match in [re.search(rf'\b{re.escape(str(value))}\b', text)] if match]
+        if positions:
+            return conform([value for _, value in sorted(positions)], schema)
+    raise error or StructuredOutputError("No JSON value found in the response")